@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets', 'assets')],
+    datas=[('assets', 'assets'), ('database/migraciones', 'database/migraciones')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -34,6 +34,8 @@ async def build_sidebar(page: ft.Page, contenido_area: ft.Container, vista_actua
             vista_actual[0] = vista_nombre
             # Lazy import
             import importlib
+            from database.asincrono import cancelar_pantalla
+            cancelar_pantalla(page)  # corta las consultas pendientes de la pantalla anterior
             modulo = importlib.import_module(f"screens.{module_name}")
             contenido_area.content = modulo.build(page, content_area=contenido_area)
             if on_nav_change:
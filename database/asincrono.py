@@ -0,0 +1,194 @@
+"""
+Fachada asíncrona sobre database.connection para las pantallas Flet.
+
+Las llamadas a la BD se ejecutan en un ThreadPoolExecutor propio, con tantos
+hilos como conexiones tiene el pool (SBE_DB_POOL_TAMANO), en vez del executor
+por defecto de asyncio.to_thread (que puede lanzar más hilos que conexiones).
+
+  - correr(func, *args): ejecuta cualquier función CRUD y la espera sin
+    bloquear el event loop de Flet.
+  - ejecutar_async / ejecutar_modificar_async: equivalentes awaitables.
+  - Backpressure: como máximo SBE_DB_EJECUTOR_MAX_PENDIENTES trabajos admitidos
+    (en cola + en ejecución); el resto espera su turno y, pasado
+    SBE_DB_EJECUTOR_TIMEOUT_S, falla con ColaDBLlenaError.
+  - Cancelación: si la tarea que espera se cancela (p. ej. el usuario cambió de
+    pantalla) y el trabajo aún no empezó, no llega a ejecutarse; si ya empezó,
+    su consulta en curso se interrumpe con KILL QUERY (database/cancelacion.py).
+  - token_pantalla(page) / cancelar_pantalla(page): token por pantalla; al
+    navegar a otra se cancela y los trabajos lanzados bajo él (with token.activar())
+    fallan con ConsultaCanceladaError en vez de seguir ocupando conexiones.
+  - estadisticas(): profundidad de cola, en ejecución, esperas y cancelaciones.
+  - hilos_libres(): hilos del executor sin trabajo; las pantallas que lanzan
+    varias consultas a la vez lo usan para no acaparar el pool.
+"""
+import asyncio
+import contextvars
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from database.cancelacion import TokenCancelacion, actual as token_actual
+from database.config import DB_POOL_TAMANO, DB_EJECUTOR_MAX_PENDIENTES, DB_EJECUTOR_TIMEOUT_S
+from database.connection import ejecutar, ejecutar_modificar
+
+
+class ColaDBLlenaError(RuntimeError):
+    """Demasiados trabajos de BD pendientes; no se admitió uno nuevo a tiempo."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_semaforos = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+
+_m_lock = threading.Lock()
+_m = {
+    "admitidos": 0,
+    "completados": 0,
+    "errores": 0,
+    "cancelados": 0,
+    "rechazados": 0,
+    "en_cola": 0,
+    "en_ejecucion": 0,
+    "max_en_cola": 0,
+    "espera_cola_total_s": 0.0,
+    "espera_cola_max_s": 0.0,
+}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_POOL_TAMANO, thread_name_prefix="sbe-db")
+    return _executor
+
+
+def _semaforo(loop):
+    sem = _semaforos.get(loop)
+    if sem is None:
+        sem = _semaforos[loop] = asyncio.Semaphore(DB_EJECUTOR_MAX_PENDIENTES)
+    return sem
+
+
+async def correr(func, *args, **kwargs):
+    """
+    Ejecuta func(*args, **kwargs) en el executor de BD y retorna su resultado.
+    Uso en pantallas: stats = await correr(crud_turno.get_turno_stats, _tb, brigada_rol_id)
+    """
+    loop = asyncio.get_running_loop()
+    sem = _semaforo(loop)
+    try:
+        await asyncio.wait_for(sem.acquire(), timeout=DB_EJECUTOR_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        with _m_lock:
+            _m["rechazados"] += 1
+        raise ColaDBLlenaError(
+            f"Cola de BD llena ({DB_EJECUTOR_MAX_PENDIENTES} pendientes) tras {DB_EJECUTOR_TIMEOUT_S:.0f}s"
+        ) from None
+
+    estado = {"iniciado": False, "cancelado": False}
+    encolado = perf_counter()
+    ctx = contextvars.copy_context()
+    token = TokenCancelacion(padre=token_actual())  # hijo del token de la pantalla, si hay
+
+    def _en_contexto():
+        with token.activar():
+            return func(*args, **kwargs)
+
+    def _trabajo():
+        with _m_lock:
+            _m["en_cola"] -= 1
+            if estado["cancelado"]:
+                return None
+            estado["iniciado"] = True
+            espera = perf_counter() - encolado
+            _m["en_ejecucion"] += 1
+            _m["espera_cola_total_s"] += espera
+            _m["espera_cola_max_s"] = max(_m["espera_cola_max_s"], espera)
+        try:
+            token.comprobar()
+            return ctx.run(_en_contexto)
+        finally:
+            with _m_lock:
+                _m["en_ejecucion"] -= 1
+
+    try:
+        with _m_lock:
+            _m["admitidos"] += 1
+            _m["en_cola"] += 1
+            _m["max_en_cola"] = max(_m["max_en_cola"], _m["en_cola"])
+        futuro = _get_executor().submit(_trabajo)
+        try:
+            resultado = await asyncio.wrap_future(futuro)
+        except asyncio.CancelledError:
+            with _m_lock:
+                _m["cancelados"] += 1
+                if not estado["iniciado"]:
+                    estado["cancelado"] = True
+                    if futuro.cancel():
+                        _m["en_cola"] -= 1
+            token.cancelar()  # si ya empezó, interrumpe su consulta en curso
+            raise
+        except Exception:
+            with _m_lock:
+                _m["errores"] += 1
+            raise
+        with _m_lock:
+            _m["completados"] += 1
+        return resultado
+    finally:
+        sem.release()
+
+
+async def ejecutar_async(consulta, params=None, commit=False):
+    """Versión awaitable de connection.ejecutar()."""
+    return await correr(ejecutar, consulta, params, commit)
+
+
+async def ejecutar_modificar_async(consulta, params=None):
+    """Versión awaitable de connection.ejecutar_modificar()."""
+    return await correr(ejecutar_modificar, consulta, params)
+
+
+_CLAVE_TOKEN = "_token_pantalla"
+
+
+def token_pantalla(page) -> TokenCancelacion:
+    """Token de la pantalla visible; se cancela con cancelar_pantalla() al navegar a otra."""
+    datos = page.data if isinstance(getattr(page, "data", None), dict) else None
+    if datos is None:
+        return TokenCancelacion()
+    token = datos.get(_CLAVE_TOKEN)
+    if token is None:
+        token = datos[_CLAVE_TOKEN] = TokenCancelacion()
+    return token
+
+
+def cancelar_pantalla(page):
+    """Cancela las consultas de la pantalla que se abandona y prepara un token nuevo para la siguiente."""
+    datos = page.data if isinstance(getattr(page, "data", None), dict) else None
+    if datos is None:
+        return
+    anterior = datos.get(_CLAVE_TOKEN)
+    datos[_CLAVE_TOKEN] = TokenCancelacion()
+    if anterior is not None:
+        anterior.cancelar()
+
+
+def hilos_libres() -> int:
+    """Hilos (y por tanto conexiones) del executor que no tienen trabajo en cola ni en ejecución."""
+    with _m_lock:
+        return max(0, DB_POOL_TAMANO - _m["en_cola"] - _m["en_ejecucion"])
+
+
+def estadisticas() -> dict:
+    """Métricas del executor: profundidad de cola, trabajos en ejecución, esperas, cancelaciones."""
+    with _m_lock:
+        m = dict(_m)
+    iniciados = m["completados"] + m["errores"] + m["en_ejecucion"]
+    m["hilos"] = DB_POOL_TAMANO
+    m["max_pendientes"] = DB_EJECUTOR_MAX_PENDIENTES
+    m["espera_cola_promedio_s"] = round(m["espera_cola_total_s"] / iniciados, 4) if iniciados else 0.0
+    return m
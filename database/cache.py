@@ -0,0 +1,231 @@
+"""
+Caché de resultados de lectura para el SBE, invalidada por tablas.
+
+Las consultas de referencia (brigadas, instituciones, mensaje del día,
+agregados de estadísticas) se repiten en cada navegación. Aquí se guardan en
+memoria del proceso:
+  - cada lectura declara las tablas de las que depende (etiquetas),
+  - toda escritura invalida las tablas que toca: ejecutar(commit=True) y
+    ejecutar_modificar() lo hacen solas leyendo el SQL (invalidar_sql()); las
+    escrituras con cursor propio llaman a invalidar("tabla") tras el commit,
+  - TTL por entrada (SBE_DB_CACHE_TTL_S) y LRU acotado (SBE_DB_CACHE_MAX),
+  - una sola carga por clave a la vez: si varios hilos (p. ej. muchas sesiones
+    abriendo el dashboard a la vez) piden una clave que falta, uno la calcula y
+    los demás esperan su resultado en vez de repetir la consulta,
+  - contadores de aciertos/fallos/invalidaciones (estadisticas()).
+
+Uso:
+    @cacheado("brigada", "usuario")
+    def listar_brigadas(...): ...
+
+o, para una consulta suelta, connection.ejecutar_cacheado(sql, params, tablas=(...)).
+Las funciones cacheadas reciben copias: el llamador puede modificar el resultado.
+"""
+import contextvars
+import copy
+import functools
+import re
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from database.config import DB_CACHE, DB_CACHE_TTL_S, DB_CACHE_MAX
+
+_lock = threading.Lock()
+_datos = OrderedDict()      # clave -> (valor, expira, tablas)
+_por_tabla = {}             # tabla -> set(claves)
+_generacion = {}            # tabla -> nº de invalidaciones (evita guardar lecturas que se cruzaron con una escritura)
+_epoca = 0                  # se incrementa con limpiar()
+_oyentes = []               # funciones avisadas en cada invalidación (ver al_invalidar)
+_en_vuelo = {}              # clave -> threading.Event de la carga en curso
+_diferidas = contextvars.ContextVar("sbe_cache_diferidas", default=None)  # tablas pendientes en una transacción
+
+_m = {
+    "aciertos": 0,
+    "fallos": 0,
+    "expiradas": 0,
+    "desalojadas": 0,
+    "invalidaciones": 0,
+    "entradas_invalidadas": 0,
+    "esperas_carga": 0,
+}
+
+# Tablas destino de una escritura (INSERT/REPLACE/UPDATE/DELETE y DDL)
+_RE_ESCRITURA = re.compile(
+    r"^\s*(?:"
+    r"(?:INSERT|REPLACE)\s+(?:LOW_PRIORITY\s+|DELAYED\s+|HIGH_PRIORITY\s+)?(?:IGNORE\s+)?(?:INTO\s+)?"
+    r"|UPDATE\s+(?:LOW_PRIORITY\s+)?(?:IGNORE\s+)?"
+    r"|DELETE\s+(?:LOW_PRIORITY\s+)?(?:QUICK\s+)?(?:IGNORE\s+)?(?:\w+(?:\s*,\s*\w+)*\s+)?FROM\s+"
+    r"|(?:CREATE|ALTER|DROP|TRUNCATE)\s+TABLE\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?"
+    r")`?(\w+)`?",
+    re.I,
+)
+_RE_JOIN = re.compile(r"\bJOIN\s+`?(\w+)`?", re.I)
+_RE_COMENTARIOS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+
+
+def tablas_escritas(consulta: str) -> set:
+    """Tablas que modifica una sentencia (vacío si es una lectura)."""
+    sql = _RE_COMENTARIOS.sub(" ", consulta or "")
+    m = _RE_ESCRITURA.match(sql)
+    if not m:
+        return set()
+    tablas = {m.group(1).lower()}
+    if sql.lstrip()[:6].upper() in ("UPDATE", "DELETE"):
+        # UPDATE/DELETE multi-tabla: las tablas del JOIN también pueden cambiar
+        tablas.update(t.lower() for t in _RE_JOIN.findall(sql))
+    return tablas
+
+
+def _quitar(clave):
+    valor = _datos.pop(clave, None)
+    if valor is not None:
+        for t in valor[2]:
+            claves = _por_tabla.get(t)
+            if claves is not None:
+                claves.discard(clave)
+    return valor
+
+
+def leer(clave, tablas, calcular, ttl=None):
+    """
+    Retorna el valor cacheado para 'clave' o lo calcula con calcular() y lo guarda
+    etiquetado con 'tablas'. Las excepciones de calcular() no se cachean.
+    """
+    if not DB_CACHE:
+        return calcular()
+    tablas = tuple(t.lower() for t in tablas)
+    esperado = False
+    while True:
+        ahora = monotonic()
+        with _lock:
+            entrada = _datos.get(clave)
+            if entrada is not None:
+                if entrada[1] > ahora:
+                    _datos.move_to_end(clave)
+                    _m["aciertos"] += 1
+                    return entrada[0]
+                _quitar(clave)
+                _m["expiradas"] += 1
+            evento = _en_vuelo.get(clave)
+            if evento is None or esperado:
+                # Tras esperar una carga que no se guardó (error o escritura cruzada) se calcula sin coordinar
+                propia = evento is None
+                if propia:
+                    evento = _en_vuelo[clave] = threading.Event()
+                _m["fallos"] += 1
+                generaciones = (_epoca,) + tuple(_generacion.get(t, 0) for t in tablas)
+                break
+            _m["esperas_carga"] += 1
+        evento.wait()
+        esperado = True
+
+    try:
+        valor = calcular()
+
+        ttl = DB_CACHE_TTL_S if ttl is None else ttl
+        with _lock:
+            if generaciones != (_epoca,) + tuple(_generacion.get(t, 0) for t in tablas):
+                return valor  # una escritura se cruzó con la lectura: no guardar
+            _quitar(clave)
+            _datos[clave] = (valor, monotonic() + ttl, tablas)
+            for t in tablas:
+                _por_tabla.setdefault(t, set()).add(clave)
+            while len(_datos) > DB_CACHE_MAX:
+                _quitar(next(iter(_datos)))
+                _m["desalojadas"] += 1
+        return valor
+    finally:
+        if propia:
+            with _lock:
+                _en_vuelo.pop(clave, None)
+            evento.set()
+
+
+def cacheado(*tablas, ttl=None):
+    """
+    Decorador read-through: cachea el resultado por argumentos y lo invalida cuando
+    se escribe en alguna de 'tablas'. Devuelve una copia profunda en cada llamada.
+    """
+    def decorador(func):
+        nombre = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def envoltura(*args, **kwargs):
+            clave = (nombre, args, tuple(sorted(kwargs.items())))
+            return copy.deepcopy(leer(clave, tablas, lambda: func(*args, **kwargs), ttl))
+
+        envoltura.sin_cache = func
+        return envoltura
+    return decorador
+
+
+def invalidar(*tablas):
+    """Descarta las entradas que dependen de cualquiera de las tablas indicadas."""
+    if not tablas:
+        return
+    pendientes = _diferidas.get()
+    if pendientes is not None:
+        pendientes.update(t.lower() for t in tablas)
+        return
+    with _lock:
+        _m["invalidaciones"] += 1
+        for t in tablas:
+            t = t.lower()
+            _generacion[t] = _generacion.get(t, 0) + 1
+            for clave in list(_por_tabla.pop(t, ())):
+                if _quitar(clave) is not None:
+                    _m["entradas_invalidadas"] += 1
+    for oyente in _oyentes:
+        oyente({t.lower() for t in tablas})
+
+
+def al_invalidar(funcion):
+    """Registra funcion(tablas) para que se llame tras cada escritura (p. ej. la réplica local)."""
+    _oyentes.append(funcion)
+
+
+def diferir_invalidaciones():
+    """
+    A partir de aquí (en este contexto) invalidar() acumula las tablas en vez de
+    aplicarlas; connection.transaccion() las aplica tras el COMMIT. Retorna el
+    token para aplicar_diferidas().
+    """
+    return _diferidas.set(set())
+
+
+def aplicar_diferidas(token, aplicar=True):
+    """Cierra el bloque de diferir_invalidaciones(); aplicar=False las descarta (ROLLBACK)."""
+    pendientes = _diferidas.get()
+    _diferidas.reset(token)
+    if aplicar and pendientes:
+        invalidar(*pendientes)
+
+
+def invalidar_sql(consulta: str):
+    """Invalida las tablas que modifica 'consulta' (no hace nada con lecturas)."""
+    tablas = tablas_escritas(consulta)
+    if tablas:
+        invalidar(*tablas)
+
+
+def limpiar():
+    """Vacía la caché completa (los contadores se conservan)."""
+    global _epoca
+    with _lock:
+        _epoca += 1
+        _datos.clear()
+        _por_tabla.clear()
+
+
+def estadisticas() -> dict:
+    """Aciertos, fallos, tasa de acierto, entradas, esperas a cargas en curso y contadores de invalidación."""
+    with _lock:
+        m = dict(_m)
+        m["entradas"] = len(_datos)
+        m["tablas"] = sorted(t for t, c in _por_tabla.items() if c)
+    consultas = m["aciertos"] + m["fallos"]
+    m["tasa_acierto"] = round(m["aciertos"] / consultas, 3) if consultas else 0.0
+    m["max_entradas"] = DB_CACHE_MAX
+    m["ttl_s"] = DB_CACHE_TTL_S
+    return m
@@ -0,0 +1,183 @@
+"""
+Tiempo máximo por consulta y cancelación cooperativa para el SBE.
+
+  - ejecutar(..., timeout_s=N): en un SELECT el propio servidor corta la
+    consulta: hint /*+ MAX_EXECUTION_TIME(ms) */ en MySQL y
+    SET STATEMENT max_statement_time=N FOR ... en MariaDB (que ignora el hint).
+    En el resto de sentencias, en los lotes, o si no se sabe qué servidor es,
+    un temporizador lanza KILL QUERY sobre el hilo del servidor. En todos los
+    casos la llamada falla con TiempoAgotadoError.
+  - TokenCancelacion: token.cancelar() hace fallar con ConsultaCanceladaError
+    las consultas que aún no empezaron y mata (KILL QUERY) las que están en curso.
+    Se activa por contexto (with token.activar(): ...) y lo respetan ejecutar(),
+    ejecutar_modificar() y todo lo que pase por ellas, sin cambiar las firmas CRUD.
+    Los tokens se anidan: cancelar un token cancela los creados bajo él.
+
+database.asincrono.correr() crea un token por trabajo (cancelar la tarea asyncio
+mata su consulta) y las pantallas usan un token por pantalla que se cancela al
+navegar a otra (asincrono.token_pantalla / cancelar_pantalla).
+
+KILL QUERY viaja por una conexión aparte (no del pool, que puede estar lleno) y
+deja viva la conexión original; solo se interrumpe la sentencia.
+"""
+import contextvars
+import re
+import threading
+import weakref
+
+from mysql.connector import Error
+
+ER_QUERY_INTERRUPTED = 1317   # KILL QUERY
+ER_QUERY_TIMEOUT = 3024       # MAX_EXECUTION_TIME superado
+ER_STATEMENT_TIMEOUT = 1969   # MariaDB: max_statement_time superado
+
+_RE_SELECT = re.compile(r"^\s*SELECT\b(?!\s*/\*\+)", re.IGNORECASE)
+
+_token = contextvars.ContextVar("sbe_token_cancelacion", default=None)
+
+
+class ConsultaCanceladaError(RuntimeError):
+    """La consulta se canceló (TokenCancelacion) antes o durante su ejecución."""
+
+
+class TiempoAgotadoError(ConsultaCanceladaError):
+    """La consulta superó su tiempo máximo (timeout_s) y el servidor la interrumpió."""
+
+
+def actual():
+    """Token de cancelación activo en el contexto, o None."""
+    return _token.get()
+
+
+class TokenCancelacion:
+    """Permite cancelar desde otro hilo/tarea las consultas lanzadas bajo él."""
+
+    def __init__(self, padre=None):
+        self._lock = threading.Lock()
+        self.cancelado = False
+        self._vigiladas = set()
+        self._hijos = weakref.WeakSet()
+        if padre is not None:
+            with padre._lock:
+                padre._hijos.add(self)
+                self.cancelado = padre.cancelado
+
+    def cancelar(self):
+        """Marca el token (y sus hijos) como cancelado y mata sus consultas en curso (en segundo plano)."""
+        vigiladas = []
+        pendientes = [self]
+        while pendientes:
+            token = pendientes.pop()
+            with token._lock:
+                if token.cancelado and not token._vigiladas and not token._hijos:
+                    continue
+                token.cancelado = True
+                vigiladas.extend(token._vigiladas)
+                pendientes.extend(token._hijos)
+        if vigiladas:
+            threading.Thread(
+                target=lambda: [v.matar("cancelada") for v in vigiladas],
+                name="sbe-db-cancelar", daemon=True,
+            ).start()
+
+    def comprobar(self):
+        """Lanza ConsultaCanceladaError si el token ya se canceló."""
+        if self.cancelado:
+            raise ConsultaCanceladaError("Consulta cancelada")
+
+    def activar(self):
+        """Context manager: las consultas del bloque (y de los hilos que copien el contexto) usan este token."""
+        return _Activacion(self)
+
+    def _agregar(self, vigilancia):
+        with self._lock:
+            self.comprobar()
+            self._vigiladas.add(vigilancia)
+
+    def _quitar(self, vigilancia):
+        with self._lock:
+            self._vigiladas.discard(vigilancia)
+
+
+class _Activacion:
+    def __init__(self, token):
+        self._token = token
+        self._reset = None
+
+    def __enter__(self):
+        self._reset = _token.set(self._token)
+        return self._token
+
+    def __exit__(self, *exc):
+        _token.reset(self._reset)
+        return False
+
+
+def con_limite(consulta: str, timeout_s, mariadb=None) -> tuple[str, bool]:
+    """
+    Pone un tiempo máximo en el servidor a un SELECT: hint MAX_EXECUTION_TIME en
+    MySQL (mariadb=False), SET STATEMENT max_statement_time en MariaDB
+    (mariadb=True). Retorna (sql, aplicado); si no se pudo (no es SELECT, ya
+    trae hints o no se sabe qué servidor es) hay que vigilar con KILL QUERY.
+    """
+    if not timeout_s or mariadb is None or not _RE_SELECT.match(consulta):
+        return consulta, False
+    if mariadb:
+        return f"SET STATEMENT max_statement_time={max(0.001, timeout_s):g} FOR {consulta.lstrip()}", True
+    ms = max(1, int(timeout_s * 1000))
+    return _RE_SELECT.sub(lambda m: f"{m.group(0)} /*+ MAX_EXECUTION_TIME({ms}) */", consulta, count=1), True
+
+
+class Vigilancia:
+    """
+    Envuelve la ejecución de una sentencia en 'conn': comprueba el token activo,
+    arma el temporizador de KILL QUERY (si timeout_s y sin hint) y traduce los
+    errores de interrupción del servidor a TiempoAgotadoError / ConsultaCanceladaError.
+    matar_consulta(connection_id) abre su propia conexión para el KILL.
+    """
+
+    def __init__(self, conn, matar_consulta, timeout_s=None, temporizador=True):
+        self._conn = conn
+        self._matar_consulta = matar_consulta
+        self._timeout_s = timeout_s
+        self._temporizador = temporizador and bool(timeout_s)
+        self._token = _token.get()
+        self._lock = threading.Lock()
+        self._activa = False
+        self._timer = None
+        self.motivo = None
+
+    def __enter__(self):
+        if self._token is not None:
+            self._token._agregar(self)
+        self._activa = True
+        if self._temporizador:
+            self._timer = threading.Timer(self._timeout_s, self.matar, ("tiempo",))
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Con el lock: un KILL en curso termina antes de que la conexión vuelva al pool
+        with self._lock:
+            self._activa = False
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._token is not None:
+            self._token._quitar(self)
+        if isinstance(exc, Error) and exc.errno in (ER_QUERY_INTERRUPTED, ER_QUERY_TIMEOUT, ER_STATEMENT_TIMEOUT):
+            if exc.errno in (ER_QUERY_TIMEOUT, ER_STATEMENT_TIMEOUT) or self.motivo == "tiempo":
+                raise TiempoAgotadoError(f"La consulta superó {self._timeout_s:g}s") from exc
+            raise ConsultaCanceladaError("Consulta cancelada") from exc
+        return False
+
+    def matar(self, motivo):
+        """Interrumpe la sentencia en curso (KILL QUERY); no hace nada si ya terminó."""
+        with self._lock:
+            if not self._activa or self.motivo is not None:
+                return
+            self.motivo = motivo
+            try:
+                self._matar_consulta(self._conn.connection_id)
+            except Exception as e:
+                print(f"[DB] No se pudo interrumpir la consulta ({motivo}): {e}")
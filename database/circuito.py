@@ -0,0 +1,127 @@
+"""
+Interruptor de circuito (circuit breaker) para la conexión remota a MySQL.
+
+Con el host inalcanzable cada intento de conexión tarda connection_timeout
+(10 s) en fallar, y una pantalla que consulta varias veces se congela durante
+todo ese tiempo. Tras SBE_DB_CIRCUITO_FALLOS fallos de red consecutivos el
+circuito se abre:
+  - get_connection() falla al instante con CircuitoAbiertoError (RuntimeError),
+    así las pantallas muestran su estado vacío/error sin esperar,
+  - un hilo en segundo plano sondea el servidor cada SBE_DB_CIRCUITO_SONDEO_S
+    segundos y cierra el circuito en cuanto vuelve a responder.
+"""
+import threading
+import time
+
+from mysql.connector import errorcode
+from mysql.connector.errors import InterfaceError, OperationalError
+
+# Errores del cliente que indican un problema de red con el servidor
+ERRORES_RED = {
+    errorcode.CR_CONN_HOST_ERROR,        # 2003: no se puede conectar
+    errorcode.CR_UNKNOWN_HOST,           # 2005
+    errorcode.CR_SERVER_GONE_ERROR,      # 2006
+    errorcode.CR_SERVER_LOST,            # 2013
+    errorcode.CR_SERVER_LOST_EXTENDED,   # 2055
+}
+
+
+class CircuitoAbiertoError(RuntimeError):
+    """La base de datos se considera caída: la llamada se rechazó sin intentar conectar."""
+
+
+def es_error_de_red(error) -> bool:
+    """True si la excepción es una caída/timeout de red (no un error de SQL)."""
+    if isinstance(error, (InterfaceError, OperationalError)):
+        return error.errno in ERRORES_RED or error.errno is None or error.errno == -1
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class Interruptor:
+    """Circuito cerrado/abierto con sondeo de recuperación en segundo plano."""
+
+    def __init__(self, umbral: int = 3, intervalo_sondeo: float = 5.0, sondear=None):
+        self.umbral = max(1, int(umbral))
+        self.intervalo_sondeo = intervalo_sondeo
+        self._sondear = sondear
+        self._lock = threading.Lock()
+        self._fallos = 0
+        self._abierto_desde = None
+        self._ultimo_error = None
+        self._hilo = None
+        self._m = {"aperturas": 0, "rechazos": 0, "sondeos": 0, "fallos": 0}
+
+    @property
+    def abierto(self) -> bool:
+        return self._abierto_desde is not None
+
+    def permitir(self):
+        """Lanza CircuitoAbiertoError si el circuito está abierto."""
+        if self._abierto_desde is None:
+            return
+        with self._lock:
+            if self._abierto_desde is None:
+                return
+            self._m["rechazos"] += 1
+            segundos = time.monotonic() - self._abierto_desde
+            error = self._ultimo_error
+        raise CircuitoAbiertoError(
+            f"Base de datos no disponible (sin respuesta hace {segundos:.0f}s): {error}"
+        )
+
+    def exito(self):
+        """Una conexión o consulta llegó al servidor: reinicia la cuenta de fallos."""
+        if self._fallos or self._abierto_desde is not None:
+            with self._lock:
+                self._fallos = 0
+                if self._abierto_desde is not None:
+                    self._cerrar()
+
+    def fallo(self, error):
+        """Registra un fallo; solo cuentan los de red (ver es_error_de_red)."""
+        if not es_error_de_red(error):
+            return
+        with self._lock:
+            self._m["fallos"] += 1
+            self._fallos += 1
+            self._ultimo_error = error
+            if self._abierto_desde is None and self._fallos >= self.umbral:
+                self._abierto_desde = time.monotonic()
+                self._m["aperturas"] += 1
+                print(f"[DB] Circuito abierto tras {self._fallos} fallos de conexión: {error}")
+                if self._sondear is not None and (self._hilo is None or not self._hilo.is_alive()):
+                    self._hilo = threading.Thread(target=self._bucle_sondeo, name="sbe-db-sondeo", daemon=True)
+                    self._hilo.start()
+
+    def _cerrar(self):
+        duracion = time.monotonic() - self._abierto_desde
+        self._abierto_desde = None
+        print(f"[DB] Circuito cerrado: el servidor responde de nuevo (caído {duracion:.0f}s)")
+
+    def _bucle_sondeo(self):
+        while self._abierto_desde is not None:
+            time.sleep(self.intervalo_sondeo)
+            with self._lock:
+                self._m["sondeos"] += 1
+            try:
+                self._sondear()
+            except Exception as e:
+                with self._lock:
+                    self._ultimo_error = e
+                continue
+            with self._lock:
+                self._fallos = 0
+                if self._abierto_desde is not None:
+                    self._cerrar()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            m = dict(self._m)
+            m.update({
+                "abierto": self._abierto_desde is not None,
+                "abierto_s": round(time.monotonic() - self._abierto_desde, 1) if self._abierto_desde else 0.0,
+                "fallos_consecutivos": self._fallos,
+                "umbral": self.umbral,
+                "ultimo_error": str(self._ultimo_error) if self._ultimo_error else None,
+            })
+        return m
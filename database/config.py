@@ -31,3 +31,69 @@ else:
     DB_USER = os.environ.get("SBE_DB_USER_LOCAL", "root")
     DB_PASSWORD = os.environ.get("SBE_DB_PASSWORD_LOCAL", "")
     DB_NAME = os.environ.get("SBE_DB_NAME_LOCAL", "db_brigadas_maracaibo")
+
+# Telemetría de consultas (ver database/telemetria.py)
+DB_TELEMETRIA = os.environ.get("SBE_DB_TELEMETRIA", "1") != "0"
+DB_TELEMETRIA_ARCHIVO = os.environ.get("SBE_DB_TELEMETRIA_ARCHIVO", "")
+DB_LENTA_MS = int(os.environ.get("SBE_DB_LENTA_MS", "500"))
+
+# Pool de conexiones (ver database/pool.py)
+DB_POOL_TAMANO = int(os.environ.get("SBE_DB_POOL_TAMANO", "5"))
+DB_POOL_TIMEOUT_S = float(os.environ.get("SBE_DB_POOL_TIMEOUT_S", "10"))
+DB_POOL_KEEPALIVE_S = float(os.environ.get("SBE_DB_POOL_KEEPALIVE_S", "120"))
+DB_POOL_PRECALENTAR = os.environ.get("SBE_DB_POOL_PRECALENTAR", "1") != "0"
+DB_POOL_RESET_PEREZOSO = os.environ.get("SBE_DB_POOL_RESET_PEREZOSO", "0") == "1"
+
+# Executor asíncrono de BD (ver database/asincrono.py)
+DB_EJECUTOR_MAX_PENDIENTES = int(os.environ.get("SBE_DB_EJECUTOR_MAX_PENDIENTES", str(DB_POOL_TAMANO * 4)))
+DB_EJECUTOR_TIMEOUT_S = float(os.environ.get("SBE_DB_EJECUTOR_TIMEOUT_S", "30"))
+
+# Sentencias preparadas por conexión (ver database/preparadas.py)
+DB_PREPARADAS = os.environ.get("SBE_DB_PREPARADAS", "0") == "1"
+DB_PREPARADAS_MAX = int(os.environ.get("SBE_DB_PREPARADAS_MAX", "32"))
+DB_PREPARADAS_MIN_USOS = int(os.environ.get("SBE_DB_PREPARADAS_MIN_USOS", "2"))
+
+# Caché de lecturas invalidada por tablas (ver database/cache.py)
+DB_CACHE = os.environ.get("SBE_DB_CACHE", "1") != "0"
+DB_CACHE_TTL_S = float(os.environ.get("SBE_DB_CACHE_TTL_S", "60"))
+DB_CACHE_MAX = int(os.environ.get("SBE_DB_CACHE_MAX", "256"))
+
+# Interruptor de circuito ante caídas del servidor (ver database/circuito.py)
+DB_CIRCUITO_FALLOS = int(os.environ.get("SBE_DB_CIRCUITO_FALLOS", "3"))
+DB_CIRCUITO_SONDEO_S = float(os.environ.get("SBE_DB_CIRCUITO_SONDEO_S", "5"))
+
+# Paginación por cursor de los listados (ver database/paginacion.py)
+DB_TAM_PAGINA = int(os.environ.get("SBE_DB_TAM_PAGINA", "50"))
+
+# Carpeta de archivos locales (réplica, perfil medido): junto al .exe o en la raíz del proyecto
+_DIR_LOCAL = (
+    os.path.dirname(sys.executable) if getattr(sys, 'frozen', False)
+    else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+# Réplica local SQLite de lectura (ver database/replica.py). Los borrados hechos en
+# otros equipos siguen visibles hasta la siguiente copia completa de la tabla, hasta
+# SBE_DB_REPLICA_COMPLETA_S segundos (300 por defecto); bajarlo acorta esa ventana
+# a costa de copiar las tablas enteras más a menudo.
+DB_REPLICA = os.environ.get("SBE_DB_REPLICA", "0") == "1"
+DB_REPLICA_ARCHIVO = os.environ.get("SBE_DB_REPLICA_ARCHIVO") or os.path.join(_DIR_LOCAL, f"replica_{SBE_ENV}.sqlite3")
+DB_REPLICA_INTERVALO_S = float(os.environ.get("SBE_DB_REPLICA_INTERVALO_S", "15"))
+DB_REPLICA_MAX_EDAD_S = float(os.environ.get("SBE_DB_REPLICA_MAX_EDAD_S", "60"))
+DB_REPLICA_COMPLETA_S = float(os.environ.get("SBE_DB_REPLICA_COMPLETA_S", "300"))
+
+# Perfil de conexión: lan | wan | wan_sin_compresion | compresion | auto (ver database/perfiles.py)
+DB_PERFIL = os.environ.get("SBE_DB_PERFIL", "auto").lower()
+DB_PERFIL_ARCHIVO = os.environ.get("SBE_DB_PERFIL_ARCHIVO") or os.path.join(_DIR_LOCAL, f"perfil_{SBE_ENV}.json")
+
+# Tiempo máximo de las consultas de estadísticas en segundos, 0 = sin límite (ver database/cancelacion.py)
+DB_TIMEOUT_ESTADISTICAS_S = float(os.environ.get("SBE_DB_TIMEOUT_ESTADISTICAS_S", "20"))
+
+# Migraciones versionadas del esquema al iniciar la app (ver database/migrador.py)
+DB_MIGRAR_AL_INICIAR = os.environ.get("SBE_DB_MIGRAR_AL_INICIAR", "1") != "0"
+
+# KPIs precalculados en kpi_snapshot; reconciliación periódica en segundos, 0 = nunca (ver database/kpis.py)
+DB_KPI_SNAPSHOT = os.environ.get("SBE_DB_KPI_SNAPSHOT", "1") != "0"
+DB_KPI_RECONCILIAR_S = float(os.environ.get("SBE_DB_KPI_RECONCILIAR_S", "3600"))
+
+# Caché de sesión de las pantallas: segundos hasta revalidar en segundo plano (ver util_cache.py)
+UI_CACHE_TTL_S = float(os.environ.get("SBE_UI_CACHE_TTL_S", "120"))
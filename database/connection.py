@@ -1,15 +1,25 @@
 """
 Conexión a MySQL para el SBE — con connection pool.
 """
-import time
+from contextlib import nullcontext
 from time import perf_counter
-import mysql.connector
-from mysql.connector import Error
-from mysql.connector.pooling import MySQLConnectionPool
+import contextvars
 import os
 import sys
+import threading
+
+import mysql.connector
+from mysql.connector import Error
 
-from database.config import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+from database.config import (
+    DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME,
+    DB_POOL_TAMANO, DB_POOL_TIMEOUT_S, DB_POOL_KEEPALIVE_S,
+    DB_POOL_PRECALENTAR, DB_POOL_RESET_PEREZOSO,
+    DB_CIRCUITO_FALLOS, DB_CIRCUITO_SONDEO_S,
+)
+from database.circuito import Interruptor
+from database.pool import GestorPool
+from database import cache, cancelacion, perfiles, preparadas, replica, telemetria
 
 
 if getattr(sys, "frozen", False):
@@ -20,91 +30,642 @@ else:
 SSL_CA_PATH = os.path.join(BASE_DIR, "ca.pem")
 # Pool global: reutiliza conexiones en vez de abrir/cerrar cada vez
 _pool = None
+_pool_lock = threading.Lock()
+
+# Perfil de conexión (lan, wan, ...): compresión, extensión C, tamaño de lote, buffers
+PERFIL, _perfil = perfiles.resolver()
+
+
+def _config_conexion(perfil=None):
+    """Parámetros de mysql.connector.connect() para cada conexión del pool."""
+    config = {
+        "host": DB_HOST,
+        "port": DB_PORT,
+        "user": DB_USER,
+        "password": DB_PASSWORD,
+        "database": DB_NAME,
+        "charset": "utf8mb4",
+        "connection_timeout": 10,
+        "ssl_ca": SSL_CA_PATH,
+        "ssl_disabled": False,
+    }
+    # use_pure salvo que el perfil pida la extensión C y esté instalada (empaquetado)
+    config.update(perfiles.opciones_conexion(perfil or _perfil))
+    return config
+
+
+def _matar_consulta(id_hilo):
+    """KILL QUERY sobre el hilo del servidor 'id_hilo' por una conexión aparte (fuera del pool)."""
+    cnx = mysql.connector.connect(**_config_conexion())
+    try:
+        cursor = cnx.cursor()
+        cursor.execute("KILL QUERY %s", (int(id_hilo),))
+        cursor.close()
+    finally:
+        cnx.close()
+
+
+_mariadb = None  # None hasta la primera consulta con timeout_s (ver _es_mariadb)
+
+
+def _es_mariadb(conn):
+    """
+    True si el servidor es MariaDB, False si es MySQL, None si no se pudo saber
+    (entonces los SELECT con timeout_s se vigilan con KILL QUERY). Se consulta una vez.
+    """
+    global _mariadb
+    if _mariadb is None:
+        try:
+            _mariadb = "mariadb" in (conn.get_server_info() or "").lower()
+        except Exception as e:
+            print(f"[DB] No se pudo identificar el servidor: {e}")
+    return _mariadb
+
+
+def _vigilar(conn, timeout_s=None, con_hint=False):
+    """Vigilancia de timeout/cancelación para la sentencia, o un contexto vacío si no hace falta."""
+    if not timeout_s and cancelacion.actual() is None:
+        return nullcontext()
+    return cancelacion.Vigilancia(conn, _matar_consulta, timeout_s, temporizador=not con_hint)
+
+
+def _sondear_servidor():
+    """Intento de conexión directo (fuera del pool) usado por el circuito para detectar la recuperación."""
+    mysql.connector.connect(**_config_conexion()).close()
+
+
+# Circuito: tras varios fallos de red seguidos, rechaza al instante en vez de esperar connection_timeout
+_circuito = Interruptor(DB_CIRCUITO_FALLOS, DB_CIRCUITO_SONDEO_S, _sondear_servidor)
 
 
 def _get_pool():
-    """Inicializa el pool de conexiones (lazy, una sola vez)."""
+    """Inicializa el pool de conexiones (una sola vez, seguro entre hilos)."""
     global _pool
     if _pool is None:
-        try:
-            _pool = MySQLConnectionPool(
-                pool_name="sgb_pool",
-                pool_size=5,
-                pool_reset_session=True,
-                host=DB_HOST,
-                port=DB_PORT,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME,
-                charset="utf8mb4",
-                connection_timeout=10,
-                ssl_ca=SSL_CA_PATH,
-                ssl_disabled=False,
-                use_pure=True  # Previene errores de extensión C en empaquetado
-            )
-        except Error as e:
-            raise RuntimeError(f"Error al crear pool de conexiones: {e}") from e
+        with _pool_lock:
+            if _pool is None:
+                pool = GestorPool(
+                    _config_conexion(),
+                    tamano=DB_POOL_TAMANO,
+                    timeout_checkout=DB_POOL_TIMEOUT_S,
+                    keepalive_s=DB_POOL_KEEPALIVE_S,
+                    reset_perezoso=DB_POOL_RESET_PEREZOSO,
+                    circuito=_circuito,
+                    al_conectar=lambda cnx: perfiles.ajustar_socket(cnx, _perfil),
+                )
+                pool.iniciar_keepalive()
+                _pool = pool
     return _pool
 
 
-def get_connection():
-    """Obtiene una conexión del pool. Cerrar con conn.close() (la devuelve al pool)."""
+def precalentar_pool(en_segundo_plano=True):
+    """Abre las conexiones del pool por adelantado (TLS incluido) si SBE_DB_POOL_PRECALENTAR lo permite."""
+    if DB_POOL_PRECALENTAR:
+        _get_pool().precalentar(en_segundo_plano=en_segundo_plano)
+
+
+def estadisticas_pool() -> dict:
+    """Contadores del pool: checkouts, esperas, tiempo de espera, reconexiones, en uso/libres."""
+    m = _get_pool().estadisticas()
+    with _m_compartida_lock:
+        m["compartidas"] = dict(_m_compartida)
+    return m
+
+
+def estado_circuito() -> dict:
+    """Estado del circuito de la BD: abierto/cerrado, fallos consecutivos, aperturas, rechazos."""
+    return _circuito.estadisticas()
+
+
+def get_connection(compartida=True):
+    """
+    Obtiene una conexión del pool. Cerrar con conn.close() (la devuelve al pool).
+    Dentro de un bloque conexion_compartida() retorna la conexión fijada del bloque
+    (compartida=False lo evita). Con el circuito abierto (servidor caído) lanza
+    CircuitoAbiertoError al instante.
+    """
+    _circuito.permitir()
+    fijada = _fijada.get() if compartida else None
     try:
-        return _get_pool().get_connection()
+        if fijada is not None:
+            conn = fijada.prestar()
+            if conn is not None:
+                return conn
+        return _get_pool().obtener()
     except Error as e:
         raise RuntimeError(f"Error al conectar a la base de datos: {e}") from e
 
 
-def ejecutar(consulta, params=None, commit=False):
+# ---------- conexión compartida por bloque ----------
+
+_fijada = contextvars.ContextVar("sbe_conexion_fijada", default=None)
+_m_compartida = {"bloques": 0, "reutilizaciones": 0}
+_m_compartida_lock = threading.Lock()
+
+
+class _Prestamo:
+    """Conexión fijada prestada a una llamada CRUD: close() la libera sin devolverla al pool."""
+
+    def __init__(self, fijada, conn):
+        self._fijada = fijada
+        self._conn = conn
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def marcar_sucia(self):
+        self._fijada.sucia = True
+
+    def close(self):
+        fijada, self._fijada = self._fijada, None
+        if fijada is not None:
+            fijada.soltar()
+
+
+class ConexionCompartida:
+    """
+    Bloque de trabajo que reutiliza UNA conexión del pool para todas las llamadas
+    CRUD que ocurran dentro (ver conexion_compartida()).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self._en_uso = False
+        self._cerrada = False
+        self._token = None
+        self.sucia = False
+
+    _prestamo = _Prestamo
+
+    def _reservar(self) -> bool:
+        """Marca la conexión del bloque como en uso (con self._lock tomado); False si no se comparte ahora."""
+        if self._en_uso or self._cerrada:
+            return False
+        self._en_uso = True
+        return True
+
+    def prestar(self):
+        """La conexión del bloque, o None si otra llamada la está usando en este momento."""
+        with self._lock:
+            if not self._reservar():
+                return None
+            nueva = self._conn is None
+        if nueva:
+            try:
+                conn = _get_pool().obtener()
+            except BaseException:
+                self.soltar()
+                raise
+            with self._lock:
+                self._conn = conn
+        with _m_compartida_lock:
+            _m_compartida["bloques" if nueva else "reutilizaciones"] += 1
+        return self._prestamo(self, self._conn)
+
+    def soltar(self):
+        with self._lock:
+            self._en_uso = False
+            # Tras un error la sesión puede haber quedado rota: la siguiente llamada toma otra
+            devolver = self._conn if (self.sucia or self._cerrada) else None
+            if devolver is not None:
+                self._conn = None
+        if devolver is not None:
+            if self.sucia:
+                devolver.marcar_sucia()
+                self.sucia = False
+            devolver.close()
+
+    def cerrar(self):
+        """Devuelve la conexión al pool (si una llamada la está usando, al soltarla)."""
+        with self._lock:
+            self._cerrada = True
+            conn = None if self._en_uso else self._conn
+            if conn is not None:
+                self._conn = None
+        if conn is not None:
+            if self.sucia:
+                conn.marcar_sucia()
+            conn.close()
+
+    def __enter__(self):
+        self._token = _fijada.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _fijada.reset(self._token)
+        self.cerrar()
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        _fijada.reset(self._token)
+        # Devolverla al pool hace rollback/reset de sesión (red): fuera del event loop
+        from database.asincrono import correr
+        try:
+            await correr(self.cerrar)
+        except Exception:
+            self.cerrar()
+
+
+def conexion_compartida() -> ConexionCompartida:
+    """
+    Fija una conexión para un bloque de trabajo: todas las llamadas CRUD dentro del
+    bloque (get_connection(), ejecutar(), ...) reutilizan la misma conexión en vez
+    de tomar y devolver una del pool cada vez, y se ahorran el reset de sesión.
+    La conexión se toma en la primera consulta y se devuelve al salir del bloque.
+
+        with conexion_compartida():
+            stats = crud_turno.get_turno_stats(...)
+            turnos = crud_turno.listar_turnos(...)
+
+    En pantallas Flet, con 'async with': las llamadas hechas con correr() heredan
+    el bloque (correr() copia el contexto). Si dos llamadas del bloque corren a la
+    vez, la segunda usa una conexión normal del pool.
+    """
+    return ConexionCompartida()
+
+
+# ---------- transacciones (unidad de trabajo) ----------
+
+class TransaccionFallidaError(RuntimeError):
+    """Una sentencia de la transacción falló dentro del bloque: se deshicieron todos sus cambios."""
+
+
+class _PrestamoTransaccion(_Prestamo):
+    """Dentro de transaccion(): commit() y rollback() de las funciones CRUD se difieren al final del bloque."""
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._fijada.sucia = True
+
+
+class Transaccion(ConexionCompartida):
+    """
+    conexion_compartida() con una sola transacción: COMMIT al salir del bloque
+    sin errores, ROLLBACK si hubo una excepción o falló alguna sentencia.
+    """
+
+    _prestamo = _PrestamoTransaccion
+
+    def __init__(self):
+        super().__init__()
+        self._cond = threading.Condition(self._lock)
+        self._hilo = None
+        self._token_cache = None
+
+    def _reservar(self) -> bool:
+        if self._cerrada:
+            raise RuntimeError("La transacción ya terminó")
+        # Nunca una conexión aparte: las llamadas concurrentes del bloque esperan su turno
+        while self._en_uso:
+            if self._hilo == threading.get_ident():
+                raise RuntimeError("Consulta anidada dentro de transaccion(): la conexión ya está en uso en este hilo")
+            self._cond.wait()
+        self._en_uso = True
+        self._hilo = threading.get_ident()
+        return True
+
+    def soltar(self):
+        with self._lock:
+            self._en_uso = False
+            self._hilo = None
+            self._cond.notify()
+
+    def _terminar(self, confirmar: bool):
+        """COMMIT o ROLLBACK en la conexión del bloque y devolución al pool."""
+        try:
+            conn = self._conn
+            if conn is not None:
+                if confirmar:
+                    conn.commit()
+                else:
+                    conn.rollback()
+        except Exception:
+            self.sucia = True
+            raise
+        finally:
+            self.cerrar()
+
+    def __enter__(self):
+        # Las invalidaciones de caché de las escrituras se aplican tras el COMMIT
+        self._token_cache = cache.diferir_invalidaciones()
+        return super().__enter__()
+
+    def _confirmar(self, exc_type) -> bool:
+        _fijada.reset(self._token)
+        return exc_type is None and not self.sucia
+
+    def _cerrar_cache(self, exc_type, confirmado: bool, fallida: bool):
+        cache.aplicar_diferidas(self._token_cache, aplicar=confirmado)
+        if exc_type is None and fallida:
+            raise TransaccionFallidaError("Una sentencia de la transacción falló: se deshicieron todos sus cambios")
+
+    def __exit__(self, exc_type, exc, tb):
+        fallida = self.sucia
+        confirmar = self._confirmar(exc_type)
+        try:
+            self._terminar(confirmar)
+        except BaseException:
+            cache.aplicar_diferidas(self._token_cache, aplicar=False)
+            raise
+        self._cerrar_cache(exc_type, confirmar, fallida)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        fallida = self.sucia
+        confirmar = self._confirmar(exc_type)
+        from database.asincrono import correr
+        try:
+            await correr(self._terminar, confirmar)
+        except BaseException:
+            cache.aplicar_diferidas(self._token_cache, aplicar=False)
+            raise
+        self._cerrar_cache(exc_type, confirmar, fallida)
+
+
+def transaccion() -> Transaccion:
+    """
+    Unidad de trabajo: las llamadas CRUD del bloque usan UNA conexión y UNA
+    transacción, con un solo COMMIT al salir (los commits internos de ejecutar(),
+    ejecutar_modificar() o de funciones con cursor propio se difieren). Si el
+    bloque lanza una excepción o falla alguna sentencia se hace ROLLBACK; en el
+    segundo caso, aunque la función CRUD haya capturado el error, al salir se
+    lanza TransaccionFallidaError.
+
+        with transaccion():
+            id_inst = crear_institucion(...)
+            crear_usuario(..., institucion_id=id_inst)
+
+    Las sentencias DDL (ALTER/CREATE) hacen commit implícito en MySQL: no
+    deben ir dentro de una transacción.
+    """
+    return Transaccion()
+
+
+def en_transaccion() -> bool:
+    """True si el contexto actual está dentro de un bloque transaccion()."""
+    return isinstance(_fijada.get(), Transaccion)
+
+
+def ejecutar(consulta, params=None, commit=False, timeout_s=None):
     """
     Ejecuta una consulta.
     Si commit=True: hace commit y retorna lastrowid. Cierra conexión.
     Si commit=False: hace fetchall y retorna (rows, description). Cierra conexión.
+    timeout_s: tiempo máximo en el servidor; al superarlo lanza TiempoAgotadoError
+    (ver database/cancelacion.py, que también aplica el token de cancelación activo).
+    Los tiempos (conexión / ejecución / fetch) se registran en database.telemetria.
     """
+    token = cancelacion.actual()
+    if token is not None:
+        token.comprobar()
     t0 = perf_counter()
     conn = get_connection()
-    t_conn = perf_counter()
+    t_conn = t_exec = perf_counter()
+    filas = 0
+    error = None
+    preparada = None
+    sql_base = consulta
     try:
-        cursor = conn.cursor()
-        cursor.execute(consulta, params or ())
-        t_exec = perf_counter()
-        if commit:
-            conn.commit()
-            last_id = cursor.lastrowid
-            cursor.close()
-            t_fetch = perf_counter()
-            print(f"[DB] conn={t_conn-t0:.3f}s exec={t_exec-t_conn:.3f}s fetch={t_fetch-t_exec:.3f}s total={t_fetch-t0:.3f}s | Q: {consulta.strip()[:60]}...")
-            return last_id
+        if timeout_s:
+            sql_base, con_hint = cancelacion.con_limite(consulta, timeout_s, _es_mariadb(conn))
         else:
-            rows = cursor.fetchall()
-            description = cursor.description
+            con_hint = False
+        preparada = preparadas.cursor_para(conn, sql_base, params)
+        if preparada:
+            cursor, sql, args = preparada
+        else:
+            cursor, sql, args = conn.cursor(), sql_base, params or ()
+        with _vigilar(conn, timeout_s, con_hint):
+            cursor.execute(sql, args)
+            t_exec = perf_counter()
+            _circuito.exito()
+            if commit:
+                conn.commit()
+                cache.invalidar_sql(consulta)
+                last_id = cursor.lastrowid
+                filas = cursor.rowcount
+            else:
+                rows = cursor.fetchall()
+                description = cursor.description
+                filas = len(rows)
+        if not preparada:
             cursor.close()
-            t_fetch = perf_counter()
-            print(f"[DB] conn={t_conn-t0:.3f}s exec={t_exec-t_conn:.3f}s fetch={t_fetch-t_exec:.3f}s total={t_fetch-t0:.3f}s | Q: {consulta.strip()[:60]}...")
-            return rows, description
+        return last_id if commit else (rows, description)
+    except Exception as e:
+        error = e
+        _circuito.fallo(e)
+        if preparada:
+            preparadas.descartar(conn, sql_base)
+        conn.marcar_sucia()
+        raise
     finally:
-        if conn.is_connected():
-            conn.close()
+        t_fin = perf_counter()
+        conn.close()
+        telemetria.registrar(consulta, t_conn - t0, t_exec - t_conn, t_fin - t_exec, filas, error,
+                             "bin" if preparada else None)
 
 
-def ejecutar_modificar(consulta, params=None):
+def ejecutar_modificar(consulta, params=None, timeout_s=None):
     """
     Ejecuta un UPDATE o DELETE y retorna el número de filas afectadas (rowcount).
-    Hace commit automáticamente.
+    Hace commit automáticamente. timeout_s: KILL QUERY al superarlo (TiempoAgotadoError).
     """
+    token = cancelacion.actual()
+    if token is not None:
+        token.comprobar()
     t0 = perf_counter()
     conn = get_connection()
-    t_conn = perf_counter()
+    t_conn = t_exec = perf_counter()
+    afectadas = 0
+    error = None
+    preparada = None
+    try:
+        preparada = preparadas.cursor_para(conn, consulta, params)
+        if preparada:
+            cursor, sql, args = preparada
+        else:
+            cursor, sql, args = conn.cursor(), consulta, params or ()
+        with _vigilar(conn, timeout_s):
+            cursor.execute(sql, args)
+            t_exec = perf_counter()
+            _circuito.exito()
+            conn.commit()
+        cache.invalidar_sql(consulta)
+        afectadas = cursor.rowcount
+        if not preparada:
+            cursor.close()
+        return afectadas
+    except Exception as e:
+        error = e
+        _circuito.fallo(e)
+        if preparada:
+            preparadas.descartar(conn, consulta)
+        conn.marcar_sucia()
+        raise
+    finally:
+        t_fin = perf_counter()
+        conn.close()
+        telemetria.registrar(consulta, t_conn - t0, t_exec - t_conn, t_fin - t_exec, afectadas, error,
+                             "bin" if preparada else None)
+
+
+def ejecutar_stream(consulta, params=None, tam_lote=None, por_lotes=False, como_dict=False):
+    """
+    Generador para resultados grandes (exportaciones, respaldos): lee con un
+    cursor sin buffer y fetchmany(tam_lote) en vez de materializar todo con fetchall().
+    tam_lote por defecto es el del perfil de conexión (500 en LAN, más en WAN).
+    Produce filas (o listas de filas si por_lotes=True); como_dict=True las da como dict.
+
+    La conexión se toma del pool al pedir la primera fila y se devuelve al terminar
+    la iteración. Si el consumidor abandona el generador (break, close(), o se
+    pierde la referencia), la conexión se descarta: aún tiene filas sin leer.
+    """
+    tam_lote = tam_lote or _perfil["tam_lote"]
+    t0 = perf_counter()
+    conn = get_connection(compartida=False)  # queda ocupada mientras se itera
+    t_conn = t_exec = perf_counter()
+    filas = 0
+    error = None
+    completo = False
     try:
-        cursor = conn.cursor()
+        cursor = conn.cursor(buffered=False)
         cursor.execute(consulta, params or ())
         t_exec = perf_counter()
-        conn.commit()
-        afectadas = cursor.rowcount
+        _circuito.exito()
+        columnas = cursor.column_names if como_dict else None
+        while True:
+            lote = cursor.fetchmany(tam_lote)
+            if not lote:
+                break
+            filas += len(lote)
+            if columnas:
+                lote = [dict(zip(columnas, fila)) for fila in lote]
+            if por_lotes:
+                yield lote
+            else:
+                yield from lote
         cursor.close()
-        t_fetch = perf_counter()
-        print(f"[DB] conn={t_conn-t0:.3f}s exec={t_exec-t_conn:.3f}s commit={t_fetch-t_exec:.3f}s total={t_fetch-t0:.3f}s | Q: {consulta.strip()[:60]}...")
-        return afectadas
+        completo = True
+    except Exception as e:
+        error = e
+        _circuito.fallo(e)
+        raise
     finally:
-        if conn.is_connected():
+        t_fin = perf_counter()
+        if completo:
             conn.close()
+        else:
+            # Filas pendientes en el socket: leerlas todas costaría más que reconectar
+            _get_pool().descartar(conn)
+        # fetch incluye el tiempo que el consumidor tardó en iterar
+        telemetria.registrar(consulta, t_conn - t0, t_exec - t_conn, t_fin - t_exec, filas, error)
+
+
+def ejecutar_cacheado(consulta, params=None, tablas=(), ttl=None, timeout_s=None):
+    """
+    Como ejecutar() de lectura, pero pasando por database.cache: el resultado
+    (rows, description) se reutiliza hasta que se escriba en alguna de 'tablas'
+    o venza el TTL. timeout_s se aplica solo si hay que ir al servidor.
+    """
+    clave = ("sql", consulta, tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params or ()))
+    rows, description = cache.leer(clave, tablas, lambda: ejecutar(consulta, params, timeout_s=timeout_s), ttl)
+    return list(rows), description
+
+
+def ejecutar_lectura(consulta, params=None, timeout_s=None):
+    """
+    Como ejecutar() de lectura, pero servida desde la réplica local SQLite
+    (database.replica) cuando está activa y al día; si no, va a MySQL.
+    Con el circuito abierto se usa la réplica aunque no esté al día.
+    timeout_s se aplica solo si la consulta va a MySQL.
+    """
+    t0 = perf_counter()
+    if isinstance(_fijada.get(), Transaccion):
+        return ejecutar(consulta, params, timeout_s=timeout_s)  # debe ver las escrituras aún sin COMMIT
+    resultado = replica.consultar(consulta, params, sin_servidor=_circuito.abierto)
+    if resultado is None:
+        return ejecutar(consulta, params, timeout_s=timeout_s)
+    telemetria.registrar(consulta, 0.0, perf_counter() - t0, 0.0, len(resultado[0]), protocolo="replica")
+    return resultado
+
+
+def _normalizar_lote(consultas):
+    """Convierte [sql | (sql, params)] en una lista de (sql, tuple(params))."""
+    lote = []
+    for item in consultas:
+        sql, params = (item, None) if isinstance(item, str) else item
+        if isinstance(params, dict):
+            raise ValueError("ejecutar_lote() solo admite parámetros posicionales (%s)")
+        lote.append((sql.strip().rstrip(";"), tuple(params or ())))
+    return lote
+
+
+def _leer_resultado(cursor):
+    if cursor.with_rows:
+        return cursor.fetchall(), cursor.description
+    return [], None
+
+
+def ejecutar_lote(consultas, timeout_s=None):
+    """
+    Ejecuta varias consultas de lectura sobre UNA conexión y en UN solo viaje al
+    servidor (multi-statement), y retorna [(rows, description), ...] en el mismo orden.
+    consultas: lista de sql o de (sql, params) con parámetros posicionales %s.
+    timeout_s: tiempo máximo del lote completo; al superarlo KILL QUERY y
+    TiempoAgotadoError.
+    """
+    lote = _normalizar_lote(consultas)
+    if not lote:
+        return []
+    token = cancelacion.actual()
+    if token is not None:
+        token.comprobar()
+    con_params = any(p for _, p in lote)
+    # Con parámetros, el conector interpola la cadena completa: los '%' literales
+    # de las sentencias sin parámetros deben ir escapados.
+    sql = ";\n".join(s if (p or not con_params) else s.replace("%", "%%") for s, p in lote)
+    params = tuple(v for _, p in lote for v in p)
+
+    t0 = perf_counter()
+    conn = get_connection()
+    t_conn = t_exec = perf_counter()
+    filas = 0
+    error = None
+    try:
+        with _vigilar(conn, timeout_s):
+            cursor = conn.cursor()
+            resultados = []
+            if hasattr(cursor, "fetchsets"):
+                # mysql-connector >= 9.2: execute() admite multi-statement y nextset()
+                cursor.execute(sql, params or None)
+                t_exec = perf_counter()
+                resultados.append(_leer_resultado(cursor))
+                while cursor.nextset():
+                    resultados.append(_leer_resultado(cursor))
+            else:
+                # mysql-connector 8.x: execute(multi=True) devuelve un iterador de resultados
+                for res in cursor.execute(sql, params or None, multi=True):
+                    if not resultados:
+                        t_exec = perf_counter()
+                    resultados.append(_leer_resultado(res))
+        cursor.close()
+        _circuito.exito()
+        filas = sum(len(r) for r, _ in resultados)
+        return resultados
+    except Exception as e:
+        error = e
+        _circuito.fallo(e)
+        conn.marcar_sucia()
+        raise
+    finally:
+        t_fin = perf_counter()
+        conn.close()
+        telemetria.registrar(sql, t_conn - t0, t_exec - t_conn, t_fin - t_exec, filas, error)
+
@@ -5,7 +5,10 @@ Incluye soporte para marcar actividades como completadas por su creador
 (o por un administrador) cuando la base de datos tenga aplicada la migración
 que añade Usuario_idUsuarioCreador.
 """
-from database.connection import ejecutar, ejecutar_modificar
+from database.connection import ejecutar, ejecutar_lectura, ejecutar_modificar, ejecutar_lote, transaccion
+from database import kpis
+from database.paginacion import consultar_pagina
+from database.registros import Actividad
 
 
 def obtener_actividades_recientes(limite=5, tipo_brigada=None, solo_usuario_id=None, **kwargs):
@@ -45,11 +48,10 @@ def obtener_actividades_recientes(limite=5, tipo_brigada=None, solo_usuario_id=N
     params.append(limite)
 
     try:
-        rows, description = ejecutar(sql, tuple(params))
+        rows, description = ejecutar_lectura(sql, tuple(params))
         if not rows:
             return []
-        columnas = [col[0] for col in description]
-        return [dict(zip(columnas, fila)) for fila in rows]
+        return Actividad.desde_filas([col[0] for col in description], rows)
     except Exception as e:
         print(f"Error obteniendo actividades recientes: {e}")
         return []
@@ -73,7 +75,9 @@ def crear_actividad(titulo, descripcion, fecha_inicio, fecha_fin, estado, id_bri
         """
         params = (titulo, descripcion, fecha_inicio, fecha_fin, estado, id_brigada)
     try:
-        return ejecutar(sql, params, commit=True)
+        with kpis.cambio("actividad") as cambio:
+            cambio.id = ejecutar(sql, params, commit=True)
+        return cambio.id
     except Exception as e:
         print(f"Error creando actividad: {e}")
         return None
@@ -112,7 +116,8 @@ def actualizar_actividad(id_actividad: int, titulo: str, descripcion: str,
                 WHERE idActividad = %s AND Usuario_idUsuarioCreador = %s {condiciones_adicionales}
             """
 
-        afectadas = ejecutar_modificar(sql, params)
+        with kpis.cambio("actividad", id_actividad):
+            afectadas = ejecutar_modificar(sql, params)
         return afectadas > 0
     except Exception as e:
         print(f"Error actualizando actividad: {e}")
@@ -127,30 +132,39 @@ def eliminar_actividad(id_actividad: int, usuario_id: int, es_admin_usuario: boo
     Retorna None si fue exitoso, o un string de error si no.
     """
     try:
-        # Verificar dependencias (reportes de impacto, indicadores, reportes de actividad)
-        for tabla, col in [
-            ("reporte_de_impacto", "Actividad_idActividad"),
-            ("indicador_ambiental", "Actividad_idActividad"),
-            ("reporte_actividad", "Actividad_idActividad"),
-        ]:
-            sql_check = f"SELECT COUNT(*) FROM {tabla} WHERE {col} = %s"
-            rows, _ = ejecutar(sql_check, (id_actividad,))
-            if rows and rows[0][0] > 0:
-                return f"No se puede eliminar: hay registros asociados en {tabla}."
+        # Comprobaciones y DELETE en una sola transacción: el bloqueo de la fila impide
+        # que se inserte un registro dependiente entre la comprobación y el borrado.
+        with transaccion():
+            dependencias = [
+                ("reporte_de_impacto", "Actividad_idActividad"),
+                ("indicador_ambiental", "Actividad_idActividad"),
+                ("reporte_actividad", "Actividad_idActividad"),
+            ]
+            conteos = ejecutar_lote(
+                [("SELECT idActividad FROM actividad WHERE idActividad = %s FOR UPDATE", (id_actividad,))]
+                + [
+                    (f"SELECT COUNT(*) FROM {tabla} WHERE {col} = %s", (id_actividad,))
+                    for tabla, col in dependencias
+                ]
+            )[1:]
+            for (tabla, _), (rows, _) in zip(dependencias, conteos):
+                if rows and rows[0][0] > 0:
+                    return f"No se puede eliminar: hay registros asociados en {tabla}."
 
-        if es_admin_usuario:
-            sql = "DELETE FROM actividad WHERE idActividad = %s"
-            params = (id_actividad,)
-        else:
-            brigada_rol_id = kwargs.get("brigada_rol_id")
-            if brigada_rol_id is not None:
-                sql = "DELETE FROM actividad WHERE idActividad = %s AND Usuario_idUsuarioCreador = %s AND Brigada_idBrigada = %s"
-                params = (id_actividad, usuario_id, brigada_rol_id)
+            if es_admin_usuario:
+                sql = "DELETE FROM actividad WHERE idActividad = %s"
+                params = (id_actividad,)
             else:
-                sql = "DELETE FROM actividad WHERE idActividad = %s AND Usuario_idUsuarioCreador = %s"
-                params = (id_actividad, usuario_id)
+                brigada_rol_id = kwargs.get("brigada_rol_id")
+                if brigada_rol_id is not None:
+                    sql = "DELETE FROM actividad WHERE idActividad = %s AND Usuario_idUsuarioCreador = %s AND Brigada_idBrigada = %s"
+                    params = (id_actividad, usuario_id, brigada_rol_id)
+                else:
+                    sql = "DELETE FROM actividad WHERE idActividad = %s AND Usuario_idUsuarioCreador = %s"
+                    params = (id_actividad, usuario_id)
 
-        afectadas = ejecutar_modificar(sql, params)
+            with kpis.cambio("actividad", id_actividad):
+                afectadas = ejecutar_modificar(sql, params)
         if afectadas > 0:
             return None
         return "No se pudo eliminar. Verifique permisos."
@@ -196,14 +210,15 @@ def marcar_actividad_completada(id_actividad: int, usuario_id: int, es_admin_usu
                 """
                 params = (id_actividad, usuario_id)
 
-        afectadas = ejecutar_modificar(sql, params)
+        with kpis.cambio("actividad", id_actividad):
+            afectadas = ejecutar_modificar(sql, params)
         return afectadas > 0
     except Exception as e:
         print(f"Error marcando actividad como completada: {e}")
         return False
 
 
-def obtener_actividad_por_id(id_actividad: int) -> dict | None:
+def obtener_actividad_por_id(id_actividad: int) -> Actividad | None:
     """Retorna los datos de una actividad específica."""
     sql = """
         SELECT a.idActividad, a.titulo, a.descripcion, a.fecha_inicio, a.fecha_fin,
@@ -214,48 +229,68 @@ def obtener_actividad_por_id(id_actividad: int) -> dict | None:
         WHERE a.idActividad = %s
     """
     try:
-        rows, description = ejecutar(sql, (id_actividad,))
+        rows, description = ejecutar_lectura(sql, (id_actividad,))
         if not rows:
             return None
-        columnas = [col[0] for col in description]
-        return dict(zip(columnas, rows[0]))
+        return Actividad.desde_filas([col[0] for col in description], rows[:1])[0]
     except Exception as e:
         print(f"Error obteniendo actividad {id_actividad}: {e}")
         return None
 
 
-def listar_actividades(tipo_brigada=None, brigada_rol_id=None):
-    """Retorna todas las actividades, filtradas por tipo_brigada o brigada_rol_id."""
+_SELECT_ACTIVIDADES = """
+        SELECT a.idActividad as id, a.titulo, a.estado, a.descripcion,
+               a.fecha_inicio, a.fecha_fin, b.nombre_brigada as brigada,
+               a.Brigada_idBrigada, a.Usuario_idUsuarioCreador AS creador_id"""
+_DESDE_ACTIVIDADES = """
+        FROM actividad a
+        JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada"""
+_COLUMNAS_ACTIVIDADES = ("id", "titulo", "estado", "descripcion", "fecha_inicio", "fecha_fin", "brigada", "Brigada_idBrigada", "creador_id")
+_ORDEN_ACTIVIDADES = [("a.fecha_inicio", "DESC"), ("a.idActividad", "DESC")]
+
+
+def _filtros_actividades(tipo_brigada=None, brigada_rol_id=None):
     where_clauses = []
     params = []
-    
     if brigada_rol_id is not None:
         where_clauses.append("b.idBrigada = %s")
         params.append(brigada_rol_id)
     elif tipo_brigada:
         where_clauses.append("b.tipo_brigada = %s")
         params.append(tipo_brigada)
-        
+    return where_clauses, params
+
+
+def listar_actividades(tipo_brigada=None, brigada_rol_id=None):
+    """Retorna todas las actividades, filtradas por tipo_brigada o brigada_rol_id."""
+    where_clauses, params = _filtros_actividades(tipo_brigada, brigada_rol_id)
     where = ""
     if where_clauses:
         where = "WHERE " + " AND ".join(where_clauses)
         
-    sql = f"""
-        SELECT a.idActividad as id, a.titulo, a.estado, a.descripcion,
-               a.fecha_inicio, a.fecha_fin, b.nombre_brigada as brigada,
-               a.Brigada_idBrigada, a.Usuario_idUsuarioCreador AS creador_id
-        FROM actividad a
-        JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada
+    sql = f"""{_SELECT_ACTIVIDADES}{_DESDE_ACTIVIDADES}
         {where}
         ORDER BY a.fecha_inicio DESC
     """
     
     try:
-        rows, description = ejecutar(sql, tuple(params) if params else None)
+        rows, description = ejecutar_lectura(sql, tuple(params) if params else None)
         if not rows:
             return []
-        columnas = [col[0] for col in description]
-        return [dict(zip(columnas, fila)) for fila in rows]
+        return Actividad.desde_filas([col[0] for col in description], rows)
     except Exception as e:
         print(f"Error listando actividades: {e}")
         return []
+
+
+def listar_actividades_pagina(tipo_brigada=None, brigada_rol_id=None, tam_pagina=None, cursor=None):
+    """
+    Una página de listar_actividades() (más recientes primero, desempate por id).
+    Retorna {"items": [...], "siguiente": cursor o None}.
+    """
+    where_clauses, params = _filtros_actividades(tipo_brigada, brigada_rol_id)
+    rows, siguiente = consultar_pagina(
+        _SELECT_ACTIVIDADES, _DESDE_ACTIVIDADES, where_clauses, params,
+        _ORDEN_ACTIVIDADES, tam_pagina, cursor,
+    )
+    return {"items": Actividad.desde_filas(_COLUMNAS_ACTIVIDADES, rows), "siguiente": siguiente}
@@ -2,7 +2,9 @@
 CRUD de Brigada para el SBE.
 Requiere haber ejecutado database/migrate_brigada_campos.sql si usas descripcion, coordinador, color.
 """
-from database.connection import get_connection
+from database.connection import get_connection, ejecutar_lectura
+from database import cache, esquema, kpis
+from database.registros import Brigada
 
 
 def insertar_brigada(nombre, descripcion, coordinador, color_identificador, institucion_id=1, profesor_id=None, subjefe_id=None, tipo_brigada='ecologica'):
@@ -14,148 +16,98 @@ def insertar_brigada(nombre, descripcion, coordinador, color_identificador, inst
     tipo_brigada: 'ecologica', 'riesgo', 'patrulla', 'convivencia'.
     Retorna el idBrigada creado o lanza excepción.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        area_accion = (descripcion or nombre or "General")[:45]
+    with kpis.cambio("brigada") as cambio:
+        conn = get_connection()
         try:
+            cursor = conn.cursor()
+            area_accion = (descripcion or nombre or "General")[:45]
+            columnas = [
+                "nombre_brigada", "area_accion", "descripcion", "coordinador", "color_identificador",
+                "tipo_brigada", "Institucion_Educativa_idInstitucion", "profesor_id",
+            ]
+            valores = [nombre, area_accion, descripcion or None, coordinador or None, color_identificador or None, tipo_brigada, institucion_id, profesor_id]
+            if esquema.tiene("brigada", "subjefe_id"):
+                columnas.append("subjefe_id")
+                valores.append(subjefe_id)
             cursor.execute(
-                """
-                INSERT INTO brigada (
-                    nombre_brigada, area_accion, descripcion, coordinador, color_identificador,
-                    tipo_brigada, Institucion_Educativa_idInstitucion, profesor_id, subjefe_id
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (nombre, area_accion, descripcion or None, coordinador or None, color_identificador or None, tipo_brigada, institucion_id, profesor_id, subjefe_id),
+                f"INSERT INTO brigada ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})",
+                tuple(valores),
             )
-        except Exception as e:
-            if "subjefe_id" in str(e) or "Unknown column" in str(e):
-                cursor.execute(
-                    """
-                    INSERT INTO brigada (
-                        nombre_brigada, area_accion, descripcion, coordinador, color_identificador,
-                        tipo_brigada, Institucion_Educativa_idInstitucion, profesor_id
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (nombre, area_accion, descripcion or None, coordinador or None, color_identificador or None, tipo_brigada, institucion_id, profesor_id),
-                )
-            else:
-                raise
-        conn.commit()
-        return cursor.lastrowid
-    finally:
-        conn.close()
+            conn.commit()
+            cache.invalidar("brigada")
+            cambio.id = cursor.lastrowid
+        finally:
+            conn.close()
+    return cambio.id
 
 
+@cache.cacheado("brigada", "usuario")
 def listar_brigadas(tipo_brigada=None, brigada_rol_id=None):
     """
     Lista brigadas con conteo de miembros, filtradas por tipo_brigada si se indica o por brigada_rol_id.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor(dictionary=True)
-        filtros = []
-        params = []
-        if brigada_rol_id is not None:
-            filtros.append("b.idBrigada = %s")
-            params.append(brigada_rol_id)
-        elif tipo_brigada:
-            filtros.append("b.tipo_brigada = %s")
-            params.append(tipo_brigada)
-            
-        filtro_str = ""
-        if filtros:
-            filtro_str = "WHERE " + " AND ".join(filtros)
-            
-        try:
-            cursor.execute(
-                f"""
-                SELECT b.idBrigada, b.nombre_brigada, b.area_accion,
-                    b.descripcion, b.coordinador, b.color_identificador, b.profesor_id,
-                    p.nombre AS profesor_nombre, p.apellido AS profesor_apellido,
-                    COUNT(u.idUsuario) AS num_miembros
-                FROM brigada b
-                LEFT JOIN usuario u ON u.Brigada_idBrigada = b.idBrigada
-                LEFT JOIN usuario p ON p.idUsuario = b.profesor_id
-                {filtro_str}
-                GROUP BY b.idBrigada, b.nombre_brigada, b.area_accion, b.descripcion, b.coordinador, b.color_identificador,
-                         b.profesor_id, p.nombre, p.apellido
-                ORDER BY b.nombre_brigada
-                """,
-                params,
-            )
-        except Exception:
-            try:
-                cursor.execute(
-                    f"""
-                    SELECT b.idBrigada, b.nombre_brigada, b.area_accion,
-                        b.descripcion, b.coordinador, b.color_identificador,
-                        COUNT(u.idUsuario) AS num_miembros
-                    FROM brigada b
-                    LEFT JOIN usuario u ON u.Brigada_idBrigada = b.idBrigada
-                    {filtro_str}
-                    GROUP BY b.idBrigada, b.nombre_brigada, b.area_accion, b.descripcion, b.coordinador, b.color_identificador
-                    ORDER BY b.nombre_brigada
-                    """,
-                    params,
-                )
-            except Exception:
-                cursor.execute(
-                    f"""
-                    SELECT b.idBrigada, b.nombre_brigada, b.area_accion,
-                        COUNT(u.idUsuario) AS num_miembros
-                    FROM brigada b
-                    LEFT JOIN usuario u ON u.Brigada_idBrigada = b.idBrigada
-                    {filtro_str}
-                    GROUP BY b.idBrigada, b.nombre_brigada, b.area_accion
-                    ORDER BY b.nombre_brigada
-                    """,
-                    params,
-                )
-        rows = cursor.fetchall()
-        for r in rows:
-            r.setdefault("descripcion", None)
-            r.setdefault("coordinador", None)
-            r.setdefault("color_identificador", None)
-            r.setdefault("profesor_id", None)
-            r.setdefault("profesor_nombre", None)
-            r.setdefault("profesor_apellido", None)
-            r["num_miembros"] = r.get("num_miembros", 0) or 0
-        return rows
-    finally:
-        conn.close()
+    filtros = []
+    params = []
+    if brigada_rol_id is not None:
+        filtros.append("b.idBrigada = %s")
+        params.append(brigada_rol_id)
+    elif tipo_brigada:
+        filtros.append("b.tipo_brigada = %s")
+        params.append(tipo_brigada)
+
+    filtro_str = ""
+    if filtros:
+        filtro_str = "WHERE " + " AND ".join(filtros)
+
+    # Columnas según las migraciones aplicadas (ver database/esquema.py)
+    campos = ["b.idBrigada", "b.nombre_brigada", "b.area_accion"]
+    if esquema.tiene("brigada", "descripcion", "coordinador", "color_identificador"):
+        campos += ["b.descripcion", "b.coordinador", "b.color_identificador"]
+    agrupar = list(campos)
+    join_profesor = ""
+    if "b.descripcion" in campos and esquema.tiene("brigada", "profesor_id"):
+        campos += ["b.profesor_id", "p.nombre AS profesor_nombre", "p.apellido AS profesor_apellido"]
+        agrupar += ["b.profesor_id", "p.nombre", "p.apellido"]
+        join_profesor = "LEFT JOIN usuario p ON p.idUsuario = b.profesor_id"
+    rows, description = ejecutar_lectura(
+        f"""
+        SELECT {", ".join(campos)},
+            COUNT(u.idUsuario) AS num_miembros
+        FROM brigada b
+        LEFT JOIN usuario u ON u.Brigada_idBrigada = b.idBrigada
+        {join_profesor}
+        {filtro_str}
+        GROUP BY {", ".join(agrupar)}
+        ORDER BY b.nombre_brigada
+        """,
+        tuple(params),
+    )
+    rows = Brigada.desde_filas([col[0] for col in description], rows)
+    for r in rows:
+        r.setdefault("descripcion", None)
+        r.setdefault("coordinador", None)
+        r.setdefault("color_identificador", None)
+        r.setdefault("profesor_id", None)
+        r.setdefault("profesor_nombre", None)
+        r.setdefault("profesor_apellido", None)
+        r["num_miembros"] = r.get("num_miembros", 0) or 0
+    return rows
 
 
 def obtener_brigada(id_brigada: int):
-    """Obtiene una brigada por id (con profesor_id y subjefe_id si existen). Retorna dict o None."""
+    """Obtiene una brigada por id (con profesor_id y subjefe_id si existen). Retorna Brigada o None."""
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute(
-                """
-                SELECT idBrigada, nombre_brigada, area_accion, descripcion, coordinador, color_identificador,
-                    Institucion_Educativa_idInstitucion, profesor_id, subjefe_id
-                FROM brigada WHERE idBrigada = %s
-                """,
-                (id_brigada,),
-            )
-        except Exception:
-            try:
-                cursor.execute(
-                    """
-                    SELECT idBrigada, nombre_brigada, area_accion, descripcion, coordinador, color_identificador,
-                        Institucion_Educativa_idInstitucion
-                    FROM brigada WHERE idBrigada = %s
-                    """,
-                    (id_brigada,),
-                )
-            except Exception:
-                cursor.execute(
-                    "SELECT idBrigada, nombre_brigada, area_accion, Institucion_Educativa_idInstitucion FROM brigada WHERE idBrigada = %s",
-                    (id_brigada,),
-                )
-        row = cursor.fetchone()
+        cursor = conn.cursor()
+        campos = ["idBrigada", "nombre_brigada", "area_accion"]
+        if esquema.tiene("brigada", "descripcion", "coordinador", "color_identificador"):
+            campos += ["descripcion", "coordinador", "color_identificador"]
+        campos.append("Institucion_Educativa_idInstitucion")
+        if esquema.tiene("brigada", "profesor_id", "subjefe_id"):
+            campos += ["profesor_id", "subjefe_id"]
+        cursor.execute(f"SELECT {', '.join(campos)} FROM brigada WHERE idBrigada = %s", (id_brigada,))
+        rows = Brigada.desde_cursor(cursor)
+        row = rows[0] if rows else None
         if row:
             row.setdefault("descripcion", None)
             row.setdefault("coordinador", None)
@@ -173,7 +125,7 @@ def actualizar_brigada(id_brigada: int, nombre: str, area_accion: str = None, de
     try:
         cursor = conn.cursor()
         area = (area_accion or nombre or "General")[:45]
-        try:
+        if esquema.tiene("brigada", "descripcion", "coordinador", "color_identificador"):
             cursor.execute(
                 """
                 UPDATE brigada SET nombre_brigada = %s, area_accion = %s, descripcion = %s, coordinador = %s, color_identificador = %s
@@ -181,12 +133,13 @@ def actualizar_brigada(id_brigada: int, nombre: str, area_accion: str = None, de
                 """,
                 (nombre, area, descripcion or None, coordinador or None, color_identificador or None, id_brigada),
             )
-        except Exception:
+        else:
             cursor.execute(
                 "UPDATE brigada SET nombre_brigada = %s, area_accion = %s WHERE idBrigada = %s",
                 (nombre, area, id_brigada),
             )
         conn.commit()
+        cache.invalidar("brigada")
     finally:
         conn.close()
 
@@ -196,64 +149,62 @@ def eliminar_brigada(id_brigada: int) -> str | None:
     Elimina la brigada si no tiene usuarios asignados.
     Retorna None si OK, o mensaje de error si tiene miembros o fallo.
     """
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM usuario WHERE Brigada_idBrigada = %s", (id_brigada,))
-        (num,) = cursor.fetchone()
-        if num and num > 0:
-            return f"No se puede eliminar: la brigada tiene {num} usuario(s) asignado(s). Asigne o elimine los usuarios primero."
-        cursor.execute("DELETE FROM brigada WHERE idBrigada = %s", (id_brigada,))
-        conn.commit()
+        with kpis.cambio("brigada", id_brigada):
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM usuario WHERE Brigada_idBrigada = %s", (id_brigada,))
+                (num,) = cursor.fetchone()
+                if num and num > 0:
+                    return f"No se puede eliminar: la brigada tiene {num} usuario(s) asignado(s). Asigne o elimine los usuarios primero."
+                cursor.execute("DELETE FROM brigada WHERE idBrigada = %s", (id_brigada,))
+                conn.commit()
+                cache.invalidar("brigada")
+            finally:
+                conn.close()
         return None
     except Exception as e:
         error_msg = str(e)
         if "foreign key constraint fails" in error_msg.lower() or "cannot delete or update a parent row" in error_msg.lower():
             return "No se puede eliminar: La brigada tiene Actividades o Turnos registrados."
         return error_msg
-    finally:
-        conn.close()
 
 
 def listar_brigadas_para_profesor(profesor_id: int, institucion_id: int, tipo_brigada=None):
     """
     Lista brigadas visibles para un profesor, filtradas por tipo_brigada.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor(dictionary=True)
-        filtro_tipo = ""
-        params = [institucion_id]
-        if tipo_brigada:
-            filtro_tipo = "AND b.tipo_brigada = %s"
-            params.append(tipo_brigada)
-        params.append(profesor_id)
-        cursor.execute(
-            f"""
-            SELECT b.idBrigada, b.nombre_brigada, b.area_accion,
-                   b.descripcion, b.coordinador, b.color_identificador, b.profesor_id,
-                   COUNT(u.idUsuario) AS num_miembros,
-                   p.nombre AS profesor_nombre, p.apellido AS profesor_apellido
-            FROM brigada b
-            LEFT JOIN usuario u ON u.Brigada_idBrigada = b.idBrigada
-            LEFT JOIN usuario p ON p.idUsuario = b.profesor_id
-            WHERE b.Institucion_Educativa_idInstitucion = %s
-              AND b.profesor_id = %s
-              {filtro_tipo}
-            GROUP BY b.idBrigada, b.nombre_brigada, b.area_accion, b.descripcion, 
-                     b.coordinador, b.color_identificador, b.profesor_id,
-                     p.nombre, p.apellido
-            ORDER BY b.nombre_brigada
-            """,
-            tuple(params),
-        )
-        rows = cursor.fetchall()
-        for r in rows:
-            r.setdefault("descripcion", None)
-            r.setdefault("coordinador", None)
-            r.setdefault("color_identificador", None)
-            r["num_miembros"] = r.get("num_miembros", 0) or 0
-            r["es_propia"] = r.get("profesor_id") == profesor_id
-        return rows
-    finally:
-        conn.close()
+    filtro_tipo = ""
+    params = [institucion_id]
+    if tipo_brigada:
+        filtro_tipo = "AND b.tipo_brigada = %s"
+        params.append(tipo_brigada)
+    params.append(profesor_id)
+    rows, description = ejecutar_lectura(
+        f"""
+        SELECT b.idBrigada, b.nombre_brigada, b.area_accion,
+               b.descripcion, b.coordinador, b.color_identificador, b.profesor_id,
+               COUNT(u.idUsuario) AS num_miembros,
+               p.nombre AS profesor_nombre, p.apellido AS profesor_apellido
+        FROM brigada b
+        LEFT JOIN usuario u ON u.Brigada_idBrigada = b.idBrigada
+        LEFT JOIN usuario p ON p.idUsuario = b.profesor_id
+        WHERE b.Institucion_Educativa_idInstitucion = %s
+          AND b.profesor_id = %s
+          {filtro_tipo}
+        GROUP BY b.idBrigada, b.nombre_brigada, b.area_accion, b.descripcion, 
+                 b.coordinador, b.color_identificador, b.profesor_id,
+                 p.nombre, p.apellido
+        ORDER BY b.nombre_brigada
+        """,
+        tuple(params),
+    )
+    rows = Brigada.desde_filas([col[0] for col in description], rows)
+    for r in rows:
+        r.setdefault("descripcion", None)
+        r.setdefault("coordinador", None)
+        r.setdefault("color_identificador", None)
+        r["num_miembros"] = r.get("num_miembros", 0) or 0
+        r["es_propia"] = r.get("profesor_id") == profesor_id
+    return rows
@@ -1,23 +1,29 @@
 """CRUD para configuración global (ej. mensaje del día)."""
 from database.connection import get_connection
+from database import cache
 
 CLAVE_MENSAJE_DIA = "mensaje_dia"
 
 
+@cache.cacheado("configuracion")
+def _leer_mensaje_dia() -> str:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT valor FROM configuracion WHERE clave = %s",
+            (CLAVE_MENSAJE_DIA,),
+        )
+        row = cursor.fetchone()
+        return (row[0] or "").strip() if row else ""
+    finally:
+        conn.close()
+
+
 def get_mensaje_dia() -> str:
     """Obtiene el mensaje del día. Retorna cadena vacía si no existe la tabla o la clave."""
     try:
-        conn = get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT valor FROM configuracion WHERE clave = %s",
-                (CLAVE_MENSAJE_DIA,),
-            )
-            row = cursor.fetchone()
-            return (row[0] or "").strip() if row else ""
-        finally:
-            conn.close()
+        return _leer_mensaje_dia()
     except Exception:
         return ""
 
@@ -36,6 +42,7 @@ def set_mensaje_dia(texto: str) -> bool:
                 (CLAVE_MENSAJE_DIA, (texto or "").strip()),
             )
             conn.commit()
+            cache.invalidar("configuracion")
             return True
         finally:
             conn.close()
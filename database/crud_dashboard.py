@@ -2,12 +2,15 @@
 Operaciones CRUD específicas para el Dashboard (KPIs y estadísticas).
 Filtrado por tipo_brigada para aislamiento de datos por tipo de brigada.
 """
-from database.connection import ejecutar
+from database.connection import ejecutar_cacheado
+from database import kpis
+from database.crud_estadisticas import columna_mes, desde_mes, texto_mes
 
 
 def get_kpi_stats(tipo_brigada=None):
     """
     Retorna un diccionario con estadísticas clave, filtradas por tipo_brigada.
+    Lee kpi_snapshot (database/kpis.py); si no está disponible, cuenta en vivo.
     """
     stats = {
         "total_brigadas": 0,
@@ -16,6 +19,14 @@ def get_kpi_stats(tipo_brigada=None):
         "actividades_completadas": 0
     }
 
+    snapshot = kpis.leer(tipo_brigada)
+    if snapshot is not None:
+        stats["total_brigadas"] = snapshot["brigadas"]
+        stats["total_usuarios"] = snapshot["usuarios"]
+        stats["actividades_activas"] = snapshot["actividades_activas"]
+        stats["actividades_completadas"] = snapshot["actividades_completadas"]
+        return stats
+
     try:
         if tipo_brigada:
             sql = """
@@ -25,7 +36,7 @@ def get_kpi_stats(tipo_brigada=None):
                     (SELECT COUNT(*) FROM actividad a JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada WHERE b.tipo_brigada = %s AND a.estado NOT IN ('Completada', 'Cancelada')) as actividades_activas,
                     (SELECT COUNT(*) FROM actividad a JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada WHERE b.tipo_brigada = %s AND a.estado = 'Completada') as actividades_completadas
             """
-            rows, _ = ejecutar(sql, (tipo_brigada, tipo_brigada, tipo_brigada, tipo_brigada))
+            rows, _ = ejecutar_cacheado(sql, (tipo_brigada, tipo_brigada, tipo_brigada, tipo_brigada), tablas=("brigada", "usuario", "actividad"))
         else:
             sql = """
                 SELECT 
@@ -34,7 +45,7 @@ def get_kpi_stats(tipo_brigada=None):
                     (SELECT COUNT(*) FROM actividad WHERE estado NOT IN ('Completada', 'Cancelada')) as actividades_activas,
                     (SELECT COUNT(*) FROM actividad WHERE estado = 'Completada') as actividades_completadas
             """
-            rows, _ = ejecutar(sql)
+            rows, _ = ejecutar_cacheado(sql, tablas=("brigada", "usuario", "actividad"))
 
         if rows and rows[0]:
             stats["total_brigadas"] = rows[0][0] or 0
@@ -49,32 +60,41 @@ def get_kpi_stats(tipo_brigada=None):
 
 def get_activities_stats_by_month(tipo_brigada=None):
     """
-    Retorna cantidad de actividades por mes, filtradas por tipo_brigada.
+    Retorna cantidad de actividades por mes de los últimos 6 meses, filtradas por
+    tipo_brigada. Filtra y agrupa por el mes AAAAMM guardado (crud_estadisticas.columna_mes),
+    desde 5 meses antes del último mes con actividades (crud_estadisticas.desde_mes).
     """
     if tipo_brigada:
-        sql = """
-            SELECT DATE_FORMAT(a.fecha_inicio, '%Y-%m') as mes, COUNT(*) as cantidad
+        mes = columna_mes("actividad", "a")
+        desde = desde_mes(
+            f"SELECT MAX({mes}) AS m FROM actividad a JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada "
+            "WHERE b.tipo_brigada = %s"
+        )
+        sql = f"""
+            SELECT {mes} as mes, COUNT(*) as cantidad
             FROM actividad a
             JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada
-            WHERE b.tipo_brigada = %s
-            GROUP BY mes
-            ORDER BY mes DESC
+            WHERE b.tipo_brigada = %s AND {mes} >= {desde}
+            GROUP BY {mes}
+            ORDER BY {mes} DESC
             LIMIT 6
         """
-        params = (tipo_brigada,)
+        params = (tipo_brigada, tipo_brigada)
     else:
-        sql = """
-            SELECT DATE_FORMAT(fecha_inicio, '%Y-%m') as mes, COUNT(*) as cantidad
+        mes = columna_mes("actividad", "actividad")
+        sql = f"""
+            SELECT {mes} as mes, COUNT(*) as cantidad
             FROM actividad
-            GROUP BY mes
-            ORDER BY mes DESC
+            WHERE {mes} >= {desde_mes(f"SELECT MAX({mes}) AS m FROM actividad")}
+            GROUP BY {mes}
+            ORDER BY {mes} DESC
             LIMIT 6
         """
         params = None
 
     try:
-        rows, _ = ejecutar(sql, params)
-        return rows
+        rows, _ = ejecutar_cacheado(sql, params, tablas=("actividad", "brigada"))
+        return [(texto_mes(m), cantidad) for m, cantidad in rows]
     except Exception as e:
         print(f"Error stats actividades: {e}")
         return []
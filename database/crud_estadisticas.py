@@ -2,19 +2,85 @@
 Operaciones CRUD dedicadas a la pantalla de Estadísticas.
 Extrae KPIs globales y métricas temporales/agrupadas para gráficos.
 Filtrado por tipo_brigada para aislamiento de datos.
+Cada consulta tiene un tiempo máximo (SBE_DB_TIMEOUT_ESTADISTICAS_S): si el
+servidor no responde a tiempo se corta y el gráfico queda vacío.
 """
-from database.connection import ejecutar
+from database.config import DB_TIMEOUT_ESTADISTICAS_S
+from database.connection import ejecutar_cacheado
+from database import esquema, kpis
 
-def get_kpis_estadisticas(tipo_brigada=None, brigada_rol_id=None):
-    """Calcula 5 KPIs de alto impacto, filtrados por brigada_rol_id o tipo_brigada."""
-    kpis = {
-        "voluntariado_activo": 0,
-        "horas_invertidas": 0,
-        "despliegue_operativo": 0,
-        "impacto_documentado": 0,
-        "tasa_efectividad": 0
+_TIMEOUT_S = DB_TIMEOUT_ESTADISTICAS_S or None
+
+# tabla -> (columna AAAAMM de 009_meses.sql, fecha de la que se calcula)
+_MESES = {
+    "actividad": ("mes_inicio", "fecha_inicio"),
+    "reporte_incidente": ("mes_creado", "creado_en"),
+    "reporte_actividad": ("mes_reporte", "fecha_reporte"),
+    "reporte_de_impacto": ("mes_generacion", "fecha_generacion"),
+}
+
+
+def columna_mes(tabla: str, alias: str) -> str:
+    """
+    Expresión del mes (entero AAAAMM) de una fila de 'tabla': la columna guardada
+    de 009_meses.sql si existe; si no, se calcula de la fecha en cada fila.
+    """
+    mes, fecha = _MESES[tabla]
+    if esquema.tiene(tabla, mes):
+        return f"{alias}.{mes}"
+    return f"EXTRACT(YEAR_MONTH FROM {alias}.{fecha})"
+
+
+def desde_mes(*maximos: str) -> str:
+    """
+    Primer mes (AAAAMM) de la ventana de 6 meses de las series: acota cada
+    consulta a un rango sobre las columnas de mes en vez de agrupar todo el
+    historial. Se ancla al último mes con datos (no a CURDATE()), así que se
+    ven los mismos meses que con ORDER BY mes DESC LIMIT 6 sobre todo el
+    historial, salvo los meses sin datos dentro de la ventana, que ya no
+    arrastran otros más viejos. 'maximos' son subconsultas
+    "SELECT MAX(mes) AS m ...", una por tabla; con los índices (FK, mes) de
+    009_meses.sql cada una lee solo el extremo del índice.
+    """
+    if len(maximos) == 1:
+        ultimo = f"({maximos[0]})"
+    else:
+        ultimo = "(SELECT MAX(m) FROM (" + " UNION ALL ".join(maximos) + ") AS ultimos)"
+    return f"PERIOD_ADD({ultimo}, -5)"
+
+
+def texto_mes(mes) -> str:
+    """202501 -> '2025-01', el formato que esperan los gráficos."""
+    mes = int(mes)
+    return f"{mes // 100:04d}-{mes % 100:02d}"
+
+
+def _por_mes(rows) -> list:
+    """Filas (mes AAAAMM, cantidad) en orden descendente -> [('AAAA-MM', cantidad)] ascendente."""
+    return [(texto_mes(mes), cantidad) for mes, cantidad in reversed(rows)]
+
+
+def _kpis(voluntariado, horas, total_brigadas, brigadas_activas, impacto, total_actividades, completadas):
+    return {
+        "voluntariado_activo": voluntariado or 0,
+        "horas_invertidas": int(horas) if horas else 0,
+        "despliegue_operativo": round((brigadas_activas / total_brigadas) * 100) if total_brigadas and brigadas_activas else 0,
+        "impacto_documentado": impacto or 0,
+        "tasa_efectividad": round((completadas / total_actividades) * 100) if total_actividades and completadas else 0,
     }
 
+
+def get_kpis_estadisticas(tipo_brigada=None, brigada_rol_id=None):
+    """
+    Calcula 5 KPIs de alto impacto, filtrados por brigada_rol_id o tipo_brigada.
+    Lee kpi_snapshot (database/kpis.py); si no está disponible, cuenta en vivo.
+    """
+    s = kpis.leer(tipo_brigada, brigada_rol_id)
+    if s is not None:
+        return _kpis(s["brigadistas"], s["horas_completadas"], s["brigadas"], s["brigadas_activas"],
+                     s["impactos"], s["actividades"], s["actividades_completadas"])
+
+    kpis_vacios = _kpis(0, 0, 0, 0, 0, 0, 0)
     try:
         where_b = ""
         params = {}
@@ -48,82 +114,82 @@ def get_kpis_estadisticas(tipo_brigada=None, brigada_rol_id=None):
                     (SELECT COUNT(*) FROM actividad WHERE estado = 'Completada') as completadas
             """
         
-        rows, _ = ejecutar(sql, params)
+        rows, _ = ejecutar_cacheado(sql, params, tablas=("usuario", "actividad", "brigada", "reporte_de_impacto"), timeout_s=_TIMEOUT_S)
         if rows:
-            r = rows[0]
-            kpis["voluntariado_activo"] = r[0] if r[0] else 0
-            kpis["horas_invertidas"] = int(r[1]) if r[1] else 0
-            
-            total_brigadas = r[2] if r[2] else 0
-            brigadas_activas = r[3] if r[3] else 0
-            if total_brigadas > 0:
-                kpis["despliegue_operativo"] = round((brigadas_activas / total_brigadas) * 100)
-                
-            kpis["impacto_documentado"] = r[4] if r[4] else 0
-            
-            total_actividades = r[5] if r[5] else 0
-            completadas = r[6] if r[6] else 0
-            if total_actividades > 0:
-                kpis["tasa_efectividad"] = round((completadas / total_actividades) * 100)
+            return _kpis(*rows[0])
 
     except Exception as e:
         print(f"Error calculando KPIs de estadísticas: {e}")
 
-    return kpis
+    return kpis_vacios
 
 
 def get_actividades_por_mes(tipo_brigada=None, brigada_rol_id=None):
     """Retorna conteo de actividades de los últimos 6 meses (BarChart)."""
-    sql = """
-        SELECT DATE_FORMAT(a.fecha_inicio, '%Y-%m') as mes, COUNT(*) as cantidad
+    filtro_b = ""
+    valor = None
+    if brigada_rol_id is not None:
+        filtro_b = "AND b.idBrigada = %s"
+        valor = brigada_rol_id
+    elif tipo_brigada:
+        filtro_b = "AND b.tipo_brigada = %s"
+        valor = tipo_brigada
+
+    mes = columna_mes("actividad", "a")
+    desde = desde_mes(
+        f"SELECT MAX({mes}) AS m FROM actividad a JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada WHERE 1=1 {filtro_b}"
+    )
+    sql = f"""
+        SELECT {mes} as mes, COUNT(*) as cantidad
         FROM actividad a
         JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada
-        WHERE a.fecha_inicio IS NOT NULL
+        WHERE {mes} >= {desde} {filtro_b}
+        GROUP BY {mes} ORDER BY {mes} DESC LIMIT 6
     """
-    params = []
-    if brigada_rol_id is not None:
-        sql += " AND b.idBrigada = %s"
-        params.append(brigada_rol_id)
-    elif tipo_brigada:
-        sql += " AND b.tipo_brigada = %s"
-        params.append(tipo_brigada)
-    
-    sql += " GROUP BY mes ORDER BY mes DESC LIMIT 6"
+    params = [valor] * sql.count("%s")
     
     try:
-        rows, _ = ejecutar(sql, tuple(params) if params else None)
-        return list(reversed(rows))
+        rows, _ = ejecutar_cacheado(sql, tuple(params) if params else None, tablas=("actividad", "brigada"), timeout_s=_TIMEOUT_S)
+        return _por_mes(rows)
     except Exception as e:
         print(f"Error agrupando actividades por mes: {e}")
         return []
 
 
 def get_tendencia_reportes_por_mes(tipo_brigada=None, brigada_rol_id=None):
-    """Cuenta reportes por mes (LineChart), filtrado."""
-    where_b = ""
-    params = []
+    """Cuenta reportes por mes de los últimos 6 meses (LineChart), filtrado."""
+    filtro_b = ""
+    valor = None
     if brigada_rol_id is not None:
-        where_b = "WHERE b.idBrigada = %s"
-        params = [brigada_rol_id, brigada_rol_id, brigada_rol_id]
+        filtro_b = "AND b.idBrigada = %s"
+        valor = brigada_rol_id
     elif tipo_brigada:
-        where_b = "WHERE b.tipo_brigada = %s"
-        params = [tipo_brigada, tipo_brigada, tipo_brigada]
-        
+        filtro_b = "AND b.tipo_brigada = %s"
+        valor = tipo_brigada
+
+    # El rango va dentro de cada rama: el UNION solo junta filas de la ventana
+    r, i, ra = (columna_mes("reporte_incidente", "r"), columna_mes("reporte_de_impacto", "i"),
+                columna_mes("reporte_actividad", "ra"))
+    desde_r = f"FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada WHERE 1=1 {filtro_b}"
+    desde_i = f"FROM reporte_de_impacto i JOIN actividad a ON i.Actividad_idActividad = a.idActividad JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada WHERE 1=1 {filtro_b}"
+    desde_ra = f"FROM reporte_actividad ra JOIN actividad a ON ra.Actividad_idActividad = a.idActividad JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada WHERE 1=1 {filtro_b}"
+    desde = desde_mes(f"SELECT MAX({r}) AS m {desde_r}", f"SELECT MAX({i}) AS m {desde_i}", f"SELECT MAX({ra}) AS m {desde_ra}")
     sql = f"""
-        SELECT DATE_FORMAT(fecha, '%%Y-%%m') as mes, COUNT(*) as cantidad
+        WITH ventana AS (SELECT {desde} AS desde)
+        SELECT mes, COUNT(*) as cantidad
         FROM (
-            SELECT r.creado_en as fecha FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada {where_b}
+            SELECT {r} as mes {desde_r} AND {r} >= (SELECT desde FROM ventana)
             UNION ALL
-            SELECT i.fecha_generacion as fecha FROM reporte_de_impacto i JOIN actividad a ON i.Actividad_idActividad = a.idActividad JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_b}
+            SELECT {i} as mes {desde_i} AND {i} >= (SELECT desde FROM ventana)
             UNION ALL
-            SELECT ra.fecha_reporte as fecha FROM reporte_actividad ra JOIN actividad a ON ra.Actividad_idActividad = a.idActividad JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_b}
+            SELECT {ra} as mes {desde_ra} AND {ra} >= (SELECT desde FROM ventana)
         ) as todos_reportes
-        WHERE fecha IS NOT NULL
         GROUP BY mes ORDER BY mes DESC LIMIT 6
     """
+    params = [valor] * sql.count("%s")
     try:
-        rows, _ = ejecutar(sql, tuple(params) if params else None)
-        return list(reversed(rows))
+        rows, _ = ejecutar_cacheado(sql, tuple(params) if params else None, tablas=("reporte_incidente", "reporte_de_impacto", "reporte_actividad", "actividad", "brigada"), timeout_s=_TIMEOUT_S)
+        return _por_mes(rows)
     except Exception as e:
         print(f"Error agrupando reportes por mes: {e}")
         return []
@@ -148,10 +214,151 @@ def get_distribucion_estados_actividades(tipo_brigada=None, brigada_rol_id=None)
     sql += " GROUP BY a.estado"
     
     try:
-        rows, _ = ejecutar(sql, tuple(params) if params else None)
+        rows, _ = ejecutar_cacheado(sql, tuple(params) if params else None, tablas=("actividad", "brigada"), timeout_s=_TIMEOUT_S)
         if not rows:
             return []
         return [{"estado": fila[0], "conteo": fila[1]} for fila in rows]
     except Exception as e:
         print(f"Error agrupando estados: {e}")
         return []
+
+
+# ---------- Motor de una sola pasada ----------
+
+_HORAS = (
+    "CASE WHEN a.estado = 'Completada' AND a.fecha_inicio IS NOT NULL AND a.fecha_fin IS NOT NULL "
+    "THEN TIMESTAMPDIFF(HOUR, a.fecha_inicio, a.fecha_fin) END"
+)
+
+
+def _sql_estadisticas(where_b: str, con_kpis: bool) -> str:
+    """
+    Una sola sentencia para los cuatro conjuntos. 'act' agrupa actividad por
+    (estado, mes) en una pasada; de ahí salen la torta, las barras y los KPIs
+    de actividades. 'rep' agrupa por mes solo los reportes de la ventana de
+    6 meses de cada tabla ('ventana', ver desde_mes); de ahí sale la tendencia. Cada fila
+    lleva en 'serie' a qué conjunto pertenece. Los meses son enteros AAAAMM
+    (columna_mes).
+    """
+    def donde(condicion):
+        return f"{where_b} AND {condicion}" if where_b else f"WHERE {condicion}"
+
+    where_u = donde("u.rol = 'Brigadista'")
+    join_u = "JOIN brigada b ON u.Brigada_idBrigada = b.idBrigada" if where_b else ""
+    r, i, ra = (columna_mes("reporte_incidente", "r"), columna_mes("reporte_de_impacto", "i"),
+                columna_mes("reporte_actividad", "ra"))
+    desde_r = f"FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada {where_b}"
+    desde_i = ("FROM reporte_de_impacto i JOIN actividad a ON i.Actividad_idActividad = a.idActividad "
+               f"JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_b}")
+    desde_ra = ("FROM reporte_actividad ra JOIN actividad a ON ra.Actividad_idActividad = a.idActividad "
+                f"JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_b}")
+    desde = desde_mes(f"SELECT MAX({r}) AS m {desde_r}", f"SELECT MAX({i}) AS m {desde_i}", f"SELECT MAX({ra}) AS m {desde_ra}")
+    where_r, where_i, where_ra = (donde(f"{mes} >= (SELECT desde FROM ventana)") for mes in (r, i, ra))
+    ramas = [
+        "SELECT 'estado' AS serie, estado AS clave, SUM(n) AS n, SUM(horas) AS horas FROM act GROUP BY estado",
+        "SELECT 'mes', mes, SUM(n), NULL FROM act "
+        f"WHERE mes >= {desde_mes('SELECT MAX(mes) AS m FROM act')} GROUP BY mes",
+        "SELECT 'reporte', mes, SUM(n), NULL FROM rep GROUP BY mes",
+    ]
+    if con_kpis:
+        ramas += [
+            "SELECT 'kpi', 'impacto', COUNT(*), NULL FROM reporte_de_impacto i "
+            f"JOIN actividad a ON i.Actividad_idActividad = a.idActividad JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_b}",
+            f"SELECT 'kpi', 'brigadas', COUNT(*), NULL FROM brigada b {where_b}",
+            "SELECT 'kpi', 'brigadas_activas', COUNT(DISTINCT a.Brigada_idBrigada), NULL "
+            f"FROM actividad a JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_b}",
+            f"SELECT 'kpi', 'voluntariado', COUNT(*), NULL FROM usuario u {join_u} {where_u}",
+        ]
+    union = "\n        UNION ALL\n        ".join(ramas)
+    return f"""
+        WITH act AS (
+            SELECT a.estado, {columna_mes("actividad", "a")} AS mes, COUNT(*) AS n, SUM({_HORAS}) AS horas
+            FROM actividad a JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_b}
+            GROUP BY a.estado, mes
+        ),
+        ventana AS (
+            SELECT {desde} AS desde
+        ),
+        rep AS (
+            SELECT {r} AS mes, COUNT(*) AS n
+            FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada {where_r}
+            GROUP BY mes
+            UNION ALL
+            SELECT {i} AS mes, COUNT(*)
+            FROM reporte_de_impacto i JOIN actividad a ON i.Actividad_idActividad = a.idActividad
+            JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_i}
+            GROUP BY mes
+            UNION ALL
+            SELECT {ra} AS mes, COUNT(*)
+            FROM reporte_actividad ra JOIN actividad a ON ra.Actividad_idActividad = a.idActividad
+            JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada {where_ra}
+            GROUP BY mes
+        )
+        {union}
+    """
+
+
+def _ultimos_meses(filas: dict, n: int = 6) -> list:
+    """[('AAAA-MM', cantidad)] de los últimos n meses, en orden ascendente (como las funciones por gráfico)."""
+    return [(texto_mes(mes), cantidad) for mes, cantidad in sorted(filas.items())[-n:]]
+
+
+def get_estadisticas(tipo_brigada=None, brigada_rol_id=None) -> dict:
+    """
+    Los cuatro conjuntos de la pantalla de Estadísticas en una sola consulta:
+    {"kpis", "actividades_por_mes", "tendencia_reportes", "estados"}, con el
+    mismo formato que get_kpis_estadisticas, get_actividades_por_mes,
+    get_tendencia_reportes_por_mes y get_distribucion_estados_actividades.
+    Los KPIs salen de kpi_snapshot cuando está disponible.
+    """
+    vacio = {"kpis": _kpis(0, 0, 0, 0, 0, 0, 0), "actividades_por_mes": [], "tendencia_reportes": [], "estados": []}
+    params = {}
+    where_b = ""
+    if brigada_rol_id is not None:
+        where_b = "WHERE b.idBrigada = %(bid)s"
+        params["bid"] = brigada_rol_id
+    elif tipo_brigada:
+        where_b = "WHERE b.tipo_brigada = %(tb)s"
+        params["tb"] = tipo_brigada
+    snapshot = kpis.leer(tipo_brigada, brigada_rol_id)
+
+    try:
+        rows, _ = ejecutar_cacheado(
+            _sql_estadisticas(where_b, con_kpis=snapshot is None), params,
+            tablas=("usuario", "actividad", "brigada", "reporte_incidente", "reporte_de_impacto", "reporte_actividad"),
+            timeout_s=_TIMEOUT_S,
+        )
+    except Exception as e:
+        print(f"Error calculando estadísticas: {e}")
+        return vacio
+
+    estados, meses, reportes, escalares = [], {}, {}, {}
+    total = completadas = horas = 0
+    for serie, clave, n, h in rows:
+        n = int(n or 0)
+        if serie == "estado":
+            estados.append({"estado": clave, "conteo": n})
+            total += n
+            horas += int(h or 0)
+            if clave == "Completada":
+                completadas = n
+        elif serie == "mes":
+            meses[int(clave)] = n
+        elif serie == "reporte":
+            reportes[int(clave)] = n
+        else:
+            escalares[clave] = n
+
+    if snapshot is not None:
+        resumen = _kpis(snapshot["brigadistas"], snapshot["horas_completadas"], snapshot["brigadas"],
+                        snapshot["brigadas_activas"], snapshot["impactos"], snapshot["actividades"],
+                        snapshot["actividades_completadas"])
+    else:
+        resumen = _kpis(escalares.get("voluntariado"), horas, escalares.get("brigadas"),
+                        escalares.get("brigadas_activas"), escalares.get("impacto"), total, completadas)
+    return {
+        "kpis": resumen,
+        "actividades_por_mes": _ultimos_meses(meses),
+        "tendencia_reportes": _ultimos_meses(reportes),
+        "estados": estados,
+    }
@@ -2,79 +2,17 @@
 CRUD para la tabla `reporte_incidente`, `reporte_actividad`, `reporte_de_impacto`.
 Filtrado por tipo_brigada para aislamiento de datos.
 """
-from database.connection import ejecutar
-
-# ==============================================================
-# AUTO-MIGRACIÓN (se ejecuta una sola vez; idempotente)
-# ==============================================================
-
-def ejecutar_migracion_reportes():
-    """
-    Ejecuta las migraciones necesarias para el módulo de reportes.
-    Esta función NO se ejecuta automáticamente. Debe invocarse manual o explícitamente.
-    """
-    """Aplica migraciones necesarias para alinear las tablas con los escenarios SBE."""
-    migraciones = [
-        # --- reporte_de_impacto: nuevos campos ---
-        "ALTER TABLE `reporte_de_impacto` ADD COLUMN `brigada` VARCHAR(100) NULL AFTER `contenido`",
-        "ALTER TABLE `reporte_de_impacto` ADD COLUMN `area_evaluada` VARCHAR(200) NULL AFTER `brigada`",
-        "ALTER TABLE `reporte_de_impacto` ADD COLUMN `indicador` VARCHAR(100) NULL AFTER `area_evaluada`",
-        "ALTER TABLE `reporte_de_impacto` ADD COLUMN `valor` VARCHAR(50) NULL AFTER `indicador`",
-        "ALTER TABLE `reporte_de_impacto` ADD COLUMN `unidad` VARCHAR(50) NULL AFTER `valor`",
-        # --- reporte_de_impacto: Actividad opcional ---
-        "ALTER TABLE `reporte_de_impacto` MODIFY COLUMN `Actividad_idActividad` INT(11) NULL",
-        # --- reporte_de_impacto: contenido nullable ---
-        "ALTER TABLE `reporte_de_impacto` MODIFY COLUMN `contenido` TEXT NULL",
-        # --- reporte_actividad: campo participantes ---
-        "ALTER TABLE `reporte_actividad` ADD COLUMN `participantes` VARCHAR(500) NULL AFTER `resumen`",
-    ]
-    for sql in migraciones:
-        try:
-            ejecutar(sql, commit=True)
-        except Exception as e:
-            msg = str(e).lower()
-            if "duplicate column" in msg or "duplicate" in msg:
-                pass  # Ya existe, ignorar
-            else:
-                print(f"[migración reportes] {e}")
-
-# ejecutar_migracion_reportes()  # Desactivado para evitar ejecucion global en produccion
+from database.config import DB_TIMEOUT_ESTADISTICAS_S
+from database.connection import ejecutar, ejecutar_lectura, ejecutar_lote
+from database import kpis
+from database.paginacion import consultar_pagina
+from database.registros import Reporte, ReporteActividad, ReporteImpacto
 
 # ==============================================================
 # REPORTE DE INCIDENTES
 # ==============================================================
 
-_TABLA_REPORTE_VERIFICADA = False
-
-def _asegurar_tabla_reporte():
-    global _TABLA_REPORTE_VERIFICADA
-    if _TABLA_REPORTE_VERIFICADA:
-        return
-    sql = """
-    CREATE TABLE IF NOT EXISTS `reporte_incidente` (
-      `idReporte` INT(11) NOT NULL AUTO_INCREMENT,
-      `titulo` VARCHAR(100) NOT NULL,
-      `descripcion` TEXT NOT NULL,
-      `ubicacion` VARCHAR(200) NOT NULL,
-      `prioridad` VARCHAR(50) NOT NULL,
-      `estado` VARCHAR(50) NOT NULL DEFAULT 'En Proceso',
-      `Brigada_idBrigada` INT(11) NOT NULL,
-      `creado_en` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-      `actualizado_en` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-      PRIMARY KEY (`idReporte`),
-      KEY `fk_reporte_brigada_idx` (`Brigada_idBrigada`),
-      CONSTRAINT `fk_reporte_brigada` FOREIGN KEY (`Brigada_idBrigada`)
-        REFERENCES `brigada` (`idBrigada`) ON DELETE CASCADE ON UPDATE NO ACTION
-    ) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_general_ci;
-    """
-    try:
-        ejecutar(sql, commit=True)
-        _TABLA_REPORTE_VERIFICADA = True
-    except Exception as e:
-        print(f"[reporte] tabla ya existe o error: {e}")
-
 def crear_reporte(titulo: str, descripcion: str, ubicacion: str, prioridad: str, brigada_id: int) -> int | None:
-    _asegurar_tabla_reporte()
     sql = """
     INSERT INTO reporte_incidente (titulo, descripcion, ubicacion, prioridad, Brigada_idBrigada)
     VALUES (%s, %s, %s, %s, %s)
@@ -86,39 +24,57 @@ def crear_reporte(titulo: str, descripcion: str, ubicacion: str, prioridad: str,
         print(f"Error creando reporte: {e}")
         return None
 
-def listar_reportes(tipo_brigada=None, brigada_rol_id=None):
-    _asegurar_tabla_reporte()
-    sql = """
+def _filtros_brigada(tipo_brigada=None, brigada_rol_id=None):
+    """Condiciones comunes de los listados: por brigada del rol o por tipo de brigada (alias b)."""
+    if brigada_rol_id is not None:
+        return ["b.idBrigada = %s"], [brigada_rol_id]
+    if tipo_brigada:
+        return ["b.tipo_brigada = %s"], [tipo_brigada]
+    return [], []
+
+
+_SELECT_REPORTES = """
     SELECT r.idReporte, r.titulo, r.descripcion, r.ubicacion, r.prioridad, r.estado, r.creado_en, 
-           b.nombre_brigada, b.color_identificador
+           b.nombre_brigada, b.color_identificador"""
+_DESDE_REPORTES = """
     FROM reporte_incidente r
-    JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada
+    JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada"""
+_ORDEN_REPORTES = [("r.creado_en", "DESC"), ("r.idReporte", "DESC")]
+
+
+def _mapear_reporte(r):
+    return Reporte(
+        id=r[0],
+        titulo=r[1],
+        descripcion=r[2],
+        ubicacion=r[3],
+        prioridad=r[4],
+        estado=r[5],
+        fecha=r[6],
+        brigada=r[7],
+        color_brigada=r[8] or "#2563eb",
+    )
+
+
+def listar_reportes(tipo_brigada=None, brigada_rol_id=None):
+    condiciones, params = _filtros_brigada(tipo_brigada, brigada_rol_id)
+    sql = f"""{_SELECT_REPORTES}{_DESDE_REPORTES}
     WHERE 1=1
     """
-    params = []
-    if brigada_rol_id is not None:
-        sql += " AND b.idBrigada = %s"
-        params.append(brigada_rol_id)
-    elif tipo_brigada:
-        sql += " AND b.tipo_brigada = %s"
-        params.append(tipo_brigada)
-        
+    for c in condiciones:
+        sql += f" AND {c}"
     sql += " ORDER BY r.creado_en DESC"
-    rows, _ = ejecutar(sql, tuple(params))
-    reportes = []
-    for r in rows:
-        reportes.append({
-            "id": r[0],
-            "titulo": r[1],
-            "descripcion": r[2],
-            "ubicacion": r[3],
-            "prioridad": r[4],
-            "estado": r[5],
-            "fecha": r[6],
-            "brigada": r[7],
-            "color_brigada": r[8] or "#2563eb",
-        })
-    return reportes
+    rows, _ = ejecutar_lectura(sql, tuple(params))
+    return [_mapear_reporte(r) for r in rows]
+
+
+def listar_reportes_pagina(tipo_brigada=None, brigada_rol_id=None, tam_pagina=None, cursor=None):
+    """Una página de listar_reportes(). Retorna {"items": [...], "siguiente": cursor o None}."""
+    condiciones, params = _filtros_brigada(tipo_brigada, brigada_rol_id)
+    rows, siguiente = consultar_pagina(
+        _SELECT_REPORTES, _DESDE_REPORTES, condiciones, params, _ORDEN_REPORTES, tam_pagina, cursor,
+    )
+    return {"items": [_mapear_reporte(r) for r in rows], "siguiente": siguiente}
 
 def actualizar_estado(id_reporte: int, nuevo_estado: str) -> bool:
     sql = "UPDATE reporte_incidente SET estado = %s WHERE idReporte = %s"
@@ -130,7 +86,6 @@ def actualizar_estado(id_reporte: int, nuevo_estado: str) -> bool:
         return False
 
 def get_reporte_stats(tipo_brigada=None, brigada_rol_id=None):
-    _asegurar_tabla_reporte()
     stats = {
         "total": 0,
         "en_proceso": 0,
@@ -147,15 +102,18 @@ def get_reporte_stats(tipo_brigada=None, brigada_rol_id=None):
         where_base = "WHERE b.tipo_brigada = %s"
         params_base.append(tipo_brigada)
         
+    base = f"SELECT COUNT(*) FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada {where_base}"
+    y = "AND" if where_base else "WHERE"
+    p = tuple(params_base)
     try:
-        rows, _ = ejecutar(f"SELECT COUNT(*) FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada {where_base}", tuple(params_base))
-        stats["total"] = rows[0][0] if rows else 0
-        
-        rows, _ = ejecutar(f"SELECT COUNT(*) FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada {where_base} {'AND' if where_base else 'WHERE'} r.estado != 'Resuelto'", tuple(params_base))
-        stats["en_proceso"] = rows[0][0] if rows else 0
-        
-        rows, _ = ejecutar(f"SELECT COUNT(*) FROM reporte_incidente r JOIN brigada b ON r.Brigada_idBrigada = b.idBrigada {where_base} {'AND' if where_base else 'WHERE'} r.estado = 'Resuelto'", tuple(params_base))
-        stats["resueltos"] = rows[0][0] if rows else 0
+        (total, _), (en_proceso, _), (resueltos, _) = ejecutar_lote([
+            (base, p),
+            (f"{base} {y} r.estado != 'Resuelto'", p),
+            (f"{base} {y} r.estado = 'Resuelto'", p),
+        ], timeout_s=DB_TIMEOUT_ESTADISTICAS_S or None)
+        stats["total"] = total[0][0] if total else 0
+        stats["en_proceso"] = en_proceso[0][0] if en_proceso else 0
+        stats["resueltos"] = resueltos[0][0] if resueltos else 0
     except Exception as e:
         print(f"Error stats reporte: {e}")
     return stats
@@ -164,9 +122,7 @@ def get_reporte_stats(tipo_brigada=None, brigada_rol_id=None):
 # REPORTES DE ACTIVIDADES
 # ==========================================================
 
-def listar_reportes_actividad(tipo_brigada=None, brigada_rol_id=None):
-    """Obtiene los reportes de actividades, filtrados por tipo_brigada o brigada_rol_id."""
-    sql = """
+_SELECT_REPORTES_ACTIVIDAD = """
     SELECT 
         r.idReporte_actividad, 
         r.resumen, 
@@ -175,36 +131,49 @@ def listar_reportes_actividad(tipo_brigada=None, brigada_rol_id=None):
         a.titulo AS actividad_titulo, 
         a.fecha_inicio AS actividad_fecha,
         u.nombre, u.apellido,
-        r.participantes
+        r.participantes"""
+_DESDE_REPORTES_ACTIVIDAD = """
     FROM reporte_actividad r
     LEFT JOIN actividad a ON r.Actividad_idActividad = a.idActividad
     LEFT JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada
-    LEFT JOIN usuario u ON r.Usuario_idUsuario = u.idUsuario
+    LEFT JOIN usuario u ON r.Usuario_idUsuario = u.idUsuario"""
+_ORDEN_REPORTES_ACTIVIDAD = [("r.fecha_reporte", "DESC"), ("r.idReporte_actividad", "DESC")]
+
+
+def _mapear_reporte_actividad(r):
+    return ReporteActividad(
+        id=r[0],
+        resumen=r[1],
+        resultado=r[2],
+        fecha_reporte=r[3],
+        actividad_titulo=r[4] or "Desconocida",
+        actividad_fecha=r[5],
+        usuario_nombre=f"{r[6] or ''} {r[7] or ''}".strip() or "Sistema",
+        participantes=r[8] or "",
+    )
+
+
+def listar_reportes_actividad(tipo_brigada=None, brigada_rol_id=None):
+    """Obtiene los reportes de actividades, filtrados por tipo_brigada o brigada_rol_id."""
+    condiciones, params = _filtros_brigada(tipo_brigada, brigada_rol_id)
+    sql = f"""{_SELECT_REPORTES_ACTIVIDAD}{_DESDE_REPORTES_ACTIVIDAD}
     WHERE 1=1
     """
-    params = []
-    if brigada_rol_id is not None:
-        sql += " AND b.idBrigada = %s"
-        params.append(brigada_rol_id)
-    elif tipo_brigada:
-        sql += " AND b.tipo_brigada = %s"
-        params.append(tipo_brigada)
-        
+    for c in condiciones:
+        sql += f" AND {c}"
     sql += " ORDER BY r.fecha_reporte DESC"
-    rows, _ = ejecutar(sql, tuple(params))
-    reportes = []
-    for r in rows:
-        reportes.append({
-            "id": r[0],
-            "resumen": r[1],
-            "resultado": r[2],
-            "fecha_reporte": r[3],
-            "actividad_titulo": r[4] or "Desconocida",
-            "actividad_fecha": r[5],
-            "usuario_nombre": f"{r[6] or ''} {r[7] or ''}".strip() or "Sistema",
-            "participantes": r[8] or "",
-        })
-    return reportes
+    rows, _ = ejecutar_lectura(sql, tuple(params))
+    return [_mapear_reporte_actividad(r) for r in rows]
+
+
+def listar_reportes_actividad_pagina(tipo_brigada=None, brigada_rol_id=None, tam_pagina=None, cursor=None):
+    """Una página de listar_reportes_actividad(). Retorna {"items": [...], "siguiente": cursor o None}."""
+    condiciones, params = _filtros_brigada(tipo_brigada, brigada_rol_id)
+    rows, siguiente = consultar_pagina(
+        _SELECT_REPORTES_ACTIVIDAD, _DESDE_REPORTES_ACTIVIDAD, condiciones, params,
+        _ORDEN_REPORTES_ACTIVIDAD, tam_pagina, cursor,
+    )
+    return {"items": [_mapear_reporte_actividad(r) for r in rows], "siguiente": siguiente}
 
 def crear_reporte_actividad(resumen: str, resultado: str, actividad_id: int, usuario_id: int, participantes: str = "") -> int | None:
     sql = """
@@ -222,9 +191,7 @@ def crear_reporte_actividad(resumen: str, resultado: str, actividad_id: int, usu
 # REPORTES DE IMPACTO
 # ==========================================================
 
-def listar_reportes_impacto(tipo_brigada=None, brigada_rol_id=None):
-    """Obtiene los reportes de impacto, filtrados por tipo_brigada o brigada_rol_id."""
-    sql = """
+_SELECT_REPORTES_IMPACTO = """
     SELECT 
         i.idReporte_impacto, 
         i.contenido, 
@@ -235,38 +202,51 @@ def listar_reportes_impacto(tipo_brigada=None, brigada_rol_id=None):
         i.area_evaluada,
         i.indicador,
         i.valor,
-        i.unidad
+        i.unidad"""
+_DESDE_REPORTES_IMPACTO = """
     FROM reporte_de_impacto i
     LEFT JOIN actividad a ON i.Actividad_idActividad = a.idActividad
     LEFT JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada
-    LEFT JOIN usuario u ON i.Usuario_idUsuario = u.idUsuario
+    LEFT JOIN usuario u ON i.Usuario_idUsuario = u.idUsuario"""
+_ORDEN_REPORTES_IMPACTO = [("i.fecha_generacion", "DESC"), ("i.idReporte_impacto", "DESC")]
+
+
+def _mapear_reporte_impacto(r):
+    return ReporteImpacto(
+        id=r[0],
+        contenido=r[1] or "",
+        fecha_generacion=r[2],
+        actividad_titulo=r[3] or "",
+        usuario_nombre=f"{r[4] or ''} {r[5] or ''}".strip() or "Sistema",
+        brigada=r[6] or "",
+        area_evaluada=r[7] or "",
+        indicador=r[8] or "",
+        valor=r[9] or "",
+        unidad=r[10] or "",
+    )
+
+
+def listar_reportes_impacto(tipo_brigada=None, brigada_rol_id=None):
+    """Obtiene los reportes de impacto, filtrados por tipo_brigada o brigada_rol_id."""
+    condiciones, params = _filtros_brigada(tipo_brigada, brigada_rol_id)
+    sql = f"""{_SELECT_REPORTES_IMPACTO}{_DESDE_REPORTES_IMPACTO}
     WHERE 1=1
     """
-    params = []
-    if brigada_rol_id is not None:
-        sql += " AND b.idBrigada = %s"
-        params.append(brigada_rol_id)
-    elif tipo_brigada:
-        sql += " AND b.tipo_brigada = %s"
-        params.append(tipo_brigada)
-        
+    for c in condiciones:
+        sql += f" AND {c}"
     sql += " ORDER BY i.fecha_generacion DESC"
-    rows, _ = ejecutar(sql, tuple(params))
-    reportes = []
-    for r in rows:
-        reportes.append({
-            "id": r[0],
-            "contenido": r[1] or "",
-            "fecha_generacion": r[2],
-            "actividad_titulo": r[3] or "",
-            "usuario_nombre": f"{r[4] or ''} {r[5] or ''}".strip() or "Sistema",
-            "brigada": r[6] or "",
-            "area_evaluada": r[7] or "",
-            "indicador": r[8] or "",
-            "valor": r[9] or "",
-            "unidad": r[10] or "",
-        })
-    return reportes
+    rows, _ = ejecutar_lectura(sql, tuple(params))
+    return [_mapear_reporte_impacto(r) for r in rows]
+
+
+def listar_reportes_impacto_pagina(tipo_brigada=None, brigada_rol_id=None, tam_pagina=None, cursor=None):
+    """Una página de listar_reportes_impacto(). Retorna {"items": [...], "siguiente": cursor o None}."""
+    condiciones, params = _filtros_brigada(tipo_brigada, brigada_rol_id)
+    rows, siguiente = consultar_pagina(
+        _SELECT_REPORTES_IMPACTO, _DESDE_REPORTES_IMPACTO, condiciones, params,
+        _ORDEN_REPORTES_IMPACTO, tam_pagina, cursor,
+    )
+    return {"items": [_mapear_reporte_impacto(r) for r in rows], "siguiente": siguiente}
 
 def crear_reporte_impacto(
     usuario_id: int,
@@ -284,17 +264,18 @@ def crear_reporte_impacto(
     VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
     """
     try:
-        lid = ejecutar(sql, (
-            contenido or None,
-            brigada or None,
-            area_evaluada or None,
-            indicador or None,
-            valor or None,
-            unidad or None,
-            actividad_id,
-            usuario_id,
-        ), commit=True)
-        return lid
+        with kpis.cambio("impacto") as cambio:
+            cambio.id = ejecutar(sql, (
+                contenido or None,
+                brigada or None,
+                area_evaluada or None,
+                indicador or None,
+                valor or None,
+                unidad or None,
+                actividad_id,
+                usuario_id,
+            ), commit=True)
+        return cambio.id
     except Exception as e:
         print(f"Error creando reporte impacto: {e}")
         return None
@@ -2,38 +2,10 @@
 CRUD para la tabla `turno` — Turnos y Horarios de Brigadas.
 Filtrado por tipo_brigada para aislamiento de datos.
 """
-from database.connection import ejecutar, ejecutar_modificar
-
-
-_TABLA_TURNO_VERIFICADA = False
-
-def _asegurar_tabla_turno():
-    """Crea la tabla si no existe."""
-    global _TABLA_TURNO_VERIFICADA
-    if _TABLA_TURNO_VERIFICADA:
-        return
-    sql = """
-    CREATE TABLE IF NOT EXISTS `turno` (
-      `idTurno` INT(11) NOT NULL AUTO_INCREMENT,
-      `Brigada_idBrigada` INT(11) NOT NULL,
-      `fecha` DATE NOT NULL,
-      `hora_inicio` TIME NOT NULL,
-      `hora_fin` TIME NOT NULL,
-      `ubicacion` VARCHAR(200) DEFAULT NULL,
-      `notas` TEXT DEFAULT NULL,
-      `estado` VARCHAR(30) NOT NULL DEFAULT 'Programado',
-      `creado_en` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-      PRIMARY KEY (`idTurno`),
-      KEY `fk_turno_brigada_idx` (`Brigada_idBrigada`),
-      CONSTRAINT `fk_turno_brigada` FOREIGN KEY (`Brigada_idBrigada`)
-        REFERENCES `brigada` (`idBrigada`) ON DELETE CASCADE ON UPDATE NO ACTION
-    ) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_general_ci;
-    """
-    try:
-        ejecutar(sql, commit=True)
-        _TABLA_TURNO_VERIFICADA = True
-    except Exception as e:
-        print(f"[turno] tabla ya existe o error: {e}")
+from database.config import DB_TIMEOUT_ESTADISTICAS_S
+from database.connection import ejecutar, ejecutar_lectura, ejecutar_modificar, ejecutar_lote
+from database.paginacion import consultar_pagina
+from database.registros import Turno
 
 
 # ---------- CRUD ----------
@@ -41,7 +13,6 @@ def _asegurar_tabla_turno():
 def crear_turno(brigada_id: int, fecha: str, hora_inicio: str, hora_fin: str,
                 ubicacion: str = "", notas: str = "") -> int | None:
     """Inserta un turno y devuelve su ID."""
-    _asegurar_tabla_turno()
     sql = """
     INSERT INTO turno (Brigada_idBrigada, fecha, hora_inicio, hora_fin, ubicacion, notas)
     VALUES (%s, %s, %s, %s, %s, %s)
@@ -54,12 +25,19 @@ def crear_turno(brigada_id: int, fecha: str, hora_inicio: str, hora_fin: str,
         return None
 
 
-def listar_turnos(brigada_id: int | None = None, tipo_brigada=None, brigada_rol_id=None):
-    """Lista turnos, opcionalmente filtrados por brigada_id, tipo_brigada o brigada_rol_id."""
-    _asegurar_tabla_turno()
+_SELECT_TURNOS = """
+    SELECT t.idTurno, t.fecha, t.hora_inicio, t.hora_fin, t.ubicacion, t.notas,
+           t.estado, b.nombre_brigada, b.color_identificador,
+           b.profesor_id, t.Brigada_idBrigada"""
+_DESDE_TURNOS = """
+    FROM turno t
+    JOIN brigada b ON t.Brigada_idBrigada = b.idBrigada"""
+_ORDEN_TURNOS = [("t.fecha", "DESC"), ("t.hora_inicio", "ASC"), ("t.idTurno", "ASC")]
+
+
+def _filtros_turnos(brigada_id=None, tipo_brigada=None, brigada_rol_id=None):
     conditions = []
     params = []
-    
     if brigada_rol_id is not None:
         conditions.append("t.Brigada_idBrigada = %s")
         params.append(brigada_rol_id)
@@ -70,42 +48,54 @@ def listar_turnos(brigada_id: int | None = None, tipo_brigada=None, brigada_rol_
     if tipo_brigada and brigada_rol_id is None:
         conditions.append("b.tipo_brigada = %s")
         params.append(tipo_brigada)
+    return conditions, params
+
+
+def _mapear_turno(r):
+    return Turno(
+        id=r[0],
+        fecha=r[1],
+        hora_inicio=r[2],
+        hora_fin=r[3],
+        ubicacion=r[4] or "",
+        notas=r[5] or "",
+        estado=r[6],
+        brigada=r[7],
+        color=r[8] or "#2563eb",
+        profesor_id=r[9],
+        brigada_id=r[10],
+    )
+
+
+def listar_turnos(brigada_id: int | None = None, tipo_brigada=None, brigada_rol_id=None):
+    """Lista turnos, opcionalmente filtrados por brigada_id, tipo_brigada o brigada_rol_id."""
+    conditions, params = _filtros_turnos(brigada_id, tipo_brigada, brigada_rol_id)
     where = ""
     if conditions:
         where = "WHERE " + " AND ".join(conditions)
 
-    sql = f"""
-    SELECT t.idTurno, t.fecha, t.hora_inicio, t.hora_fin, t.ubicacion, t.notas,
-           t.estado, b.nombre_brigada, b.color_identificador,
-           b.profesor_id, t.Brigada_idBrigada
-    FROM turno t
-    JOIN brigada b ON t.Brigada_idBrigada = b.idBrigada
+    sql = f"""{_SELECT_TURNOS}{_DESDE_TURNOS}
     {where}
     ORDER BY t.fecha DESC, t.hora_inicio ASC
     """
-    rows, _ = ejecutar(sql, tuple(params) if params else None)
-
-    turnos = []
-    for r in rows:
-        turnos.append({
-            "id": r[0],
-            "fecha": r[1],
-            "hora_inicio": r[2],
-            "hora_fin": r[3],
-            "ubicacion": r[4] or "",
-            "notas": r[5] or "",
-            "estado": r[6],
-            "brigada": r[7],
-            "color": r[8] or "#2563eb",
-            "profesor_id": r[9],
-            "brigada_id": r[10],
-        })
-    return turnos
+    rows, _ = ejecutar_lectura(sql, tuple(params) if params else None)
+    return [_mapear_turno(r) for r in rows]
+
+
+def listar_turnos_pagina(brigada_id: int | None = None, tipo_brigada=None, brigada_rol_id=None, tam_pagina=None, cursor=None):
+    """
+    Una página de listar_turnos() (fecha descendente, hora ascendente, desempate por id).
+    Retorna {"items": [...], "siguiente": cursor o None}.
+    """
+    conditions, params = _filtros_turnos(brigada_id, tipo_brigada, brigada_rol_id)
+    rows, siguiente = consultar_pagina(
+        _SELECT_TURNOS, _DESDE_TURNOS, conditions, params, _ORDEN_TURNOS, tam_pagina, cursor,
+    )
+    return {"items": [_mapear_turno(r) for r in rows], "siguiente": siguiente}
 
 
 def get_turno_stats(tipo_brigada=None, brigada_rol_id=None):
     """Devuelve un dict con KPIs para la pantalla de turnos."""
-    _asegurar_tabla_turno()
     stats = {
         "total_turnos": 0,
         "brigadistas_asignados": 0,
@@ -121,22 +111,22 @@ def get_turno_stats(tipo_brigada=None, brigada_rol_id=None):
         where_b = "WHERE b.tipo_brigada = %s"
         params = [tipo_brigada]
         
+    p = tuple(params)
     try:
-        rows, _ = ejecutar(f"SELECT COUNT(*) FROM turno t JOIN brigada b ON t.Brigada_idBrigada = b.idBrigada {where_b}", tuple(params) if params else None)
-        stats["total_turnos"] = rows[0][0] if rows else 0
-        
-        rows, _ = ejecutar(f"""
+        (total, _), (asignados, _), (dias, _) = ejecutar_lote([
+            (f"SELECT COUNT(*) FROM turno t JOIN brigada b ON t.Brigada_idBrigada = b.idBrigada {where_b}", p),
+            (f"""
             SELECT COUNT(DISTINCT u.idUsuario)
             FROM usuario u
             JOIN turno t ON u.Brigada_idBrigada = t.Brigada_idBrigada
             JOIN brigada b ON t.Brigada_idBrigada = b.idBrigada
             {where_b}
-        """, tuple(params) if params else None)
-        stats["brigadistas_asignados"] = rows[0][0] if rows else 0
-        
-        rows, _ = ejecutar(f"SELECT COUNT(DISTINCT t.fecha) FROM turno t JOIN brigada b ON t.Brigada_idBrigada = b.idBrigada {where_b}", tuple(params) if params else None)
-        stats["dias_con_turnos"] = rows[0][0] if rows else 0
-        
+            """, p),
+            (f"SELECT COUNT(DISTINCT t.fecha) FROM turno t JOIN brigada b ON t.Brigada_idBrigada = b.idBrigada {where_b}", p),
+        ], timeout_s=DB_TIMEOUT_ESTADISTICAS_S or None)
+        stats["total_turnos"] = total[0][0] if total else 0
+        stats["brigadistas_asignados"] = asignados[0][0] if asignados else 0
+        stats["dias_con_turnos"] = dias[0][0] if dias else 0
     except Exception as e:
         print(f"Error stats turno: {e}")
     return stats
@@ -4,8 +4,11 @@ CRUD de Usuario e Institucion para login y registro.
 import secrets
 import hashlib
 from datetime import datetime, timedelta
-from database.connection import get_connection
+from database.connection import get_connection, ejecutar, ejecutar_lectura, transaccion
 from database.auth import hash_password, verificar_password
+from database import cache, esquema, kpis
+from database.paginacion import consultar_pagina
+from database.registros import Usuario
 
 
 def buscar_usuario_por_email(email: str):
@@ -36,45 +39,32 @@ def verificar_login(email: str, password: str):
     return usuario
 
 
-def _asegurar_columna_cdce(cursor):
-    """Verifica y añade la columna cdce si no existe."""
-    try:
-        cursor.execute("SELECT cdce FROM institucion_educativa LIMIT 1")
-        cursor.fetchall()
-    except Exception:
-        cursor.execute("ALTER TABLE institucion_educativa ADD COLUMN cdce VARCHAR(100)")
-
-
 def crear_institucion(nombre: str, direccion: str, telefono: str, cdce: str = None) -> int:
     """Inserta una institución y retorna idInstitucion."""
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        _asegurar_columna_cdce(cursor)
         cursor.execute(
             "INSERT INTO institucion_educativa (nombre_institucion, direccion, telefono, cdce) VALUES (%s, %s, %s, %s)",
             (nombre, direccion, telefono, cdce),
         )
         conn.commit()
+        cache.invalidar("institucion_educativa")
         return cursor.lastrowid
     finally:
         conn.close()
 
 
+@cache.cacheado("institucion_educativa")
 def listar_instituciones():
     """Lista todas las instituciones. Retorna lista de dict: idInstitucion, nombre_institucion, direccion, telefono, logo_ruta, cdce."""
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        _asegurar_columna_cdce(cursor)
-        try:
-            cursor.execute(
-                "SELECT idInstitucion, nombre_institucion, direccion, telefono, logo_ruta, cdce FROM institucion_educativa ORDER BY nombre_institucion"
-            )
-        except Exception:
-            cursor.execute(
-                "SELECT idInstitucion, nombre_institucion, direccion, telefono, cdce FROM institucion_educativa ORDER BY nombre_institucion"
-            )
+        logo = ", logo_ruta" if esquema.tiene("institucion_educativa", "logo_ruta") else ""
+        cursor.execute(
+            f"SELECT idInstitucion, nombre_institucion, direccion, telefono{logo}, cdce FROM institucion_educativa ORDER BY nombre_institucion"
+        )
         rows = cursor.fetchall()
         for r in rows:
             r.setdefault("logo_ruta", None)
@@ -89,17 +79,11 @@ def obtener_institucion_por_id(id_institucion: int):
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        _asegurar_columna_cdce(cursor)
-        try:
-            cursor.execute(
-                "SELECT idInstitucion, nombre_institucion, direccion, telefono, logo_ruta, cdce FROM institucion_educativa WHERE idInstitucion = %s",
-                (id_institucion,),
-            )
-        except Exception:
-            cursor.execute(
-                "SELECT idInstitucion, nombre_institucion, direccion, telefono, cdce FROM institucion_educativa WHERE idInstitucion = %s",
-                (id_institucion,),
-            )
+        logo = ", logo_ruta" if esquema.tiene("institucion_educativa", "logo_ruta") else ""
+        cursor.execute(
+            f"SELECT idInstitucion, nombre_institucion, direccion, telefono{logo}, cdce FROM institucion_educativa WHERE idInstitucion = %s",
+            (id_institucion,),
+        )
         row = cursor.fetchone()
         if row:
             row.setdefault("logo_ruta", None)
@@ -114,11 +98,12 @@ def obtener_institucion_por_usuario(id_usuario: int):
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        # Primero intentar por columna Institucion_Educativa_idInstitucion en Usuario (migración)
-        try:
+        logo = "i.logo_ruta" if esquema.tiene("institucion_educativa", "logo_ruta") else "NULL AS logo_ruta"
+        if esquema.tiene("usuario", "Institucion_Educativa_idInstitucion"):
+            # Por columna Institucion_Educativa_idInstitucion en Usuario (migración) o por su brigada
             cursor.execute(
-                """
-                SELECT i.idInstitucion, i.nombre_institucion, i.logo_ruta
+                f"""
+                SELECT i.idInstitucion, i.nombre_institucion, {logo}
                 FROM usuario u
                 LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
                 INNER JOIN institucion_educativa i ON i.idInstitucion = COALESCE(u.Institucion_Educativa_idInstitucion, b.Institucion_Educativa_idInstitucion)
@@ -126,17 +111,11 @@ def obtener_institucion_por_usuario(id_usuario: int):
                 """,
                 (id_usuario,),
             )
-            row = cursor.fetchone()
-            if row:
-                row.setdefault("logo_ruta", None)
-                return row
-        except Exception:
-            pass
-        # Fallback: solo por brigada
-        try:
+        else:
+            # Sin la migración: solo por brigada
             cursor.execute(
-                """
-                SELECT i.idInstitucion, i.nombre_institucion, i.logo_ruta
+                f"""
+                SELECT i.idInstitucion, i.nombre_institucion, {logo}
                 FROM usuario u
                 INNER JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
                 INNER JOIN institucion_educativa i ON i.idInstitucion = b.Institucion_Educativa_idInstitucion
@@ -144,12 +123,10 @@ def obtener_institucion_por_usuario(id_usuario: int):
                 """,
                 (id_usuario,),
             )
-            row = cursor.fetchone()
-            if row:
-                row.setdefault("logo_ruta", None)
-            return row
-        except Exception:
-            return None
+        row = cursor.fetchone()
+        if row:
+            row.setdefault("logo_ruta", None)
+        return row
     finally:
         conn.close()
 
@@ -161,6 +138,7 @@ def actualizar_logo_institucion(id_institucion: int, logo_ruta: str):
         cursor = conn.cursor()
         cursor.execute("UPDATE institucion_educativa SET logo_ruta = %s WHERE idInstitucion = %s", (logo_ruta, id_institucion))
         conn.commit()
+        cache.invalidar("institucion_educativa")
     finally:
         conn.close()
 
@@ -187,71 +165,60 @@ def crear_brigada(nombre_brigada: str, area_accion: str, institucion_id: int, pr
     Inserta una brigada y retorna idBrigada.
     profesor_id: ID del profesor que la creó/administra (opcional, para admins que crean para un profesor).
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO brigada (nombre_brigada, area_accion, Institucion_Educativa_idInstitucion, profesor_id)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (nombre_brigada, area_accion, institucion_id, profesor_id),
-        )
-        conn.commit()
-        return cursor.lastrowid
-    finally:
-        conn.close()
+    with kpis.cambio("brigada") as cambio:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO brigada (nombre_brigada, area_accion, Institucion_Educativa_idInstitucion, profesor_id)
+                VALUES (%s, %s, %s, %s)
+                """,
+                (nombre_brigada, area_accion, institucion_id, profesor_id),
+            )
+            conn.commit()
+            cache.invalidar("brigada")
+            cambio.id = cursor.lastrowid
+        finally:
+            conn.close()
+    return cambio.id
 
 
 def crear_usuario(nombre: str, apellido: str, email: str, contrasena_plana: str, rol: str, brigada_id: int = None, usuario: str = None, institucion_id: int = None, cedula: str = None) -> int:
     """Inserta un usuario (contraseña se hashea). usuario = nombre de usuario para login. cedula opcional (para todos los roles). Retorna idUsuario."""
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        usuario_val = (usuario or "").strip() or None
-        if usuario_val:
-            usuario_val = usuario_val.lower()
-        cedula_val = (cedula or "").strip() or None
+    with kpis.cambio("usuario") as cambio:
+        conn = get_connection()
         try:
+            cursor = conn.cursor()
+            usuario_val = (usuario or "").strip() or None
+            if usuario_val:
+                usuario_val = usuario_val.lower()
+            cedula_val = (cedula or "").strip() or None
+            columnas = ["nombre", "apellido"]
+            valores = [nombre, apellido]
+            if esquema.tiene("usuario", "cedula"):
+                columnas.append("cedula")
+                valores.append(cedula_val)
+            columnas.append("email")
+            valores.append(email.strip().lower())
+            if esquema.tiene("usuario", "usuario"):
+                columnas.append("usuario")
+                valores.append(usuario_val)
+            columnas += ["contrasena", "rol", "Brigada_idBrigada"]
+            valores += [hash_password(contrasena_plana), rol, brigada_id]
+            if esquema.tiene("usuario", "Institucion_Educativa_idInstitucion"):
+                columnas.append("Institucion_Educativa_idInstitucion")
+                valores.append(institucion_id)
             cursor.execute(
-                """
-                INSERT INTO usuario (nombre, apellido, cedula, email, usuario, contrasena, rol, Brigada_idBrigada, Institucion_Educativa_idInstitucion)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (nombre, apellido, cedula_val, email.strip().lower(), usuario_val, hash_password(contrasena_plana), rol, brigada_id, institucion_id),
+                f"INSERT INTO usuario ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})",
+                tuple(valores),
             )
-        except Exception as e:
-            err = str(e).lower()
-            if "cedula" in err and "unknown column" in err:
-                cursor.execute(
-                    """
-                    INSERT INTO usuario (nombre, apellido, email, usuario, contrasena, rol, Brigada_idBrigada, Institucion_Educativa_idInstitucion)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (nombre, apellido, email.strip().lower(), usuario_val, hash_password(contrasena_plana), rol, brigada_id, institucion_id),
-                )
-            elif "usuario" in err and "unknown column" in err:
-                cursor.execute(
-                    """
-                    INSERT INTO usuario (nombre, apellido, cedula, email, contrasena, rol, Brigada_idBrigada)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (nombre, apellido, cedula_val, email.strip().lower(), hash_password(contrasena_plana), rol, brigada_id),
-                )
-            elif "institucion_educativa_idinstitucion" in err or "unknown column" in err:
-                cursor.execute(
-                    """
-                    INSERT INTO usuario (nombre, apellido, cedula, email, usuario, contrasena, rol, Brigada_idBrigada)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (nombre, apellido, cedula_val, email.strip().lower(), usuario_val, hash_password(contrasena_plana), rol, brigada_id),
-                )
-            else:
-                raise
-        conn.commit()
-        return cursor.lastrowid
-    finally:
-        conn.close()
+            conn.commit()
+            cache.invalidar("usuario")
+            cambio.id = cursor.lastrowid
+        finally:
+            conn.close()
+    return cambio.id
 
 
 def email_ya_existe(email: str) -> bool:
@@ -268,17 +235,14 @@ def obtener_id_usuario_por_cedula(cedula: str) -> int | None:
     """Retorna idUsuario del usuario con esa cédula, o None."""
     if not cedula or not (cedula or "").strip():
         return None
+    if not esquema.tiene("usuario", "cedula"):
+        return None
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT idUsuario FROM usuario WHERE cedula = %s LIMIT 1", (cedula.strip(),))
-            row = cursor.fetchone()
-            return row[0] if row else None
-        except Exception as e:
-            if "cedula" in str(e).lower() and "unknown column" in str(e).lower():
-                return None
-            raise
+        cursor.execute("SELECT idUsuario FROM usuario WHERE cedula = %s LIMIT 1", (cedula.strip(),))
+        row = cursor.fetchone()
+        return row[0] if row else None
     finally:
         conn.close()
 
@@ -287,16 +251,13 @@ def usuario_ya_existe(usuario: str) -> bool:
     """True si ya existe un usuario con ese nombre de usuario."""
     if not usuario or not (usuario or "").strip():
         return False
+    if not esquema.tiene("usuario", "usuario"):
+        return False
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT 1 FROM usuario WHERE usuario = %s", (usuario.strip().lower(),))
-            return cursor.fetchone() is not None
-        except Exception as e:
-            if "usuario" in str(e).lower() and "unknown column" in str(e).lower():
-                return False
-            raise
+        cursor.execute("SELECT 1 FROM usuario WHERE usuario = %s", (usuario.strip().lower(),))
+        return cursor.fetchone() is not None
     finally:
         conn.close()
 
@@ -309,136 +270,119 @@ def verificar_login_por_usuario_e_institucion(institucion_id: int, usuario: str,
     Coincide por Usuario.institucion_id O por Brigada de la institución (tras migración).
     Retorna el usuario (dict) o None.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor(dictionary=True)
-        usuario_str = (usuario or "").strip().lower()
-        # Intentar con columna Institucion_Educativa_idInstitucion en Usuario (LEFT JOIN brigada)
-        try:
-            cursor.execute(
-                """
-                SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.usuario, u.contrasena, u.rol, u.Brigada_idBrigada, u.Institucion_Educativa_idInstitucion
-                FROM usuario u
-                LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
-                WHERE (u.Institucion_Educativa_idInstitucion = %s OR b.Institucion_Educativa_idInstitucion = %s)
-                  AND (u.usuario = %s OR u.email = %s)
-                LIMIT 1
-                """,
-                (institucion_id, institucion_id, usuario_str, usuario_str),
-            )
-            row = cursor.fetchone()
-        except Exception as e:
-            if "Institucion_Educativa_idInstitucion" in str(e) or "Unknown column" in str(e):
-                cursor.execute(
-                    """
-                    SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.usuario, u.contrasena, u.rol, u.Brigada_idBrigada
-                    FROM usuario u
-                    INNER JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
-                    WHERE b.Institucion_Educativa_idInstitucion = %s
-                      AND (u.usuario = %s OR u.email = %s)
-                    LIMIT 1
-                    """,
-                    (institucion_id, usuario_str, usuario_str),
-                )
-                row = cursor.fetchone()
-            else:
-                raise
-        if not row or not row.get("contrasena"):
-            return None
-        if not verificar_password(password, row["contrasena"]):
-            return None
-        if es_profesor is True and row.get("rol") != "Profesor":
-            return None
-        if es_profesor is False and row.get("rol") not in ("Directivo", "Coordinador"):
-            return None
-        row.setdefault("usuario", None)
-        return row
-    finally:
-        conn.close()
+    usuario_str = (usuario or "").strip().lower()
+    # Va por ejecutar() para reutilizar la sentencia preparada (SBE_DB_PREPARADAS).
+    if esquema.tiene("usuario", "Institucion_Educativa_idInstitucion"):
+        # Coincide por Usuario.institucion_id o por la brigada de la institución
+        rows, description = ejecutar(
+            """
+            SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.usuario, u.contrasena, u.rol, u.Brigada_idBrigada, u.Institucion_Educativa_idInstitucion
+            FROM usuario u
+            LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
+            WHERE (u.Institucion_Educativa_idInstitucion = %s OR b.Institucion_Educativa_idInstitucion = %s)
+              AND (u.usuario = %s OR u.email = %s)
+            LIMIT 1
+            """,
+            (institucion_id, institucion_id, usuario_str, usuario_str),
+        )
+    else:
+        rows, description = ejecutar(
+            """
+            SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.usuario, u.contrasena, u.rol, u.Brigada_idBrigada
+            FROM usuario u
+            INNER JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
+            WHERE b.Institucion_Educativa_idInstitucion = %s
+              AND (u.usuario = %s OR u.email = %s)
+            LIMIT 1
+            """,
+            (institucion_id, usuario_str, usuario_str),
+        )
+    row = dict(zip([col[0] for col in description], rows[0])) if rows else None
+    if not row or not row.get("contrasena"):
+        return None
+    if not verificar_password(password, row["contrasena"]):
+        return None
+    if es_profesor is True and row.get("rol") != "Profesor":
+        return None
+    if es_profesor is False and row.get("rol") not in ("Directivo", "Coordinador"):
+        return None
+    row.setdefault("usuario", None)
+    return row
 
 
 def listar_brigadistas():
     """
     Lista todos los usuarios (brigadistas) con el nombre de su brigada.
-    Retorna lista de dict: idUsuario, nombre, apellido, email, rol, Brigada_idBrigada, nombre_brigada.
+    Retorna lista de Usuario: idUsuario, nombre, apellido, email, rol, Brigada_idBrigada, nombre_brigada.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute(
-                """
-                SELECT u.idUsuario, u.nombre, u.apellido, u.cedula, u.email, u.rol, u.Brigada_idBrigada,
-                       b.nombre_brigada
-                FROM usuario u
-                LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
-                ORDER BY u.nombre, u.apellido
-                """
-            )
-        except Exception:
-            cursor.execute(
-                """
-                SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.rol, u.Brigada_idBrigada,
-                       b.nombre_brigada
-                FROM usuario u
-                LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
-                ORDER BY u.nombre, u.apellido
-                """
-            )
-        rows = cursor.fetchall()
-        for r in rows:
-            r.setdefault("cedula", None)
-        return rows
-    finally:
-        conn.close()
+    cedula = " u.cedula," if esquema.tiene("usuario", "cedula") else ""
+    rows, description = ejecutar_lectura(
+        f"""
+        SELECT u.idUsuario, u.nombre, u.apellido,{cedula} u.email, u.rol, u.Brigada_idBrigada,
+               b.nombre_brigada
+        FROM usuario u
+        LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
+        ORDER BY u.nombre, u.apellido
+        """
+    )
+    rows = Usuario.desde_filas([col[0] for col in description], rows)
+    for r in rows:
+        r.setdefault("cedula", None)
+    return rows
+
+
+def listar_brigadistas_pagina(tam_pagina=None, cursor=None):
+    """
+    Una página de listar_brigadistas() (por nombre y apellido, desempate por id).
+    Retorna {"items": [...], "siguiente": cursor o None}.
+    """
+    columnas = ["idUsuario", "nombre", "apellido", "email", "rol", "Brigada_idBrigada", "nombre_brigada"]
+    if esquema.tiene("usuario", "cedula"):
+        columnas.insert(3, "cedula")
+    select = "SELECT " + ", ".join(("b." if c == "nombre_brigada" else "u.") + c for c in columnas)
+    rows, siguiente = consultar_pagina(
+        select,
+        "FROM usuario u LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada",
+        [], [],
+        [("u.nombre", "ASC"), ("u.apellido", "ASC"), ("u.idUsuario", "ASC")],
+        tam_pagina, cursor,
+    )
+    items = Usuario.desde_filas(columnas, rows)
+    for r in items:
+        r.setdefault("cedula", None)
+    return {"items": items, "siguiente": siguiente}
 
 
 def listar_brigadistas_visibles_only():
     """
     Lista solo brigadistas visibles: Profesor y alumnos (Brigadista Jefe, Subjefe, Brigadista).
-    Excluye Directivo y Coordinador. Retorna lista de dict con nombre_brigada.
+    Excluye Directivo y Coordinador. Retorna lista de Usuario con nombre_brigada.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute(
-                """
-                SELECT u.idUsuario, u.nombre, u.apellido, u.cedula, u.email, u.rol, u.Brigada_idBrigada,
-                       b.nombre_brigada
-                FROM usuario u
-                LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
-                WHERE u.rol IN ('Profesor', 'Brigadista Jefe', 'Subjefe', 'Brigadista')
-                ORDER BY u.rol = 'Profesor' DESC, u.nombre, u.apellido
-                """
-            )
-        except Exception:
-            cursor.execute(
-                """
-                SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.rol, u.Brigada_idBrigada,
-                       b.nombre_brigada
-                FROM usuario u
-                LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
-                WHERE u.rol IN ('Profesor', 'Brigadista Jefe', 'Subjefe', 'Brigadista')
-                ORDER BY u.rol = 'Profesor' DESC, u.nombre, u.apellido
-                """
-            )
-        rows = cursor.fetchall()
-        for r in rows:
-            r.setdefault("cedula", None)
-        return rows
-    finally:
-        conn.close()
+    cedula = " u.cedula," if esquema.tiene("usuario", "cedula") else ""
+    rows, description = ejecutar_lectura(
+        f"""
+        SELECT u.idUsuario, u.nombre, u.apellido,{cedula} u.email, u.rol, u.Brigada_idBrigada,
+               b.nombre_brigada
+        FROM usuario u
+        LEFT JOIN brigada b ON b.idBrigada = u.Brigada_idBrigada
+        WHERE u.rol IN ('Profesor', 'Brigadista Jefe', 'Subjefe', 'Brigadista')
+        ORDER BY u.rol = 'Profesor' DESC, u.nombre, u.apellido
+        """
+    )
+    rows = Usuario.desde_filas([col[0] for col in description], rows)
+    for r in rows:
+        r.setdefault("cedula", None)
+    return rows
 
 
 def listar_alumnos_del_profesor(profesor_id: int):
     """
     Lista usuarios que son alumnos (Brigadista, Subjefe, Brigadista Jefe) en brigadas creadas por este profesor.
-    Para usar en selector de sublíder. Retorna lista de dict: idUsuario, nombre, apellido, email, rol.
+    Para usar en selector de sublíder. Retorna lista de Usuario: idUsuario, nombre, apellido, email, rol.
     """
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         cursor.execute(
             """
             SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.rol
@@ -449,7 +393,7 @@ def listar_alumnos_del_profesor(profesor_id: int):
             """,
             (profesor_id,),
         )
-        return cursor.fetchall()
+        return Usuario.desde_cursor(cursor)
     finally:
         conn.close()
 
@@ -459,16 +403,11 @@ def obtener_usuario(id_usuario: int):
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute(
-                "SELECT idUsuario, nombre, apellido, cedula, email, rol, Brigada_idBrigada FROM usuario WHERE idUsuario = %s",
-                (id_usuario,),
-            )
-        except Exception:
-            cursor.execute(
-                "SELECT idUsuario, nombre, apellido, email, rol, Brigada_idBrigada FROM usuario WHERE idUsuario = %s",
-                (id_usuario,),
-            )
+        cedula = " cedula," if esquema.tiene("usuario", "cedula") else ""
+        cursor.execute(
+            f"SELECT idUsuario, nombre, apellido,{cedula} email, rol, Brigada_idBrigada FROM usuario WHERE idUsuario = %s",
+            (id_usuario,),
+        )
         row = cursor.fetchone()
         if row:
             row.setdefault("cedula", None)
@@ -479,20 +418,20 @@ def obtener_usuario(id_usuario: int):
 
 def actualizar_usuario(id_usuario: int, nombre: str, apellido: str, email: str, rol: str, brigada_id: int, cedula: str = None):
     """Actualiza nombre, apellido, email, rol, brigada y opcionalmente cedula. No modifica contraseña."""
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cedula_val = (cedula or "").strip() or None
+    with kpis.cambio("usuario", id_usuario):
+        conn = get_connection()
         try:
-            cursor.execute(
-                """
-                UPDATE usuario SET nombre = %s, apellido = %s, email = %s, rol = %s, Brigada_idBrigada = %s, cedula = %s
-                WHERE idUsuario = %s
-                """,
-                (nombre, apellido, email.strip().lower(), rol, brigada_id, cedula_val, id_usuario),
-            )
-        except Exception as e:
-            if "cedula" in str(e).lower() and "unknown column" in str(e).lower():
+            cursor = conn.cursor()
+            cedula_val = (cedula or "").strip() or None
+            if esquema.tiene("usuario", "cedula"):
+                cursor.execute(
+                    """
+                    UPDATE usuario SET nombre = %s, apellido = %s, email = %s, rol = %s, Brigada_idBrigada = %s, cedula = %s
+                    WHERE idUsuario = %s
+                    """,
+                    (nombre, apellido, email.strip().lower(), rol, brigada_id, cedula_val, id_usuario),
+                )
+            else:
                 cursor.execute(
                     """
                     UPDATE usuario SET nombre = %s, apellido = %s, email = %s, rol = %s, Brigada_idBrigada = %s
@@ -500,27 +439,29 @@ def actualizar_usuario(id_usuario: int, nombre: str, apellido: str, email: str,
                     """,
                     (nombre, apellido, email.strip().lower(), rol, brigada_id, id_usuario),
                 )
-            else:
-                raise
-        conn.commit()
-    finally:
-        conn.close()
+            conn.commit()
+            cache.invalidar("usuario")
+        finally:
+            conn.close()
 
 
 def eliminar_usuario(id_usuario: int) -> str | None:
     """
     Elimina un usuario. Retorna None si OK, o mensaje de error si falla (p. ej. reportes asociados).
     """
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM usuario WHERE idUsuario = %s", (id_usuario,))
-        conn.commit()
+        with kpis.cambio("usuario", id_usuario):
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM usuario WHERE idUsuario = %s", (id_usuario,))
+                conn.commit()
+                cache.invalidar("usuario")
+            finally:
+                conn.close()
         return None
     except Exception as e:
         return str(e)
-    finally:
-        conn.close()
 
 
 def resetear_contrasena(email: str, nueva_contrasena_plana: str) -> bool:
@@ -533,6 +474,7 @@ def resetear_contrasena(email: str, nueva_contrasena_plana: str) -> bool:
             (hash_password(nueva_contrasena_plana), email.strip().lower()),
         )
         conn.commit()
+        cache.invalidar("usuario")
         return cursor.rowcount > 0
     finally:
         conn.close()
@@ -544,6 +486,7 @@ def invalidar_tokens_usuario(usuario_id: int):
         cursor = conn.cursor()
         cursor.execute("UPDATE password_resets SET used_at = NOW() WHERE usuario_id = %s AND used_at IS NULL", (usuario_id,))
         conn.commit()
+        cache.invalidar("password_resets")
     finally:
         conn.close()
 
@@ -553,38 +496,42 @@ def crear_token_recuperacion(email: str):
     Invalida previos, genera un token, lo guarda hasheado y retorna el token crudo.
     Si el usuario solicita > 3 en la última hora, lanza excepción por rate limit.
     Retorna el (token_crudo, usuario_id) o None si el usuario no existe.
+    Búsqueda, límite, invalidación e inserción van en una sola transacción.
     """
-    usuario = buscar_usuario_por_email(email)
-    if not usuario:
-        return None
-
-    usuario_id = usuario["idUsuario"]
+    with transaccion():
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            # Bloquea la fila del usuario: dos solicitudes simultáneas no pasan juntas el límite
+            cursor.execute("SELECT idUsuario FROM usuario WHERE email = %s FOR UPDATE", (email.strip().lower(),))
+            usuario = cursor.fetchone()
+            if not usuario:
+                return None
+            usuario_id = usuario["idUsuario"]
 
-    conn = get_connection()
-    try:
-        cursor = conn.cursor(dictionary=True)
-        # Limite anti-spam (3 por hora)
-        cursor.execute("SELECT COUNT(*) as count FROM password_resets WHERE usuario_id = %s AND created_at >= NOW() - INTERVAL 1 HOUR", (usuario_id,))
-        row = cursor.fetchone()
-        if row and row['count'] >= 3:
-            raise Exception("Demasiadas solicitudes. Intente de nuevo en una hora.")
+            # Limite anti-spam (3 por hora)
+            cursor.execute("SELECT COUNT(*) as count FROM password_resets WHERE usuario_id = %s AND created_at >= NOW() - INTERVAL 1 HOUR", (usuario_id,))
+            row = cursor.fetchone()
+            if row and row['count'] >= 3:
+                raise Exception("Demasiadas solicitudes. Intente de nuevo en una hora.")
 
-        # Invalida antiguos
-        cursor.execute("UPDATE password_resets SET used_at = NOW() WHERE usuario_id = %s AND used_at IS NULL", (usuario_id,))
-        
-        # Genera el nuevo
-        token_crudo = secrets.token_urlsafe(32)
-        token_hash = hashlib.sha256(token_crudo.encode()).hexdigest()
-        expires_at = datetime.now() + timedelta(minutes=15)
-        
-        cursor.execute(
-            "INSERT INTO password_resets (usuario_id, token_hash, expires_at) VALUES (%s, %s, %s)",
-            (usuario_id, token_hash, expires_at)
-        )
-        conn.commit()
-        return token_crudo, usuario_id
-    finally:
-        conn.close()
+            # Invalida antiguos
+            cursor.execute("UPDATE password_resets SET used_at = NOW() WHERE usuario_id = %s AND used_at IS NULL", (usuario_id,))
+            
+            # Genera el nuevo
+            token_crudo = secrets.token_urlsafe(32)
+            token_hash = hashlib.sha256(token_crudo.encode()).hexdigest()
+            expires_at = datetime.now() + timedelta(minutes=15)
+            
+            cursor.execute(
+                "INSERT INTO password_resets (usuario_id, token_hash, expires_at) VALUES (%s, %s, %s)",
+                (usuario_id, token_hash, expires_at)
+            )
+            conn.commit()
+            cache.invalidar("password_resets")
+            return token_crudo, usuario_id
+        finally:
+            conn.close()
 
 
 def procesar_reseteo_con_token(token_crudo: str, nueva_contrasena_plana: str):
@@ -614,6 +561,7 @@ def procesar_reseteo_con_token(token_crudo: str, nueva_contrasena_plana: str):
         cursor.execute("UPDATE usuario SET contrasena = %s WHERE idUsuario = %s", (hash_password(nueva_contrasena_plana), usuario_id))
         cursor.execute("UPDATE password_resets SET used_at = NOW() WHERE id = %s", (record['id'],))
         conn.commit()
+        cache.invalidar("usuario", "password_resets")
         
         return True
     finally:
@@ -725,6 +673,7 @@ def asignar_subjefe_brigada(brigada_id: int, subjefe_id: int):
             (subjefe_id, brigada_id),
         )
         conn.commit()
+        cache.invalidar("brigada")
     finally:
         conn.close()
 
@@ -751,11 +700,11 @@ def obtener_brigada(brigada_id: int):
 def listar_brigadistas_brigada(brigada_id: int):
     """
     Lista todos los brigadistas de una brigada específica.
-    Retorna lista de dict: idUsuario, nombre, apellido, email, rol.
+    Retorna lista de Usuario: idUsuario, nombre, apellido, email, rol.
     """
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         cursor.execute(
             """
             SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.rol
@@ -772,7 +721,7 @@ def listar_brigadistas_brigada(brigada_id: int):
             """,
             (brigada_id,),
         )
-        return cursor.fetchall()
+        return Usuario.desde_cursor(cursor)
     finally:
         conn.close()
 
@@ -780,11 +729,11 @@ def listar_brigadistas_brigada(brigada_id: int):
 def listar_brigadistas_visibles(brigada_id: int):
     """
     Lista brigadistas visibles en el listado (Jefes y Brigadistas, NO subjefes).
-    Retorna lista de dict: idUsuario, nombre, apellido, email, rol.
+    Retorna lista de Usuario: idUsuario, nombre, apellido, email, rol.
     """
     conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         cursor.execute(
             """
             SELECT u.idUsuario, u.nombre, u.apellido, u.email, u.rol
@@ -800,6 +749,6 @@ def listar_brigadistas_visibles(brigada_id: int):
             """,
             (brigada_id,),
         )
-        return cursor.fetchall()
+        return Usuario.desde_cursor(cursor)
     finally:
         conn.close()
@@ -0,0 +1,91 @@
+"""
+Mapa de capacidades del esquema para el SBE.
+
+Las instalaciones del SBE no tienen todas las migraciones aplicadas (cedula,
+usuario, logo_ruta, subjefe_id...). En vez de probar cada consulta y reintentar
+con otra más corta al recibir "Unknown column", las funciones CRUD preguntan
+aquí qué columnas existen y arman la consulta correcta desde el principio.
+
+information_schema se lee una sola vez por proceso, al arrancar: el hilo de
+migrador.aplicar_al_iniciar() llama a cargar() con la misma conexión que usó
+para las migraciones, así ninguna función CRUD tiene que pedir una segunda
+conexión al pool (ni leerlo dentro de una transacción) en su primera consulta.
+Si una consulta llega antes que ese hilo, o la carga falló o no se hizo
+(scripts, SBE_DB_MIGRAR_AL_INICIAR=0), se lee en esa consulta; si también falla, se asume el esquema
+completo y se reintenta en la siguiente. Tras migrar, aplicar() llama a
+recargar() y el mapa se vuelve a leer.
+"""
+import threading
+
+from database.connection import ejecutar
+
+_columnas = None            # {tabla: set(columnas)}, todo en minúsculas
+_lock = threading.Lock()
+
+
+_SQL = "SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE()"
+
+
+def _leer(conn=None):
+    """{tabla: set(columnas)} desde information_schema (con 'conn' si se indica), o None si falla."""
+    try:
+        if conn is None:
+            rows, _ = ejecutar(_SQL)
+        else:
+            cursor = conn.cursor()
+            cursor.execute(_SQL)
+            rows = cursor.fetchall()
+            cursor.close()
+    except Exception as e:
+        print(f"[esquema] no se pudo leer information_schema: {e}")
+        return None
+    mapa = {}
+    for tabla, columna in rows:
+        mapa.setdefault(str(tabla).lower(), set()).add(str(columna).lower())
+    return mapa
+
+
+def cargar(conn=None) -> bool:
+    """
+    Lee el mapa ahora (al arrancar), con la conexión 'conn' ya prestada si se
+    pasa. Retorna True si quedó cargado.
+    """
+    global _columnas
+    mapa = _leer(conn)
+    if mapa is None:
+        return False
+    with _lock:
+        _columnas = mapa
+    return True
+
+
+def _cargar():
+    global _columnas
+    if _columnas is not None:
+        return _columnas
+    with _lock:
+        if _columnas is None:
+            _columnas = _leer()
+    return _columnas
+
+
+def tiene_tabla(tabla: str) -> bool:
+    """True si la tabla existe (o si el esquema no se pudo leer)."""
+    mapa = _cargar()
+    return mapa is None or tabla.lower() in mapa
+
+
+def tiene(tabla: str, *columnas: str) -> bool:
+    """True si la tabla tiene todas las columnas indicadas (o si el esquema no se pudo leer)."""
+    mapa = _cargar()
+    if mapa is None:
+        return True
+    existentes = mapa.get(tabla.lower(), set())
+    return all(c.lower() in existentes for c in columnas)
+
+
+def recargar():
+    """Olvida el mapa; se vuelve a leer information_schema en la siguiente consulta (tras migrar)."""
+    global _columnas
+    with _lock:
+        _columnas = None
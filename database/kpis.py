@@ -0,0 +1,412 @@
+"""
+KPIs precalculados (tabla kpi_snapshot) para el dashboard y las estadísticas.
+
+Cada fila guarda los contadores de un ámbito:
+  - ('brigada', idBrigada): una por brigada,
+  - ('tipo', tipo_brigada): suma de las brigadas de ese tipo,
+  - ('global', ''): todo, incluidos usuarios sin brigada y reportes de impacto
+    sin actividad (igual que las consultas en vivo sin filtro).
+
+Escrituras: las funciones CRUD que cambian usuarios, actividades, brigadas o
+reportes de impacto envuelven la sentencia en kpis.cambio(entidad, id). Se lee
+la contribución de la fila antes (FOR UPDATE) y después; la diferencia se
+calcula en Python y se suma a las filas de su brigada, su tipo y la global con
+UN solo INSERT ... ON DUPLICATE KEY UPDATE multi-fila al final, en la misma
+transacción que la escritura. Así la fila global (la más disputada) solo queda
+bloqueada desde esa última sentencia hasta el COMMIT. Las filas se escriben en
+orden de clave primaria (brigadas, global, tipos) para no cruzarse con otras
+escrituras ni con la reconciliación.
+
+brigadas_activas (la brigada tiene al menos una actividad): las lecturas de
+una actividad traen también, bloqueado, el contador 'actividades' de la fila
+de su brigada en kpi_snapshot; con él se sabe si la brigada pasa a estar
+activa o inactiva sin releer el snapshot después de escribir.
+
+Lectura: leer() es una consulta por clave primaria (y cacheada). Mientras la
+tabla no exista o no se haya reconciliado nunca retorna None y las funciones
+CRUD usan la consulta en vivo de siempre.
+
+Reconciliación: reconciliar() recalcula todo desde las tablas base y corrige
+las filas que difieran (cargas masivas, SQL a mano, escrituras fuera del CRUD).
+Primero compara en una sola lectura consistente sin bloquear; solo si hay
+diferencias bloquea kpi_snapshot, recalcula y escribe. Un hilo la repite cada
+SBE_DB_KPI_RECONCILIAR_S (la primera vez al iniciar la app); GET_LOCK evita que
+varias instancias reconcilien a la vez.
+"""
+import threading
+import time
+
+from database.config import DB_KPI_RECONCILIAR_S, DB_KPI_SNAPSHOT
+from database.connection import en_transaccion, ejecutar, ejecutar_cacheado, get_connection, transaccion
+from database import cache, esquema
+
+CAMPOS = (
+    "brigadas", "brigadas_activas", "usuarios", "brigadistas", "actividades",
+    "actividades_activas", "actividades_completadas", "horas_completadas", "impactos",
+)
+
+_HORAS = (
+    "CASE WHEN a.estado = 'Completada' AND a.fecha_inicio IS NOT NULL AND a.fecha_fin IS NOT NULL "
+    "THEN TIMESTAMPDIFF(HOUR, a.fecha_inicio, a.fecha_fin) ELSE 0 END"
+)
+
+# entidad -> (FROM ..., columna de la brigada, columna del id, {campo: expresión por fila})
+# Si la entidad aporta 'actividades', sus lecturas traen también el contador de la brigada (_contribucion)
+_FUENTES = {
+    "brigada": (
+        "FROM brigada b", "b.idBrigada", "b.idBrigada",
+        {"brigadas": "1"},
+    ),
+    "usuario": (
+        "FROM usuario u LEFT JOIN brigada b ON u.Brigada_idBrigada = b.idBrigada",
+        "u.Brigada_idBrigada", "u.idUsuario",
+        {"usuarios": "1", "brigadistas": "COALESCE(u.rol = 'Brigadista', 0)"},
+    ),
+    "actividad": (
+        "FROM actividad a LEFT JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada",
+        "a.Brigada_idBrigada", "a.idActividad",
+        {
+            "actividades": "1",
+            "actividades_activas": "COALESCE(a.estado NOT IN ('Completada', 'Cancelada'), 0)",
+            "actividades_completadas": "COALESCE(a.estado = 'Completada', 0)",
+            "horas_completadas": _HORAS,
+        },
+    ),
+    "impacto": (
+        "FROM reporte_de_impacto i LEFT JOIN actividad a ON i.Actividad_idActividad = a.idActividad "
+        "LEFT JOIN brigada b ON a.Brigada_idBrigada = b.idBrigada",
+        "a.Brigada_idBrigada", "i.idReporte_impacto",
+        {"impactos": "1"},
+    ),
+}
+
+_GLOBAL = ("global", "")
+_CANDADO = "sbe_kpi_reconciliar"
+
+_hilo = None
+_lock = threading.Lock()
+
+
+def _activo() -> bool:
+    return DB_KPI_SNAPSHOT and esquema.tiene_tabla("kpi_snapshot")
+
+
+# ---------- escrituras (deltas) ----------
+
+def _contribucion(entidad, id_):
+    """
+    (brigada_id, tipo_brigada, {campo: valor}, actividades de la brigada en
+    kpi_snapshot o None) de una fila, o None si no existe. Lectura bloqueante
+    (FOR UPDATE): también bloquea la fila de la brigada en kpi_snapshot.
+    """
+    desde, col_brigada, col_id, campos = _FUENTES[entidad]
+    snapshot = "NULL"
+    if "actividades" in campos:
+        snapshot = "k.actividades"
+        desde += (
+            " LEFT JOIN kpi_snapshot k ON k.ambito = 'brigada'"
+            f" AND k.clave = CAST({col_brigada} AS CHAR CHARACTER SET utf8)"
+        )
+    sql = (
+        f"SELECT {col_brigada}, b.tipo_brigada, {snapshot}, {', '.join(campos.values())} {desde} "
+        f"WHERE {col_id} = %s FOR UPDATE"
+    )
+    rows, _ = ejecutar(sql, (id_,))
+    if not rows:
+        return None
+    bid, tipo, actividades, *valores = rows[0]
+    return bid, tipo, {c: int(v or 0) for c, v in zip(campos, valores)}, actividades
+
+
+def _sumar(filas):
+    """Un solo INSERT ... ON DUPLICATE KEY UPDATE con [(ámbito, clave, {campo: delta})]."""
+    campos = [c for c in CAMPOS if any(c in delta for _, _, delta in filas)]
+    marcas = ", ".join(["(%s, %s" + ", %s" * len(campos) + ")"] * len(filas))
+    actualizar = ", ".join(f"{c} = {c} + VALUES({c})" for c in campos)
+    params = []
+    for ambito, clave, delta in filas:
+        params += [ambito, clave, *(delta.get(c, 0) for c in campos)]
+    ejecutar(
+        f"INSERT INTO kpi_snapshot (ambito, clave, {', '.join(campos)}) VALUES {marcas} "
+        f"ON DUPLICATE KEY UPDATE {actualizar}",
+        tuple(params),
+        commit=True,
+    )
+
+
+def _acumular(destino, delta, signo=1):
+    for c, v in delta.items():
+        destino[c] = destino.get(c, 0) + signo * v
+
+
+def _registrar(antes, despues):
+    """Suma (despues - antes) a las filas de brigada, tipo y global afectadas."""
+    por_brigada = {}   # brigada_id -> (tipo, delta, actividades en kpi_snapshot)
+    global_ = {}
+    for signo, contribucion in ((-1, antes), (1, despues)):
+        if contribucion is None:
+            continue
+        bid, tipo, campos, actividades = contribucion
+        _acumular(global_, campos, signo)
+        if bid is not None:
+            _acumular(por_brigada.setdefault(bid, (tipo, {}, actividades))[1], campos, signo)
+
+    filas = []
+    borradas = []
+    por_tipo = {}
+    for bid in sorted(por_brigada, key=str):  # orden de la clave primaria (VARCHAR)
+        tipo, delta, actividades = por_brigada[bid]
+        delta = {c: v for c, v in delta.items() if v}
+        if not delta:
+            continue
+        if "actividades" in delta:
+            # brigadas_activas: la brigada cuenta si tiene al menos una actividad
+            previas = int(actividades or 0)
+            cambio_activa = int(previas + delta["actividades"] > 0) - int(previas > 0)
+            if cambio_activa:
+                delta["brigadas_activas"] = cambio_activa
+                _acumular(global_, {"brigadas_activas": cambio_activa})
+        if delta.get("brigadas", 0) < 0:  # brigada eliminada
+            borradas.append(str(bid))
+        else:
+            filas.append(("brigada", str(bid), delta))
+        if tipo:
+            _acumular(por_tipo.setdefault(tipo, {}), delta)
+
+    global_ = {c: v for c, v in global_.items() if v}
+    if global_:
+        filas.append((*_GLOBAL, global_))
+    for tipo in sorted(por_tipo):
+        delta = {c: v for c, v in por_tipo[tipo].items() if v}
+        if delta:
+            filas.append(("tipo", tipo, delta))
+
+    if borradas:
+        ejecutar(
+            f"DELETE FROM kpi_snapshot WHERE ambito = 'brigada' AND clave IN ({', '.join(['%s'] * len(borradas))})",
+            tuple(borradas), commit=True,
+        )
+    if filas:
+        _sumar(filas)
+
+
+class Cambio:
+    """
+    Envuelve una escritura sobre 'entidad' (brigada, usuario, actividad, impacto)
+    y aplica su efecto en kpi_snapshot dentro de la misma transacción (abre una
+    con transaccion() si no hay ninguna en curso). En un INSERT el id se conoce
+    después: asignarlo a cambio.id dentro del bloque.
+    """
+
+    def __init__(self, entidad, id_=None):
+        self.entidad = entidad
+        self.id = id_
+        self._antes = None
+        self._tx = None
+        self._activo = False
+
+    def __enter__(self):
+        self._activo = _activo()
+        if not self._activo:
+            return self
+        if not en_transaccion():
+            self._tx = transaccion()
+            self._tx.__enter__()
+        if self.id is not None:
+            try:
+                self._antes = _contribucion(self.entidad, self.id)
+            except BaseException as e:
+                if self._tx is not None:
+                    self._tx.__exit__(type(e), e, e.__traceback__)
+                raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._activo:
+            return False
+        try:
+            if exc_type is None and self.id is not None:
+                _registrar(self._antes, _contribucion(self.entidad, self.id))
+        except BaseException as e:
+            if self._tx is not None:
+                self._tx.__exit__(type(e), e, e.__traceback__)
+            raise
+        if self._tx is not None:
+            self._tx.__exit__(exc_type, exc, tb)
+        return False
+
+
+def cambio(entidad, id_=None) -> Cambio:
+    """
+    Mantiene kpi_snapshot al día con una escritura CRUD:
+
+        with kpis.cambio("actividad", id_actividad):
+            ejecutar_modificar("UPDATE actividad SET estado = ...")
+
+        with kpis.cambio("usuario") as c:
+            c.id = ejecutar("INSERT INTO usuario ...", commit=True)
+
+    Sin la tabla kpi_snapshot (migración 008 pendiente) o con SBE_DB_KPI_SNAPSHOT=0
+    no hace nada.
+    """
+    return Cambio(entidad, id_)
+
+
+# ---------- lectura ----------
+
+def leer(tipo_brigada=None, brigada_id=None) -> dict | None:
+    """
+    Contadores del ámbito pedido (brigada_id, si no tipo_brigada, si no global)
+    como {campo: valor}; None si el snapshot no está disponible (usar la consulta en vivo).
+    """
+    if not _activo():
+        return None
+    if brigada_id is not None:
+        clave = ("brigada", str(brigada_id))
+    elif tipo_brigada:
+        clave = ("tipo", tipo_brigada)
+    else:
+        clave = _GLOBAL
+    try:
+        rows, _ = ejecutar_cacheado(
+            f"SELECT ambito, clave, reconciliado_en, {', '.join(CAMPOS)} FROM kpi_snapshot "
+            "WHERE (ambito = %s AND clave = %s) OR (ambito = 'global' AND clave = '')",
+            clave, tablas=("kpi_snapshot",),
+        )
+    except Exception as e:
+        print(f"[KPI] No se pudo leer kpi_snapshot: {e}")
+        return None
+    filas = {(r[0], r[1]): r for r in rows}
+    global_ = filas.get(_GLOBAL)
+    if global_ is None or global_[2] is None:
+        return None  # nunca reconciliado: los contadores no son completos
+    fila = filas.get(clave)
+    if fila is None:
+        return dict.fromkeys(CAMPOS, 0)
+    return {c: int(v or 0) for c, v in zip(CAMPOS, fila[3:])}
+
+
+# ---------- reconciliación ----------
+
+def _calcular(cursor) -> dict:
+    """{(ámbito, clave): {campo: valor}} recalculado desde las tablas base."""
+    esperadas = {_GLOBAL: dict.fromkeys(CAMPOS, 0)}
+    tipos = {}
+    for entidad, (desde, col_brigada, _, campos) in _FUENTES.items():
+        sumas = ", ".join(f"SUM({e})" for e in campos.values())
+        cursor.execute(f"SELECT {col_brigada}, b.tipo_brigada, {sumas} {desde} GROUP BY {col_brigada}, b.tipo_brigada")
+        for bid, tipo, *valores in cursor.fetchall():
+            valores = {c: int(v or 0) for c, v in zip(campos, valores)}
+            _acumular(esperadas[_GLOBAL], valores)
+            if bid is None:
+                continue
+            fila = esperadas.setdefault(("brigada", str(bid)), dict.fromkeys(CAMPOS, 0))
+            _acumular(fila, valores)
+            tipos[str(bid)] = tipo
+    for (ambito, clave), fila in list(esperadas.items()):
+        if ambito != "brigada":
+            continue
+        fila["brigadas_activas"] = int(fila["actividades"] > 0)
+        esperadas[_GLOBAL]["brigadas_activas"] += fila["brigadas_activas"]
+        if tipos.get(clave):
+            _acumular(esperadas.setdefault(("tipo", tipos[clave]), dict.fromkeys(CAMPOS, 0)), fila)
+    return esperadas
+
+
+def _actuales(cursor) -> dict:
+    cursor.execute(f"SELECT ambito, clave, {', '.join(CAMPOS)} FROM kpi_snapshot")
+    return {(r[0], r[1]): {c: int(v) for c, v in zip(CAMPOS, r[2:])} for r in cursor.fetchall()}
+
+
+def _diferencias(actuales, esperadas) -> list:
+    claves = set(actuales) | set(esperadas)
+    return sorted(k for k in claves if actuales.get(k) != esperadas.get(k))
+
+
+def _escribir(cursor, actuales, esperadas, diferencias):
+    columnas = ", ".join(CAMPOS)
+    marcas = ", ".join(["%s"] * len(CAMPOS))
+    actualizar = ", ".join(f"{c} = VALUES({c})" for c in CAMPOS)
+    for clave in diferencias:
+        fila = esperadas.get(clave)
+        if fila is None:
+            cursor.execute("DELETE FROM kpi_snapshot WHERE ambito = %s AND clave = %s", clave)
+            continue
+        cursor.execute(
+            f"INSERT INTO kpi_snapshot (ambito, clave, {columnas}, reconciliado_en) VALUES (%s, %s, {marcas}, NOW()) "
+            f"ON DUPLICATE KEY UPDATE {actualizar}, reconciliado_en = NOW()",
+            (*clave, *(fila[c] for c in CAMPOS)),
+        )
+
+
+def reconciliar(minimo_s=None) -> int | None:
+    """
+    Recalcula kpi_snapshot desde las tablas base y corrige las filas que difieran.
+    Retorna cuántas filas se corrigieron, o None si se omitió (otra instancia
+    reconciliando, o la última reconciliación tiene menos de 'minimo_s' segundos).
+    """
+    if not _activo():
+        return None
+    conn = get_connection(compartida=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (_CANDADO,))
+        if cursor.fetchone()[0] != 1:
+            return None
+        try:
+            conn.rollback()  # lectura consistente nueva
+            if minimo_s:
+                cursor.execute(
+                    "SELECT TIMESTAMPDIFF(SECOND, reconciliado_en, NOW()) FROM kpi_snapshot "
+                    "WHERE ambito = 'global' AND clave = ''"
+                )
+                fila = cursor.fetchone()
+                if fila and fila[0] is not None and fila[0] < minimo_s:
+                    conn.rollback()
+                    return None
+            # 1) Sin bloquear: snapshot y tablas base en la misma lectura consistente
+            diferencias = _diferencias(_actuales(cursor), _calcular(cursor))
+            conn.rollback()
+            if diferencias:
+                # 2) Hay desvío: bloquear kpi_snapshot (las escrituras esperan) y recalcular
+                cursor.execute("SELECT ambito FROM kpi_snapshot FOR UPDATE")
+                cursor.fetchall()
+                actuales, esperadas = _actuales(cursor), _calcular(cursor)
+                diferencias = _diferencias(actuales, esperadas)
+                _escribir(cursor, actuales, esperadas, diferencias)
+            cursor.execute("UPDATE kpi_snapshot SET reconciliado_en = NOW() WHERE ambito = 'global' AND clave = ''")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (_CANDADO,))
+            cursor.fetchall()
+            cursor.close()
+    finally:
+        conn.close()
+    cache.invalidar("kpi_snapshot")
+    if diferencias:
+        print(f"[KPI] Reconciliación: {len(diferencias)} filas de kpi_snapshot corregidas")
+    return len(diferencias)
+
+
+def _bucle():
+    time.sleep(5)  # no competir con la carga de la primera pantalla
+    while True:
+        try:
+            reconciliar(minimo_s=DB_KPI_RECONCILIAR_S)
+        except Exception as e:
+            print(f"[KPI] Error en la reconciliación: {e}")
+        time.sleep(DB_KPI_RECONCILIAR_S)
+
+
+def iniciar_reconciliacion():
+    """Arranca el hilo de reconciliación periódica (una sola vez), salvo SBE_DB_KPI_RECONCILIAR_S=0."""
+    global _hilo
+    if not DB_KPI_SNAPSHOT or DB_KPI_RECONCILIAR_S <= 0:
+        return
+    with _lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle, name="sbe-db-kpi", daemon=True)
+            _hilo.start()
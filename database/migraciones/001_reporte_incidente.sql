@@ -0,0 +1,18 @@
+-- Reportes de incidentes. Las instalaciones anteriores al volcado actual no
+-- tenían la tabla (antes la creaba crud_reporte.py en tiempo de ejecución).
+
+CREATE TABLE IF NOT EXISTS `reporte_incidente` (
+  `idReporte` INT(11) NOT NULL AUTO_INCREMENT,
+  `titulo` VARCHAR(100) NOT NULL,
+  `descripcion` TEXT NOT NULL,
+  `ubicacion` VARCHAR(200) NOT NULL,
+  `prioridad` VARCHAR(50) NOT NULL,
+  `estado` VARCHAR(50) NOT NULL DEFAULT 'En Proceso',
+  `Brigada_idBrigada` INT(11) NOT NULL,
+  `creado_en` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `actualizado_en` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`idReporte`),
+  KEY `fk_reporte_brigada_idx` (`Brigada_idBrigada`),
+  CONSTRAINT `fk_reporte_brigada` FOREIGN KEY (`Brigada_idBrigada`)
+    REFERENCES `brigada` (`idBrigada`) ON DELETE CASCADE ON UPDATE NO ACTION
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_general_ci;
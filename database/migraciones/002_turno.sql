@@ -0,0 +1,17 @@
+-- Turnos y horarios de brigadas (antes la creaba crud_turno.py en tiempo de ejecución).
+
+CREATE TABLE IF NOT EXISTS `turno` (
+  `idTurno` INT(11) NOT NULL AUTO_INCREMENT,
+  `Brigada_idBrigada` INT(11) NOT NULL,
+  `fecha` DATE NOT NULL,
+  `hora_inicio` TIME NOT NULL,
+  `hora_fin` TIME NOT NULL,
+  `ubicacion` VARCHAR(200) DEFAULT NULL,
+  `notas` TEXT DEFAULT NULL,
+  `estado` VARCHAR(30) NOT NULL DEFAULT 'Programado',
+  `creado_en` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`idTurno`),
+  KEY `fk_turno_brigada_idx` (`Brigada_idBrigada`),
+  CONSTRAINT `fk_turno_brigada` FOREIGN KEY (`Brigada_idBrigada`)
+    REFERENCES `brigada` (`idBrigada`) ON DELETE CASCADE ON UPDATE NO ACTION
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_general_ci;
@@ -1,5 +1,4 @@
--- Migración para permitir que el profesor creador pueda completar actividades
--- Ejecutar una sola vez sobre la base de datos existente.
+-- Permite que el profesor creador pueda completar actividades.
 
 ALTER TABLE actividad
     ADD COLUMN Usuario_idUsuarioCreador INT NULL AFTER Brigada_idBrigada;
@@ -7,7 +6,7 @@ ALTER TABLE actividad
 ALTER TABLE actividad
     ADD CONSTRAINT fk_actividad_usuario_creador
     FOREIGN KEY (Usuario_idUsuarioCreador)
-    REFERENCES Usuario(idUsuario)
+    REFERENCES usuario(idUsuario)
     ON DELETE SET NULL
     ON UPDATE NO ACTION;
 
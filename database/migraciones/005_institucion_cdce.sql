@@ -0,0 +1,3 @@
+-- Código CDCE de la institución (antes lo añadía crud_usuario.py en tiempo de ejecución).
+
+ALTER TABLE institucion_educativa ADD COLUMN cdce VARCHAR(100);
@@ -1,7 +1,4 @@
 -- Mensaje del día: editable por Directivo/Coordinador desde el dashboard.
--- Ejecutar una vez en MySQL.
-
-USE db_brigadas_maracaibo;
 
 CREATE TABLE IF NOT EXISTS `configuracion` (
   `clave` varchar(64) NOT NULL,
@@ -0,0 +1,31 @@
+-- Índices compuestos para los caminos de acceso reales de la app.
+-- Verificación: python scripts/verificar_planes.py (EXPLAIN de cada consulta CRUD).
+
+-- Login y buscar_usuario_por_email filtran por email (antes: recorrido completo)
+CREATE INDEX idx_usuario_email ON usuario (email);
+
+-- Miembros de una brigada por rol (listados de brigadistas, KPIs de voluntariado).
+-- Sustituye al índice simple de la FK: la columna inicial la sigue cubriendo.
+CREATE INDEX idx_usuario_brigada_rol ON usuario (Brigada_idBrigada, rol);
+DROP INDEX fk_Usuario_Brigada1_idx ON usuario;
+
+-- Actividades de una brigada, más recientes primero (listado, paginación por
+-- cursor fecha_inicio/idActividad y "actividades recientes")
+CREATE INDEX idx_actividad_brigada_fecha ON actividad (Brigada_idBrigada, fecha_inicio);
+DROP INDEX fk_Actividad_Brigada1_idx ON actividad;
+
+-- Vista de administrador sin filtro: ORDER BY fecha_inicio DESC LIMIT n sin ordenar en memoria
+CREATE INDEX idx_actividad_fecha ON actividad (fecha_inicio);
+
+-- Incidentes de una brigada por fecha de creación
+CREATE INDEX idx_reporte_brigada_creado ON reporte_incidente (Brigada_idBrigada, creado_en);
+DROP INDEX fk_reporte_brigada_idx ON reporte_incidente;
+
+-- Turnos de una brigada: ORDER BY fecha DESC, hora_inicio ASC
+-- (MySQL 8 / MariaDB 10.8+ usan el DESC; versiones anteriores lo ignoran)
+CREATE INDEX idx_turno_brigada_fecha ON turno (Brigada_idBrigada, fecha DESC, hora_inicio);
+DROP INDEX fk_turno_brigada_idx ON turno;
+
+-- Listados de reportes de actividad / impacto ordenados por fecha (vista sin filtro)
+CREATE INDEX idx_reporte_act_fecha ON reporte_actividad (fecha_reporte);
+CREATE INDEX idx_reporte_impacto_fecha ON reporte_de_impacto (fecha_generacion);
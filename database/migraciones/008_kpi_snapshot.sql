@@ -0,0 +1,20 @@
+-- KPIs precalculados del dashboard y de estadísticas (ver database/kpis.py).
+-- Una fila por brigada más los acumulados por tipo_brigada y global; las
+-- escrituras CRUD los actualizan con deltas y la reconciliación los rellena
+-- (la primera vez, al iniciar la app) y corrige cualquier desvío.
+
+CREATE TABLE IF NOT EXISTS `kpi_snapshot` (
+  `ambito` VARCHAR(10) NOT NULL,
+  `clave` VARCHAR(64) NOT NULL,
+  `brigadas` INT NOT NULL DEFAULT 0,
+  `brigadas_activas` INT NOT NULL DEFAULT 0,
+  `usuarios` INT NOT NULL DEFAULT 0,
+  `brigadistas` INT NOT NULL DEFAULT 0,
+  `actividades` INT NOT NULL DEFAULT 0,
+  `actividades_activas` INT NOT NULL DEFAULT 0,
+  `actividades_completadas` INT NOT NULL DEFAULT 0,
+  `horas_completadas` BIGINT NOT NULL DEFAULT 0,
+  `impactos` INT NOT NULL DEFAULT 0,
+  `reconciliado_en` TIMESTAMP NULL DEFAULT NULL,
+  PRIMARY KEY (`ambito`, `clave`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_general_ci;
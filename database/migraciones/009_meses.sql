@@ -0,0 +1,24 @@
+-- Mes (AAAAMM, p. ej. 202501) precalculado para las series mensuales del
+-- dashboard y de Estadísticas: se agrupa por la columna guardada en vez de
+-- formatear la fecha de cada fila, y el índice con la FK de brigada/actividad
+-- entrega las filas ya ordenadas por mes.
+-- EXTRACT(YEAR_MONTH ...) y no DATE_FORMAT: MariaDB no acepta DATE_FORMAT en
+-- columnas generadas. Las consultas usan estas columnas solo si existen
+-- (database/esquema.py); sin esta migración calculan el mes al vuelo.
+-- Verificación: python scripts/benchmark_estadisticas.py sobre dos esquemas de
+-- scripts/generar_dataset.py, uno de ellos con --sin-meses.
+
+-- Actividades por mes (barras de Estadísticas y del dashboard)
+ALTER TABLE actividad ADD COLUMN mes_inicio INT AS (EXTRACT(YEAR_MONTH FROM fecha_inicio)) STORED;
+CREATE INDEX idx_actividad_brigada_mes ON actividad (Brigada_idBrigada, mes_inicio);
+
+-- Tendencia de reportes: incidentes por brigada
+ALTER TABLE reporte_incidente ADD COLUMN mes_creado INT AS (EXTRACT(YEAR_MONTH FROM creado_en)) STORED;
+CREATE INDEX idx_reporte_brigada_mes ON reporte_incidente (Brigada_idBrigada, mes_creado);
+
+-- Tendencia de reportes: reportes de actividad e impacto (llegan a la brigada por la actividad)
+ALTER TABLE reporte_actividad ADD COLUMN mes_reporte INT AS (EXTRACT(YEAR_MONTH FROM fecha_reporte)) STORED;
+CREATE INDEX idx_reporte_act_mes ON reporte_actividad (Actividad_idActividad, mes_reporte);
+
+ALTER TABLE reporte_de_impacto ADD COLUMN mes_generacion INT AS (EXTRACT(YEAR_MONTH FROM fecha_generacion)) STORED;
+CREATE INDEX idx_reporte_impacto_mes ON reporte_de_impacto (Actividad_idActividad, mes_generacion);
@@ -0,0 +1,9 @@
+-- Vista de administrador sin filtro: las series de 6 meses filtran
+-- mes >= DESDE_MES (database/crud_estadisticas.py) sin brigada ni actividad
+-- fija, y los índices de 009 empiezan por la FK. Con estos el rango se lee
+-- directamente.
+
+CREATE INDEX idx_actividad_mes ON actividad (mes_inicio);
+CREATE INDEX idx_reporte_mes ON reporte_incidente (mes_creado);
+CREATE INDEX idx_reporte_act_mes_global ON reporte_actividad (mes_reporte);
+CREATE INDEX idx_reporte_impacto_mes_global ON reporte_de_impacto (mes_generacion);
@@ -0,0 +1,227 @@
+"""
+Migraciones versionadas del esquema del SBE.
+
+Cada cambio de esquema es un archivo database/migraciones/NNN_descripcion.sql
+(NNN = versión, en orden). Las versiones aplicadas se anotan en la tabla
+`schema_version`; aplicar() ejecuta solo las pendientes, en orden, una vez.
+
+Se aplica al desplegar (python scripts/migrar.py) o al iniciar la app
+(SBE_DB_MIGRAR_AL_INICIAR=1, por defecto): sin pendientes cuesta una consulta.
+Las funciones CRUD ya no crean tablas ni columnas en tiempo de ejecución.
+
+Instalaciones anteriores a este sistema: las sentencias que fallan porque el
+cambio ya existe (columna, índice, tabla o restricción duplicada, índice ya
+borrado) se saltan, así que la primera ejecución solo completa lo que falte y
+registra todas las versiones.
+
+Varias instancias de la app pueden arrancar a la vez: GET_LOCK serializa la
+aplicación y cada una relee schema_version dentro del candado.
+"""
+import hashlib
+import os
+import re
+import sys
+import threading
+from time import perf_counter
+
+from mysql.connector import Error
+
+from database.config import DB_MIGRAR_AL_INICIAR
+
+# Junto a este archivo; en el .exe, dentro del paquete de PyInstaller (ver SBE.spec)
+DIR_MIGRACIONES = os.path.join(
+    getattr(sys, "_MEIPASS", os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "database", "migraciones",
+)
+
+_RE_ARCHIVO = re.compile(r"^(\d+)_(\w+)\.sql$")
+_CANDADO = "sbe_migraciones"
+_ESPERA_CANDADO_S = 60
+
+# Errores que indican que el cambio ya estaba hecho (instalaciones migradas a mano)
+_YA_APLICADO = {
+    1050,  # tabla ya existe
+    1060,  # columna duplicada
+    1061,  # índice duplicado
+    1091,  # no se puede borrar: el índice/columna no existe
+    1826,  # restricción (FK) duplicada
+}
+_ER_CANT_CREATE_TABLE = 1005  # MariaDB: FK duplicada llega como errno 121 "Duplicate key"
+
+_SQL_TABLA = """
+CREATE TABLE IF NOT EXISTS `schema_version` (
+  `version` INT NOT NULL,
+  `nombre` VARCHAR(200) NOT NULL,
+  `checksum` CHAR(64) NOT NULL,
+  `aplicado_en` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `duracion_ms` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8 COLLATE=utf8_general_ci
+"""
+
+
+class MigracionError(RuntimeError):
+    """Una migración falló (el esquema queda en la última versión registrada) o no se obtuvo el candado."""
+
+
+def sentencias(texto: str) -> list[str]:
+    """Separa un archivo .sql en sentencias (una por ';' a final de línea, sin comentarios --)."""
+    lineas = [l for l in texto.splitlines() if not l.lstrip().startswith("--")]
+    return [s.strip().rstrip(";") for s in "\n".join(lineas).split(";\n") if s.strip()]
+
+
+def disponibles(directorio=None) -> list[tuple[int, str, str]]:
+    """(versión, nombre, ruta) de los archivos de migración, ordenados por versión."""
+    directorio = directorio or DIR_MIGRACIONES
+    migraciones = []
+    for archivo in os.listdir(directorio):
+        m = _RE_ARCHIVO.match(archivo)
+        if m:
+            migraciones.append((int(m.group(1)), m.group(2), os.path.join(directorio, archivo)))
+    migraciones.sort()
+    versiones = [v for v, _, _ in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise MigracionError(f"Versiones de migración repetidas en {directorio}")
+    return migraciones
+
+
+def _checksum(ruta):
+    with open(ruta, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _aplicadas(cursor) -> dict:
+    cursor.execute("SELECT version, checksum FROM schema_version")
+    return {int(v): c for v, c in cursor.fetchall()}
+
+
+def _ya_aplicado(e: Error) -> bool:
+    if e.errno in _YA_APLICADO:
+        return True
+    return e.errno == _ER_CANT_CREATE_TABLE and "duplicate" in str(e).lower()
+
+
+def _aplicar_una(cursor, version, nombre, ruta):
+    with open(ruta, encoding="utf-8") as f:
+        texto = f.read()
+    inicio = perf_counter()
+    for sentencia in sentencias(texto):
+        try:
+            cursor.execute(sentencia)
+        except Error as e:
+            if not _ya_aplicado(e):
+                raise MigracionError(f"Migración {version:03d}_{nombre} falló: {e}\n    {sentencia[:200]}") from e
+            print(f"[migraciones] {version:03d}_{nombre}: ya aplicado, se salta ({e.msg})")
+    ms = int((perf_counter() - inicio) * 1000)
+    cursor.execute(
+        "INSERT INTO schema_version (version, nombre, checksum, duracion_ms) VALUES (%s, %s, %s, %s)",
+        (version, nombre, _checksum(ruta), ms),
+    )
+    return ms
+
+
+def _registradas(conn=None) -> dict:
+    from database.connection import get_connection
+
+    propia = conn is None
+    conn = conn or get_connection(compartida=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_TABLA)
+        aplicadas = _aplicadas(cursor)
+        cursor.close()
+    finally:
+        if propia:
+            conn.close()
+    return aplicadas
+
+
+def pendientes(conn=None) -> list[tuple[int, str, str]]:
+    """Migraciones aún no registradas en schema_version."""
+    aplicadas = _registradas(conn)
+    return [m for m in disponibles() if m[0] not in aplicadas]
+
+
+def aplicar(omitir=(), conn=None) -> list[int]:
+    """
+    Aplica las migraciones pendientes en orden y retorna las versiones aplicadas.
+    'omitir': versiones a dejar pendientes (p. ej. medir sin los índices de 007).
+    Lanza MigracionError si alguna falla; las anteriores quedan registradas.
+    """
+    from database import esquema
+    from database.connection import get_connection
+
+    propia = conn is None
+    conn = conn or get_connection(compartida=False)
+    aplicadas = []
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_TABLA)
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (_CANDADO, _ESPERA_CANDADO_S))
+        if cursor.fetchone()[0] != 1:
+            raise MigracionError("Otra instancia está aplicando migraciones (sin candado tras la espera)")
+        try:
+            registradas = _aplicadas(cursor)
+            for version, nombre, ruta in disponibles():
+                if version in registradas:
+                    if registradas[version] != _checksum(ruta):
+                        print(f"[migraciones] {version:03d}_{nombre} cambió después de aplicarse; no se vuelve a ejecutar")
+                    continue
+                if version in omitir:
+                    continue
+                ms = _aplicar_una(cursor, version, nombre, ruta)
+                conn.commit()
+                aplicadas.append(version)
+                print(f"[migraciones] {version:03d}_{nombre} aplicada ({ms} ms)")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (_CANDADO,))
+            cursor.fetchall()
+            cursor.close()
+    finally:
+        if propia:
+            conn.close()
+    if aplicadas:
+        esquema.recargar()
+    return aplicadas
+
+
+def version_actual(conn=None):
+    """Mayor versión registrada en schema_version, o None si no hay ninguna."""
+    aplicadas = _registradas(conn)
+    return max(aplicadas) if aplicadas else None
+
+
+def aplicar_al_iniciar(en_segundo_plano=True):
+    """
+    Al arrancar la app: aplica las pendientes y carga el mapa del esquema
+    (database/esquema.py) con la misma conexión, en un hilo aparte para no
+    retrasar la ventana (conexión TLS, GET_LOCK de hasta 60 s, DDL). Las
+    consultas que lleguen antes leen el esquema por su cuenta y aplicar() lo
+    vuelve a leer al terminar. Con SBE_DB_MIGRAR_AL_INICIAR=0 no hace nada:
+    el mapa se lee en la primera consulta. Los fallos se informan y la app sigue.
+    """
+    if not DB_MIGRAR_AL_INICIAR:
+        return
+    if en_segundo_plano:
+        threading.Thread(target=_al_iniciar, name="sbe-db-migraciones", daemon=True).start()
+    else:
+        _al_iniciar()
+
+
+def _al_iniciar():
+    from database import esquema
+    from database.connection import get_connection
+
+    try:
+        conn = get_connection(compartida=False)
+    except Exception as e:
+        print(f"[migraciones] Sin conexión al iniciar: {e}")
+        return
+    try:
+        try:
+            aplicar(conn=conn)
+        except Exception as e:
+            print(f"[migraciones] No se pudieron aplicar al iniciar: {e}")
+        esquema.cargar(conn)
+    finally:
+        conn.close()
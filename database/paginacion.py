@@ -0,0 +1,123 @@
+"""
+Paginación por cursor (keyset) para los listados del SBE.
+
+En vez de OFFSET, cada página pide las filas que van "después" de la última
+fila de la página anterior según las columnas del ORDER BY, con la clave
+primaria como desempate. El costo de pedir una página no crece con el
+historial de la institución.
+
+Los listados exponen variantes *_pagina(..., tam_pagina=None, cursor=None) que
+retornan {"items": [...], "siguiente": cursor | None}. El cursor es una cadena
+opaca: basta con pasar "siguiente" para obtener la página siguiente (None = fin).
+
+Las columnas del ORDER BY deben ser NOT NULL (fecha_inicio, creado_en,
+fecha_reporte, fecha_generacion, fecha/hora_inicio, nombre/apellido).
+"""
+import base64
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from database.config import DB_TAM_PAGINA
+from database.connection import ejecutar_lectura
+
+
+def _valor_a_json(v):
+    if isinstance(v, datetime):
+        return {"t": v.isoformat()}
+    if isinstance(v, date):
+        return {"d": v.isoformat()}
+    if isinstance(v, timedelta):
+        return {"h": v.total_seconds()}
+    if isinstance(v, Decimal):
+        return {"n": str(v)}
+    if isinstance(v, bytes):
+        return v.decode("utf-8", "replace")
+    return v
+
+
+def _json_a_valor(v):
+    if isinstance(v, dict):
+        if "t" in v:
+            return datetime.fromisoformat(v["t"])
+        if "d" in v:
+            return date.fromisoformat(v["d"])
+        if "h" in v:
+            return timedelta(seconds=v["h"])
+        if "n" in v:
+            return Decimal(v["n"])
+    return v
+
+
+def codificar_cursor(valores) -> str:
+    """Convierte los valores de la clave de orden en un cursor opaco (base64 URL-safe)."""
+    crudo = json.dumps([_valor_a_json(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> list:
+    """Inverso de codificar_cursor(). Lanza ValueError si el cursor no es válido."""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode("utf-8"))
+        if not isinstance(datos, list):
+            raise ValueError
+        return [_json_a_valor(v) for v in datos]
+    except Exception:
+        raise ValueError("Cursor de paginación inválido") from None
+
+
+def _predicado(orden, valores):
+    """
+    Condición "fila posterior a 'valores'" para un ORDER BY con direcciones
+    posiblemente mezcladas:
+        (c1 > v1) OR (c1 = v1 AND c2 < v2) OR (c1 = v1 AND c2 = v2 AND c3 > v3) ...
+    Se antepone la cota de la primera columna (c1 >= v1) para que MySQL pueda
+    usar un rango sobre su índice.
+    """
+    ramas = []
+    params = []
+    for i, (expr, direccion) in enumerate(orden):
+        op = "<" if direccion == "DESC" else ">"
+        partes = [f"{e} = %s" for e, _ in orden[:i]] + [f"{expr} {op} %s"]
+        ramas.append("(" + " AND ".join(partes) + ")")
+        params.extend(valores[:i + 1])
+    primera, dir_primera = orden[0]
+    cota = f"{primera} {'<=' if dir_primera == 'DESC' else '>='} %s"
+    return f"({cota} AND ({' OR '.join(ramas)}))", [valores[0]] + params
+
+
+def consultar_pagina(select, desde, condiciones, params, orden, tam_pagina=None, cursor=None):
+    """
+    Ejecuta una página de un listado.
+      select: "SELECT col1, col2, ..." (sin FROM)
+      desde: "FROM tabla t JOIN ..."
+      condiciones / params: filtros del listado (se unen con AND)
+      orden: [(expresion, "ASC"|"DESC"), ...] terminando en la clave primaria
+    Retorna (rows, siguiente): filas con solo las columnas de 'select' y el cursor
+    de la página siguiente (None si no hay más).
+    """
+    tam = int(tam_pagina or DB_TAM_PAGINA)
+    if tam <= 0:
+        raise ValueError("tam_pagina debe ser mayor que 0")
+    orden = [(expr, direccion.upper()) for expr, direccion in orden]
+    condiciones = list(condiciones)
+    params = list(params)
+    if cursor:
+        valores = decodificar_cursor(cursor)
+        if len(valores) != len(orden):
+            raise ValueError("Cursor de paginación inválido")
+        sql_cursor, params_cursor = _predicado(orden, valores)
+        condiciones.append(sql_cursor)
+        params.extend(params_cursor)
+
+    where = ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+    claves = ", ".join(expr for expr, _ in orden)
+    order_by = ", ".join(f"{expr} {direccion}" for expr, direccion in orden)
+    sql = f"{select}, {claves}\n{desde}\n{where}\nORDER BY {order_by}\nLIMIT %s"
+    params.append(tam + 1)  # una fila de más indica que hay página siguiente
+
+    rows, _ = ejecutar_lectura(sql, tuple(params))
+    k = len(orden)
+    siguiente = codificar_cursor(rows[tam - 1][-k:]) if len(rows) > tam else None
+    return [r[:-k] for r in rows[:tam]], siguiente
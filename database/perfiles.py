@@ -0,0 +1,174 @@
+"""
+Perfiles de conexión a MySQL para el SBE (LAN vs. nube/WAN).
+
+Cada perfil ajusta cómo habla el cliente con el servidor:
+  - compress: compresión del protocolo (menos bytes por el enlace, más CPU),
+  - cext: extensión C de mysql-connector si está instalada (si no, Python puro),
+  - tam_lote: filas por fetchmany() en las lecturas por lotes (ejecutar_stream, réplica),
+  - buffer_socket: SO_RCVBUF/SO_SNDBUF en bytes (0 = el del sistema) y TCP_NODELAY.
+    Solo aplica con el conector en Python puro (la extensión C no expone el socket)
+    y se fija tras conectar, así que no cambia el escalado de ventana ya negociado.
+
+SBE_DB_PERFIL elige el perfil; "auto" (por defecto) usa el que medir_perfiles()
+dejó registrado en SBE_DB_PERFIL_ARCHIVO para este host, o "lan" si no hay medición.
+"lan" es el comportamiento de siempre (Python puro, sin compresión).
+
+Medición: python scripts/medir_perfiles.py (o perfiles.medir_perfiles()).
+"""
+import json
+import os
+import socket
+import statistics
+from datetime import datetime
+from time import perf_counter
+
+import mysql.connector
+
+from database.config import DB_HOST, DB_PORT, DB_PERFIL, DB_PERFIL_ARCHIVO
+
+PERFILES = {
+    "lan": {"compress": False, "cext": False, "tam_lote": 500, "buffer_socket": 0},
+    "compresion": {"compress": True, "cext": False, "tam_lote": 2000, "buffer_socket": 1 << 20},
+    "wan_sin_compresion": {"compress": False, "cext": True, "tam_lote": 2000, "buffer_socket": 1 << 20},
+    "wan": {"compress": True, "cext": True, "tam_lote": 2000, "buffer_socket": 1 << 20},
+}
+
+HAY_CEXT = bool(getattr(mysql.connector, "HAVE_CEXT", False))
+
+
+def _registrado():
+    """Perfil ganador guardado por medir_perfiles() para el host actual, o None."""
+    try:
+        with open(DB_PERFIL_ARCHIVO, encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if datos.get("host") != DB_HOST or datos.get("puerto") != DB_PORT:
+        return None
+    return datos.get("mejor") if datos.get("mejor") in PERFILES else None
+
+
+def resolver(nombre: str | None = None):
+    """Retorna (nombre, opciones) del perfil pedido ('auto' = el medido o 'lan')."""
+    nombre = (nombre or DB_PERFIL or "auto").lower()
+    if nombre == "auto":
+        nombre = _registrado() or "lan"
+    elif nombre not in PERFILES:
+        print(f"[DB] Perfil de conexión desconocido '{nombre}', se usa 'lan'")
+        nombre = "lan"
+    perfil = dict(PERFILES[nombre])
+    if perfil["cext"] and not HAY_CEXT:
+        print(f"[DB] Perfil '{nombre}': extensión C de mysql-connector no disponible, se usa Python puro")
+    return nombre, perfil
+
+
+def opciones_conexion(perfil: dict) -> dict:
+    """Parámetros extra de mysql.connector.connect() para el perfil."""
+    opciones = {"use_pure": not (perfil["cext"] and HAY_CEXT)}
+    if perfil["compress"]:
+        opciones["compress"] = True
+    return opciones
+
+
+def ajustar_socket(cnx, perfil: dict):
+    """Buffers del socket y TCP_NODELAY tras conectar (solo conector en Python puro)."""
+    tam = perfil.get("buffer_socket") or 0
+    sock = getattr(getattr(cnx, "_socket", None), "sock", None)
+    if not tam or sock is None:
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, tam)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, tam)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (OSError, AttributeError):
+        pass
+
+
+# ---------- micro-benchmark ----------
+
+# ~5000 filas con texto comprimible, fechas y números: parecido a un listado grande
+_SQL_TRANSFERENCIA = """
+    WITH RECURSIVE n (i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000)
+    SELECT i, CONCAT('Actividad ', i), REPEAT('Jornada de limpieza y reciclaje ', 4),
+           CURRENT_DATE - INTERVAL (i % 365) DAY, i * 1.5
+    FROM n
+"""
+_SQL_LATENCIA = "SELECT 1"
+_CONSULTAS_POR_PANTALLA = 10  # consultas pequeñas típicas por cada listado grande
+
+
+def _medir_uno(config: dict, perfil: dict, repeticiones: int) -> dict:
+    t0 = perf_counter()
+    cnx = mysql.connector.connect(**config)
+    conexion = perf_counter() - t0
+    try:
+        ajustar_socket(cnx, perfil)
+        cursor = cnx.cursor()
+        latencias = []
+        for _ in range(repeticiones * 5):
+            t0 = perf_counter()
+            cursor.execute(_SQL_LATENCIA)
+            cursor.fetchall()
+            latencias.append(perf_counter() - t0)
+        transferencias = []
+        filas = 0
+        for _ in range(repeticiones):
+            t0 = perf_counter()
+            cursor.execute(_SQL_TRANSFERENCIA)
+            filas = 0
+            while True:
+                lote = cursor.fetchmany(perfil["tam_lote"])
+                if not lote:
+                    break
+                filas += len(lote)
+            transferencias.append(perf_counter() - t0)
+        cursor.close()
+    finally:
+        cnx.close()
+    latencia = statistics.median(latencias)
+    transferencia = statistics.median(transferencias)
+    return {
+        "conexion_ms": round(conexion * 1000, 1),
+        "latencia_ms": round(latencia * 1000, 2),
+        "transferencia_ms": round(transferencia * 1000, 1),
+        "filas": filas,
+        # Costo de una pantalla típica: varias consultas pequeñas y un listado grande
+        "puntaje_ms": round((latencia * _CONSULTAS_POR_PANTALLA + transferencia) * 1000, 1),
+        "extension_c": not config["use_pure"],
+    }
+
+
+def medir_perfiles(repeticiones: int = 3, guardar: bool = True) -> dict:
+    """
+    Mide cada perfil contra el host configurado (conexión nueva por perfil) y
+    retorna {"mejor": nombre, "resultados": {...}}. Con guardar=True escribe el
+    resultado en SBE_DB_PERFIL_ARCHIVO para que SBE_DB_PERFIL=auto lo use.
+    Los perfiles con extensión C se omiten si no está instalada.
+    """
+    from database.connection import _config_conexion
+
+    resultados = {}
+    for nombre, perfil in PERFILES.items():
+        if perfil["cext"] and not HAY_CEXT:
+            resultados[nombre] = {"omitido": "extensión C no disponible"}
+            continue
+        try:
+            resultados[nombre] = _medir_uno(_config_conexion(perfil), perfil, repeticiones)
+        except Exception as e:
+            resultados[nombre] = {"error": str(e)}
+    medidos = {n: r for n, r in resultados.items() if "puntaje_ms" in r}
+    mejor = min(medidos, key=lambda n: medidos[n]["puntaje_ms"]) if medidos else None
+    informe = {
+        "host": DB_HOST,
+        "puerto": DB_PORT,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "mejor": mejor,
+        "resultados": resultados,
+    }
+    if guardar and mejor:
+        carpeta = os.path.dirname(DB_PERFIL_ARCHIVO)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(DB_PERFIL_ARCHIVO, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+    return informe
@@ -0,0 +1,352 @@
+"""
+Gestor del pool de conexiones MySQL para el SBE.
+
+Reemplaza al MySQLConnectionPool fijo de 5 conexiones:
+  - tamaño configurable (SBE_DB_POOL_TAMANO),
+  - precalentamiento opcional en segundo plano al arrancar el proceso,
+  - checkout bloqueante con timeout y cola de espera por turnos (FIFO: quien llega
+    no se adelanta a los que ya esperan) en vez de PoolError,
+  - pings de keepalive a las conexiones ociosas para que el enlace remoto no se enfríe,
+  - reset de sesión perezoso opcional (solo si la conexión quedó "sucia"),
+  - contadores de espera, checkouts y reconexiones (estadisticas()),
+  - aviso opcional de éxitos/fallos de red a un interruptor de circuito (database/circuito.py).
+"""
+import threading
+from collections import deque
+from time import monotonic, perf_counter
+
+import mysql.connector
+from mysql.connector import Error
+
+from database import preparadas
+
+
+class PoolAgotadoError(RuntimeError):
+    """No se obtuvo una conexión libre dentro del timeout de checkout."""
+
+
+class ConexionPool:
+    """
+    Conexión prestada por el pool. Se comporta como la conexión de mysql.connector;
+    close() no la cierra sino que la devuelve al pool.
+    """
+
+    def __init__(self, gestor, cnx):
+        self._gestor = gestor
+        self._cnx = cnx
+        self._sucia = False
+
+    def __getattr__(self, nombre):
+        cnx = self.__dict__.get("_cnx")
+        if cnx is None:
+            raise AttributeError(f"La conexión ya fue devuelta al pool ({nombre})")
+        return getattr(cnx, nombre)
+
+    @property
+    def fisica(self):
+        """Conexión física de mysql.connector (clave de la caché de sentencias preparadas)."""
+        return self.__dict__.get("_cnx")
+
+    def marcar_sucia(self):
+        """Fuerza reset de sesión al devolverla (p. ej. tras cambiar variables de sesión)."""
+        self._sucia = True
+
+    def close(self):
+        cnx, self._cnx = self._cnx, None
+        if cnx is not None:
+            self._gestor._devolver(cnx, self._sucia)
+
+    def __del__(self):
+        # Guardia: una conexión olvidada sin close() se descarta en vez de perder el slot
+        cnx = self.__dict__.get("_cnx")
+        if cnx is not None:
+            self._cnx = None
+            try:
+                self._gestor._devolver(cnx, sucia=True, descartar=True)
+            except Exception:
+                pass
+
+
+class GestorPool:
+    """Pool de conexiones con checkout bloqueante, keepalive y métricas."""
+
+    def __init__(self, config_conexion: dict, tamano: int = 5, timeout_checkout: float = 10.0,
+                 keepalive_s: float = 120.0, reset_perezoso: bool = False, circuito=None,
+                 al_conectar=None):
+        self._config = dict(config_conexion)
+        self.tamano = max(1, int(tamano))
+        self.timeout_checkout = timeout_checkout
+        self.keepalive_s = keepalive_s
+        self.reset_perezoso = reset_perezoso
+        self.circuito = circuito    # objeto con exito()/fallo(error), o None
+        self.al_conectar = al_conectar  # función(cnx) tras cada conexión/reconexión física, o None
+
+        self._cond = threading.Condition()
+        self._libres = deque()      # (cnx, monotonic del último uso)
+        self._creadas = 0           # abiertas o en proceso de abrirse
+        self._turnos = deque()     # turnos de los checkouts en espera, en orden de llegada
+        self._cerrado = False
+        self._hilo_keepalive = None
+        self._parar = threading.Event()
+
+        self._m = {
+            "checkouts": 0,
+            "esperas": 0,
+            "espera_total_s": 0.0,
+            "espera_max_s": 0.0,
+            "timeouts": 0,
+            "creadas": 0,
+            "reconexiones": 0,
+            "descartadas": 0,
+            "resets": 0,
+            "pings": 0,
+            "max_en_cola": 0,
+        }
+
+    # ---------- conexiones físicas ----------
+
+    def _abrir(self):
+        try:
+            cnx = mysql.connector.connect(**self._config)
+        except Error as e:
+            self._avisar_fallo(e)
+            raise
+        self._avisar_exito()
+        self._conectada(cnx)
+        with self._cond:
+            self._m["creadas"] += 1
+        return cnx
+
+    def _conectada(self, cnx):
+        if self.al_conectar is not None:
+            try:
+                self.al_conectar(cnx)
+            except Exception as e:
+                print(f"[DB] Error ajustando conexión nueva: {e}")
+
+    def _avisar_exito(self):
+        if self.circuito is not None:
+            self.circuito.exito()
+
+    def _avisar_fallo(self, error):
+        if self.circuito is not None:
+            self.circuito.fallo(error)
+
+    def _cerrar_fisica(self, cnx):
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+    def _validar(self, cnx, ocioso_s):
+        """Comprueba una conexión ociosa antes de prestarla; reconecta si se cayó."""
+        if ocioso_s < self.keepalive_s:
+            return cnx
+        try:
+            cnx.ping(reconnect=False)
+            with self._cond:
+                self._m["pings"] += 1
+            return cnx
+        except Error:
+            preparadas.invalidar(cnx)
+            try:
+                cnx.reconnect(attempts=1, delay=0)
+            except Error as e:
+                self._avisar_fallo(e)
+                raise
+            self._avisar_exito()
+            self._conectada(cnx)
+            with self._cond:
+                self._m["reconexiones"] += 1
+            return cnx
+
+    # ---------- checkout / devolución ----------
+
+    def obtener(self, timeout: float | None = None) -> ConexionPool:
+        """
+        Presta una conexión. Si no hay libres y el pool está lleno, o ya hay otros
+        esperando, toma turno en la cola y espera (en orden de llegada) hasta
+        'timeout' segundos (por defecto timeout_checkout); luego lanza PoolAgotadoError.
+        Si el pool se cierra durante la espera lanza RuntimeError.
+        """
+        timeout = self.timeout_checkout if timeout is None else timeout
+        t0 = perf_counter()
+        limite = monotonic() + timeout
+        cnx = None
+        ocioso = 0.0
+        abrir = False
+        with self._cond:
+            turno = None
+            try:
+                while True:
+                    if self._cerrado:
+                        raise RuntimeError("El pool de conexiones está cerrado")
+                    hay_hueco = self._libres or self._creadas < self.tamano
+                    if hay_hueco and (not self._turnos or self._turnos[0] is turno):
+                        break
+                    restante = limite - monotonic()
+                    if restante <= 0:
+                        self._m["timeouts"] += 1
+                        raise PoolAgotadoError(
+                            f"Pool agotado: {self.tamano} conexiones en uso tras esperar {timeout:.1f}s"
+                        )
+                    if turno is None:
+                        turno = object()
+                        self._turnos.append(turno)
+                        self._m["max_en_cola"] = max(self._m["max_en_cola"], len(self._turnos))
+                    self._cond.wait(restante)
+            finally:
+                if turno is not None:
+                    self._turnos.remove(turno)
+                    self._cond.notify_all()  # el siguiente turno vuelve a mirar
+            if turno is not None:
+                espera = perf_counter() - t0
+                self._m["esperas"] += 1
+                self._m["espera_total_s"] += espera
+                self._m["espera_max_s"] = max(self._m["espera_max_s"], espera)
+            if self._libres:
+                cnx, t_uso = self._libres.pop()  # LIFO: la más caliente primero
+                ocioso = monotonic() - t_uso
+            else:
+                self._creadas += 1
+                abrir = True
+            self._m["checkouts"] += 1
+
+        try:
+            if abrir:
+                cnx = self._abrir()
+            else:
+                cnx = self._validar(cnx, ocioso)
+        except BaseException:
+            if cnx is not None:
+                self._cerrar_fisica(cnx)
+            with self._cond:
+                self._creadas -= 1
+                if not abrir:
+                    self._m["descartadas"] += 1
+                self._cond.notify_all()
+            raise
+        return ConexionPool(self, cnx)
+
+    def _devolver(self, cnx, sucia=False, descartar=False):
+        """Devuelve una conexión física al pool (o la descarta si está rota)."""
+        if not descartar:
+            # Sin is_connected(): costaría un ping extra por consulta. Una conexión
+            # rota falla en rollback/reset y se descarta aquí mismo.
+            try:
+                if getattr(cnx, "unread_result", False):
+                    cnx.consume_results()
+                if cnx.in_transaction:
+                    # Con autocommit=False (por defecto del conector) cualquier SELECT deja
+                    # una transacción abierta: el ROLLBACK basta, no hace falta resetear
+                    # la sesión. Si el ROLLBACK falla, la conexión se descarta (abajo).
+                    cnx.rollback()
+                if sucia or not self.reset_perezoso:
+                    preparadas.invalidar(cnx)  # el reset libera los statements en el servidor
+                    cnx.reset_session()
+                    with self._cond:
+                        self._m["resets"] += 1
+            except Exception:
+                descartar = True
+        with self._cond:
+            if descartar or self._cerrado:
+                self._creadas -= 1
+                self._m["descartadas"] += 1
+            else:
+                self._libres.append((cnx, monotonic()))
+            self._cond.notify_all()
+        if descartar or self._cerrado:
+            self._cerrar_fisica(cnx)
+
+    def descartar(self, conexion: ConexionPool):
+        """Devuelve una conexión prestada cerrándola (p. ej. con resultados sin leer)."""
+        cnx, conexion._cnx = conexion._cnx, None
+        if cnx is not None:
+            self._devolver(cnx, descartar=True)
+
+    # ---------- precalentamiento y keepalive ----------
+
+    def precalentar(self, cantidad: int | None = None, en_segundo_plano: bool = True):
+        """Abre 'cantidad' conexiones (todas por defecto) para que el primer login no pague el TLS."""
+        cantidad = self.tamano if cantidad is None else min(cantidad, self.tamano)
+
+        def _trabajo():
+            prestadas = []
+            try:
+                for _ in range(cantidad):
+                    prestadas.append(self.obtener())
+            except Exception as e:
+                print(f"[pool] precalentamiento incompleto ({len(prestadas)}/{cantidad}): {e}")
+            finally:
+                for c in prestadas:
+                    c.close()
+
+        if en_segundo_plano:
+            threading.Thread(target=_trabajo, name="sbe-pool-precalentar", daemon=True).start()
+        else:
+            _trabajo()
+
+    def iniciar_keepalive(self):
+        """Arranca (una sola vez) el hilo que hace ping a las conexiones ociosas."""
+        if self.keepalive_s <= 0 or self._hilo_keepalive is not None:
+            return
+        self._hilo_keepalive = threading.Thread(target=self._bucle_keepalive, name="sbe-pool-keepalive", daemon=True)
+        self._hilo_keepalive.start()
+
+    def _bucle_keepalive(self):
+        intervalo = max(1.0, self.keepalive_s / 2)
+        while not self._parar.wait(intervalo):
+            with self._cond:
+                ahora = monotonic()
+                viejas = [item for item in self._libres if ahora - item[1] >= self.keepalive_s]
+                for item in viejas:
+                    self._libres.remove(item)
+            for cnx, _ in viejas:
+                descartar = False
+                try:
+                    hilo_servidor = cnx.connection_id
+                    cnx.ping(reconnect=True, attempts=1, delay=0)
+                    if cnx.connection_id != hilo_servidor:
+                        preparadas.invalidar(cnx)
+                        self._conectada(cnx)
+                    with self._cond:
+                        self._m["pings"] += 1
+                except Exception as e:
+                    descartar = True
+                    self._avisar_fallo(e)
+                with self._cond:
+                    if descartar or self._cerrado:
+                        self._creadas -= 1
+                        self._m["descartadas"] += 1
+                    else:
+                        self._libres.append((cnx, monotonic()))
+                    self._cond.notify_all()
+                if descartar or self._cerrado:
+                    self._cerrar_fisica(cnx)
+
+    def cerrar(self):
+        """Cierra las conexiones libres; las prestadas se cierran al devolverse."""
+        with self._cond:
+            self._cerrado = True
+            self._parar.set()
+            libres = [cnx for cnx, _ in self._libres]
+            self._creadas -= len(libres)
+            self._libres.clear()
+            self._cond.notify_all()
+        for cnx in libres:
+            self._cerrar_fisica(cnx)
+
+    # ---------- métricas ----------
+
+    def estadisticas(self) -> dict:
+        with self._cond:
+            m = dict(self._m)
+            m.update({
+                "tamano": self.tamano,
+                "abiertas": self._creadas,
+                "libres": len(self._libres),
+                "en_uso": self._creadas - len(self._libres),
+                "en_cola": len(self._turnos),
+            })
+        m["espera_promedio_s"] = round(m["espera_total_s"] / m["esperas"], 4) if m["esperas"] else 0.0
+        return m
@@ -0,0 +1,259 @@
+"""
+Caché de sentencias preparadas (protocolo binario) por conexión del pool.
+
+Con SBE_DB_PREPARADAS=1, las consultas de ejecutar()/ejecutar_modificar() que
+se repiten (SBE_DB_PREPARADAS_MIN_USOS veces en el proceso) se preparan una vez
+por conexión física y las siguientes ejecuciones solo envían el id del
+statement y los parámetros, sin volver a enviar ni parsear el SQL.
+
+  - LRU de SBE_DB_PREPARADAS_MAX statements por conexión (los desalojados se
+    cierran con COM_STMT_CLOSE).
+  - Se invalida al reconectar y al resetear la sesión (COM_RESET_CONNECTION
+    libera los statements en el servidor): con reset en cada checkout la caché
+    no sobrevive, por eso conviene combinarla con SBE_DB_POOL_RESET_PEREZOSO=1.
+  - La telemetría etiqueta estas consultas con "[bin]" para compararlas con el
+    protocolo de texto; comparar_protocolos() mide ambos sobre una misma consulta
+    y cuántas veces el statement se reutilizó entre checkouts del pool
+    (estadisticas() lleva la cuenta de la app).
+  - _CursorPreparado usa atributos privados del conector (versión fijada en
+    requirements.txt). Al importar se comprueba que existan; si faltan (otra
+    versión) se usa el cursor preparado estándar, que siempre envía el reset.
+"""
+import re
+import threading
+from collections import Counter, OrderedDict
+from time import perf_counter
+
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.cursor import MySQLCursorPrepared
+
+from database.config import DB_PREPARADAS, DB_PREPARADAS_MAX, DB_PREPARADAS_MIN_USOS
+
+_RE_PREPARABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE)\b", re.I)
+_RE_NOMBRE = re.compile(r"%\((\w+)\)s")
+_RE_MARCADOR_NOMBRE = re.compile(r"%\(\w+\)s")
+_MAX_CONTADOR = 2000
+
+_usos = Counter()
+_usos_lock = threading.Lock()
+_m = {"preparadas": 0, "reutilizadas": 0}
+
+
+class _CursorPreparado(MySQLCursorPrepared):
+    """
+    Cursor preparado que, al re-ejecutar el mismo statement, omite el
+    COM_STMT_RESET del conector (un viaje extra al servidor que solo hace falta
+    para datos enviados en 'long data', que aquí no se usan).
+    """
+
+    def execute(self, operation, params=None, map_results=False):
+        if self._prepared and operation is self._executed and not map_results:
+            if params is not None and not isinstance(params, (tuple, list)):
+                return super().execute(operation, params)
+            params = tuple(params or ())
+            if len(self._prepared["parameters"]) != len(params):
+                return super().execute(operation, params)
+            self._handle_result(
+                self._connection.cmd_stmt_execute(
+                    self._prepared["statement_id"],
+                    data=params,
+                    parameters=self._prepared["parameters"],
+                )
+            )
+            return None
+        return super().execute(operation, params)
+
+
+def _internos_disponibles() -> bool:
+    """True si el conector instalado tiene lo que _CursorPreparado usa por dentro."""
+    try:
+        cursor = MySQLCursorPrepared()
+    except Exception:
+        return False
+    return (
+        all(hasattr(cursor, a) for a in ("_prepared", "_executed", "_connection", "_handle_result"))
+        and callable(getattr(MySQLConnection, "cmd_stmt_execute", None))
+    )
+
+
+_CLASE_CURSOR = _CursorPreparado if _internos_disponibles() else MySQLCursorPrepared
+if DB_PREPARADAS and _CLASE_CURSOR is MySQLCursorPrepared:
+    print("[DB] Conector MySQL sin los internos esperados: sentencias preparadas con el cursor estándar")
+
+
+def _cache(cnx):
+    cache = getattr(cnx, "_sbe_preparadas", None)
+    if cache is None:
+        cache = OrderedDict()
+        cnx._sbe_preparadas = cache
+    return cache
+
+
+def _frecuente(consulta) -> bool:
+    with _usos_lock:
+        if len(_usos) > _MAX_CONTADOR:
+            _usos.clear()
+        _usos[consulta] += 1
+        return _usos[consulta] >= DB_PREPARADAS_MIN_USOS
+
+
+def _a_posicional(consulta):
+    """Convierte una consulta con %(nombre)s en (sql con ?, orden de claves)."""
+    claves = tuple(_RE_NOMBRE.findall(consulta))
+    return _RE_MARCADOR_NOMBRE.sub("?", consulta), claves
+
+
+def cursor_para(conn, consulta, params=None):
+    """
+    Retorna (cursor, sql, params_posicionales) preparados para 'consulta' en esta
+    conexión, o None si no aplica (desactivado, poco frecuente o no preparable).
+    El cursor devuelto pertenece a la caché: no se debe cerrar.
+    """
+    if not DB_PREPARADAS or not _RE_PREPARABLE.match(consulta):
+        return None
+    return _preparada(getattr(conn, "fisica", conn), consulta, params, _frecuente)
+
+
+def _preparada(cnx, consulta, params, preparar=None):
+    """cursor_para() sin las condiciones de activación; 'preparar(consulta)' decide si preparar una nueva."""
+    cache = _cache(cnx)
+    entrada = cache.get(consulta)
+    if entrada is not None:
+        cache.move_to_end(consulta)
+        with _usos_lock:
+            _m["reutilizadas"] += 1
+    else:
+        if preparar is not None and not preparar(consulta):
+            return None
+        with _usos_lock:
+            _m["preparadas"] += 1
+        if isinstance(cnx, MySQLConnection):
+            cursor = cnx.cursor(cursor_class=_CLASE_CURSOR)
+        else:
+            cursor = cnx.cursor(prepared=True)  # extensión C: cursor preparado estándar
+        claves = None
+        sql = consulta
+        if isinstance(params, dict):
+            sql, claves = _a_posicional(consulta)
+        # Sin interpolación en cliente, '%%' no se convierte en '%'
+        if params:
+            sql = sql.replace("%%", "%")
+        entrada = cache[consulta] = (cursor, sql, claves)
+        while len(cache) > DB_PREPARADAS_MAX:
+            _, (viejo, _, _) = cache.popitem(last=False)
+            try:
+                viejo.close()
+            except Exception:
+                pass
+    cursor, sql, claves = entrada
+    if claves is not None:
+        if not isinstance(params, dict):
+            return None
+        args = tuple(params[k] for k in claves)
+    elif isinstance(params, dict):
+        return None
+    else:
+        args = tuple(params or ())
+    return cursor, sql, args
+
+
+def descartar(conn, consulta):
+    """Quita (y cierra) el statement de 'consulta' tras un error en esta conexión."""
+    cnx = getattr(conn, "fisica", conn)
+    entrada = _cache(cnx).pop(consulta, None)
+    if entrada is not None:
+        try:
+            entrada[0].close()
+        except Exception:
+            pass
+
+
+def invalidar(cnx):
+    """
+    Olvida todos los statements de una conexión física. Se llama tras reconectar o
+    resetear la sesión: el servidor ya los liberó, así que no se envía COM_STMT_CLOSE.
+    """
+    cache = getattr(cnx, "_sbe_preparadas", None)
+    if cache:
+        for cursor, _, _ in cache.values():
+            try:
+                cursor._prepared = None
+            except Exception:
+                pass
+        cache.clear()
+
+
+def estadisticas() -> dict:
+    """Statements preparados y re-ejecuciones servidas desde la caché (sin volver a preparar)."""
+    with _usos_lock:
+        return dict(_m)
+
+
+def comparar_protocolos(consulta, params=None, repeticiones=20) -> dict:
+    """
+    Ejecuta 'consulta' 'repeticiones' veces con protocolo de texto y otras tantas
+    preparada (sobre la misma conexión) y retorna los tiempos medios en ms.
+    Después la repite 'repeticiones' veces pidiendo y devolviendo una conexión
+    del pool en cada una (como ejecutar()) y cuenta en cuántas el statement
+    seguía preparado: con SBE_DB_POOL_RESET_PEREZOSO=1 deben ser todas menos
+    la primera (por conexión física); con reset en cada devolución, ninguna.
+    """
+    from database.connection import get_connection
+
+    conn = get_connection()
+    try:
+        cnx = getattr(conn, "fisica", conn)
+        t0 = perf_counter()
+        for _ in range(repeticiones):
+            cur = cnx.cursor()
+            cur.execute(consulta, params or ())
+            cur.fetchall()
+            cur.close()
+        t_texto = perf_counter() - t0
+
+        if isinstance(cnx, MySQLConnection):
+            cur = cnx.cursor(cursor_class=_CLASE_CURSOR)
+        else:
+            cur = cnx.cursor(prepared=True)
+        sql, args = consulta, tuple(params or ())
+        if isinstance(params, dict):
+            sql, claves = _a_posicional(consulta)
+            args = tuple(params[k] for k in claves)
+        if params:
+            sql = sql.replace("%%", "%")
+        t0 = perf_counter()
+        cur.execute(sql, args)
+        cur.fetchall()
+        t_preparar = perf_counter() - t0
+        t0 = perf_counter()
+        for _ in range(repeticiones - 1):
+            cur.execute(sql, args)
+            cur.fetchall()
+        t_binario = perf_counter() - t0
+        cur.close()
+    finally:
+        conn.close()
+
+    reutilizadas = 0
+    fisicas = set()
+    for _ in range(repeticiones):
+        conn = get_connection()
+        try:
+            cnx = getattr(conn, "fisica", conn)
+            fisicas.add(id(cnx))
+            reutilizadas += consulta in _cache(cnx)
+            cur, sql, args = _preparada(cnx, consulta, params)
+            cur.execute(sql, args)
+            cur.fetchall()
+        finally:
+            conn.close()
+    n = max(1, repeticiones - 1)
+    return {
+        "repeticiones": repeticiones,
+        "texto_ms": round(t_texto / repeticiones * 1000, 3),
+        "preparar_ms": round(t_preparar * 1000, 3),
+        "binario_ms": round(t_binario / n * 1000, 3),
+        "ahorro_pct": round((1 - (t_binario / n) / (t_texto / repeticiones)) * 100, 1) if t_texto else 0.0,
+        "reutilizadas_entre_checkouts": reutilizadas,
+        "conexiones_fisicas": len(fisicas),
+    }
@@ -0,0 +1,183 @@
+"""
+Registros compactos (__slots__) para las filas de los listados del SBE.
+
+Cada fila de un listado era un dict propio (dict(zip(columnas, fila)),
+cursor(dictionary=True) o un dict escrito a mano). Un objeto con __slots__
+guarda los valores en posiciones fijas, sin tabla hash por fila, y ocupa
+bastante menos memoria en listados grandes (ver scripts/medir_registros.py).
+
+Los registros se comportan como dict de solo-lectura para las pantallas:
+r["titulo"], r.get("estado"), "cedula" in r, r.keys()/items(), dict(r);
+además admiten r["campo"] = valor y r.setdefault() sobre sus campos.
+Alias: r["id"] y r["brigada"] en Actividad equivalen a idActividad y
+nombre_brigada, así que sirven las dos formas que usaban las consultas.
+
+Los usuarios de sesión (login) siguen siendo dict: se serializan a JSON.
+"""
+
+# (clase, campos) -> función filas -> [registros]
+_constructores = {}
+
+
+def _generar_constructor(cls, campos):
+    """
+    Genera (una vez por forma de SELECT) un bucle con las asignaciones escritas,
+    como hacen namedtuple/dataclasses: es más rápido que un setattr por columna
+    e incluso que dict(zip(...)). Los nombres se validan contra __slots__.
+    """
+    desconocidos = [c for c in campos if c not in cls.__slots__]
+    if desconocidos:
+        raise ValueError(f"{cls.__name__}: columnas sin campo {desconocidos}")
+    if len(set(campos)) != len(campos):
+        raise ValueError(f"{cls.__name__}: columnas repetidas {list(campos)}")
+    variables = ", ".join(f"v{i}" for i in range(len(campos)))
+    asignaciones = "; ".join(f"r.{c} = v{i}" for i, c in enumerate(campos)) or "pass"
+    codigo = (
+        "def construir(filas):\n"
+        "    resultado = []\n"
+        f"    for ({variables}{',' if len(campos) == 1 else ''}) in filas:\n"
+        f"        r = nuevo(cls); {asignaciones}\n"
+        "        resultado.append(r)\n"
+        "    return resultado\n"
+    ) if campos else "def construir(filas):\n    return [nuevo(cls) for _ in filas]\n"
+    espacio = {"nuevo": object.__new__, "cls": cls}
+    exec(codigo, espacio)
+    return espacio["construir"]
+
+
+class Registro:
+    """Base de los registros: acceso estilo dict sobre __slots__."""
+
+    __slots__ = ()
+    _ALIAS = {}
+
+    def __init__(self, **campos):
+        for nombre, valor in campos.items():
+            setattr(self, self._ALIAS.get(nombre, nombre), valor)
+
+    @classmethod
+    def desde_filas(cls, columnas, filas) -> list:
+        """Construye un registro por fila; 'columnas' son los nombres del SELECT (description)."""
+        campos = tuple(cls._ALIAS.get(c, c) for c in columnas)
+        constructor = _constructores.get((cls, campos))
+        if constructor is None:
+            constructor = _constructores[(cls, campos)] = _generar_constructor(cls, campos)
+        return constructor(filas)
+
+    @classmethod
+    def desde_cursor(cls, cursor) -> list:
+        """Lee todas las filas de un cursor (no dictionary) como registros."""
+        return cls.desde_filas([d[0] for d in cursor.description or ()], cursor.fetchall())
+
+    # ---------- compatibilidad con dict ----------
+
+    def __getitem__(self, clave):
+        try:
+            return getattr(self, self._ALIAS.get(clave, clave))
+        except (AttributeError, TypeError):
+            raise KeyError(clave) from None
+
+    def __setitem__(self, clave, valor):
+        try:
+            setattr(self, self._ALIAS.get(clave, clave), valor)
+        except AttributeError:
+            raise KeyError(f"{type(self).__name__} no tiene el campo {clave!r}") from None
+
+    def get(self, clave, defecto=None):
+        try:
+            return getattr(self, self._ALIAS.get(clave, clave))
+        except (AttributeError, TypeError):
+            return defecto
+
+    def setdefault(self, clave, defecto=None):
+        try:
+            return self[clave]
+        except KeyError:
+            self[clave] = defecto
+            return defecto
+
+    def __contains__(self, clave):
+        return hasattr(self, self._ALIAS.get(clave, clave)) if isinstance(clave, str) else False
+
+    def keys(self):
+        return [c for c in self.__slots__ if hasattr(self, c)]
+
+    def values(self):
+        return [getattr(self, c) for c in self.keys()]
+
+    def items(self):
+        return [(c, getattr(self, c)) for c in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def como_dict(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, otro):
+        if isinstance(otro, Registro):
+            return type(self) is type(otro) and self.items() == otro.items()
+        if isinstance(otro, dict):
+            return self.como_dict() == otro
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        campos = ", ".join(f"{c}={v!r}" for c, v in self.items())
+        return f"{type(self).__name__}({campos})"
+
+
+class Actividad(Registro):
+    __slots__ = (
+        "idActividad", "titulo", "descripcion", "fecha_inicio", "fecha_fin", "estado",
+        "Brigada_idBrigada", "creador_id", "nombre_brigada",
+    )
+    _ALIAS = {"id": "idActividad", "brigada": "nombre_brigada"}
+
+
+class Turno(Registro):
+    __slots__ = (
+        "id", "fecha", "hora_inicio", "hora_fin", "ubicacion", "notas", "estado",
+        "brigada", "color", "profesor_id", "brigada_id",
+    )
+
+
+class Reporte(Registro):
+    """Reporte de incidente (reporte_incidente)."""
+    __slots__ = (
+        "id", "titulo", "descripcion", "ubicacion", "prioridad", "estado", "fecha",
+        "brigada", "color_brigada",
+    )
+
+
+class ReporteActividad(Registro):
+    __slots__ = (
+        "id", "resumen", "resultado", "fecha_reporte", "actividad_titulo", "actividad_fecha",
+        "usuario_nombre", "participantes",
+    )
+
+
+class ReporteImpacto(Registro):
+    __slots__ = (
+        "id", "contenido", "fecha_generacion", "actividad_titulo", "usuario_nombre", "brigada",
+        "area_evaluada", "indicador", "valor", "unidad",
+    )
+
+
+class Brigada(Registro):
+    __slots__ = (
+        "idBrigada", "nombre_brigada", "area_accion", "descripcion", "coordinador",
+        "color_identificador", "tipo_brigada", "fecha_creacion", "Institucion_Educativa_idInstitucion",
+        "profesor_id", "subjefe_id", "profesor_nombre", "profesor_apellido", "num_miembros", "es_propia",
+    )
+
+
+class Usuario(Registro):
+    __slots__ = (
+        "idUsuario", "nombre", "apellido", "cedula", "email", "rol", "Brigada_idBrigada",
+        "nombre_brigada",
+    )
@@ -0,0 +1,389 @@
+"""
+Réplica local (SQLite) de lectura para el SBE, sincronizada por deltas.
+
+Con una conexión lenta cada pantalla espera al servidor remoto. Con
+SBE_DB_REPLICA=1 se mantiene una copia local de brigada, usuario, actividad,
+turno y las tablas de reportes en un archivo SQLite (SBE_DB_REPLICA_ARCHIVO):
+
+  - un hilo en segundo plano ("sbe-db-replica") sincroniza cada
+    SBE_DB_REPLICA_INTERVALO_S segundos trayendo solo lo nuevo: filas con id
+    mayor que el último visto (marca de agua) y, en las tablas con columna de
+    modificación (reporte_incidente.actualizado_en), las modificadas desde la
+    última marca,
+  - las demás columnas de fecha (creado_en, fecha_reporte, fecha_generacion) solo
+    registran la creación, así que ediciones y borrados de otros equipos se
+    recogen con una copia completa cada SBE_DB_REPLICA_COMPLETA_S segundos,
+  - toda escritura de este proceso (database.cache.invalidar) marca la tabla como
+    sucia: deja de leerse de la réplica y se copia completa en el siguiente ciclo,
+    así quien escribe ve su propio cambio,
+  - connection.ejecutar_lectura() sirve una SELECT desde la réplica si todas sus
+    tablas están replicadas y sincronizadas hace menos de SBE_DB_REPLICA_MAX_EDAD_S;
+    si no (o si el SQL no es compatible con SQLite) va a MySQL. Con el circuito
+    abierto (servidor caído) se sirve la copia aunque sea vieja,
+  - solo se sirven las consultas que SQLite resuelve igual que MySQL (ver
+    equivalente()): columnas tal cual y COUNT(), sin funciones, CASE, aritmética
+    ni LIKE. SQLite no da el mismo resultado en CONCAT con NULL ni en la
+    comparación con acentos, y una columna calculada llega como str en vez de
+    date/Decimal (solo las columnas de tabla tienen tipo declarado).
+
+Un borrado hecho en otro equipo sigue visible en la réplica hasta la siguiente
+copia completa de la tabla: hasta SBE_DB_REPLICA_COMPLETA_S (300 s por defecto).
+
+Las columnas sensibles (usuario.contrasena) no se copian: las consultas que las
+usan siempre van al servidor.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from mysql.connector import FieldType
+
+from database.config import (
+    DB_REPLICA,
+    DB_REPLICA_ARCHIVO,
+    DB_REPLICA_INTERVALO_S,
+    DB_REPLICA_MAX_EDAD_S,
+    DB_REPLICA_COMPLETA_S,
+)
+from database import cache
+
+# tabla -> (clave primaria, columna de modificación o None)
+TABLAS = {
+    "brigada": ("idBrigada", None),
+    "usuario": ("idUsuario", None),
+    "actividad": ("idActividad", None),
+    "turno": ("idTurno", None),
+    "reporte_incidente": ("idReporte", "actualizado_en"),
+    "reporte_actividad": ("idReporte_actividad", None),
+    "reporte_de_impacto": ("idReporte_impacto", None),
+}
+
+# Columnas que nunca salen del servidor
+EXCLUIDAS = {"usuario": {"contrasena"}}
+
+_lock = threading.Lock()
+_local = threading.local()
+_despertar = threading.Event()
+_hilo = None
+
+_frescas = {}        # tabla -> monotonic() de la última sincronización correcta
+_sucias = set()      # tablas con escrituras locales pendientes de copiar
+_con_datos = set()   # tablas con al menos una copia completa en el archivo
+_ultima_completa = {}  # tabla -> monotonic() de la última copia completa
+_incompatibles = OrderedDict()  # SQL que SQLite no acepta (no se reintentan)
+
+_m = {
+    "lecturas": 0,
+    "rechazos": 0,
+    "errores_sql": 0,
+    "no_equivalentes": 0,
+    "ciclos": 0,
+    "copias_completas": 0,
+    "filas_delta": 0,
+    "errores_sync": 0,
+}
+
+# ---------- tipos ----------
+
+_FECHA, _FECHAHORA, _HORA, _DECIMAL = "SBE_FECHA", "SBE_FECHAHORA", "SBE_HORA", "SBE_DECIMAL"
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" "))
+sqlite3.register_adapter(timedelta, lambda v: int(v.total_seconds()))
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter(_FECHA, lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter(_FECHAHORA, lambda b: datetime.fromisoformat(b.decode()))
+sqlite3.register_converter(_HORA, lambda b: timedelta(seconds=int(b)))
+sqlite3.register_converter(_DECIMAL, lambda b: Decimal(b.decode()))
+
+
+def _tipo_sqlite(tipo_mysql) -> str:
+    if tipo_mysql in (FieldType.DATE, FieldType.NEWDATE):
+        return _FECHA
+    if tipo_mysql in (FieldType.DATETIME, FieldType.TIMESTAMP):
+        return _FECHAHORA
+    if tipo_mysql == FieldType.TIME:
+        return _HORA
+    if tipo_mysql in (FieldType.DECIMAL, FieldType.NEWDECIMAL):
+        return _DECIMAL
+    if tipo_mysql in (FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG,
+                      FieldType.INT24, FieldType.YEAR, FieldType.BIT):
+        return "INTEGER"
+    if tipo_mysql in (FieldType.FLOAT, FieldType.DOUBLE):
+        return "REAL"
+    # utf8_general_ci no distingue mayúsculas: mismo orden en ORDER BY nombre
+    return "TEXT COLLATE NOCASE"
+
+
+# ---------- archivo local ----------
+
+def _conexion_local():
+    """Una conexión SQLite por hilo (WAL: las lecturas no esperan a la sincronización)."""
+    cnx = getattr(_local, "cnx", None)
+    if cnx is None:
+        carpeta = os.path.dirname(DB_REPLICA_ARCHIVO)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        cnx = sqlite3.connect(DB_REPLICA_ARCHIVO, detect_types=sqlite3.PARSE_DECLTYPES, timeout=30)
+        cnx.execute("PRAGMA journal_mode=WAL")
+        cnx.execute("PRAGMA synchronous=NORMAL")
+        cnx.execute(
+            "CREATE TABLE IF NOT EXISTS _sbe_sync ("
+            " tabla TEXT PRIMARY KEY, columnas TEXT NOT NULL, max_id INTEGER, marca TEXT)"
+        )
+        _local.cnx = cnx
+    return cnx
+
+
+def _leer_meta(cnx, tabla):
+    fila = cnx.execute("SELECT columnas, max_id, marca FROM _sbe_sync WHERE tabla = ?", (tabla,)).fetchone()
+    return fila or (None, None, None)
+
+
+def _esquema_remoto(tabla):
+    """Columnas y tipos de la tabla en MySQL (SELECT * ... LIMIT 0)."""
+    from database.connection import ejecutar
+    _, description = ejecutar(f"SELECT * FROM `{tabla}` LIMIT 0")
+    excluidas = EXCLUIDAS.get(tabla, ())
+    return [(d[0], _tipo_sqlite(d[1])) for d in description if d[0] not in excluidas]
+
+
+def _crear_tabla_local(cnx, tabla, pk, columnas):
+    definicion = ", ".join(f'"{c}" {t}' for c, t in columnas)
+    cnx.execute(f'DROP TABLE IF EXISTS "{tabla}"')
+    cnx.execute(f'CREATE TABLE "{tabla}" ({definicion}, PRIMARY KEY ("{pk}"))')
+    # Claves foráneas (Brigada_idBrigada, profesor_id, ...): filtros de los listados
+    for c, _ in columnas:
+        if c != pk and "_id" in c:
+            cnx.execute(f'CREATE INDEX "ix_{tabla}_{c}" ON "{tabla}" ("{c}")')
+
+
+# ---------- sincronización ----------
+
+def _sincronizar_tabla(tabla, completa=False):
+    from database.connection import ejecutar_stream
+
+    pk, col_marca = TABLAS[tabla]
+    cnx = _conexion_local()
+    columnas = _esquema_remoto(tabla)
+    firma = ",".join(f"{c}:{t}" for c, t in columnas)
+    firma_local, max_id, marca = _leer_meta(cnx, tabla)
+    if firma_local != firma:
+        completa = True  # tabla nueva o migración aplicada en el servidor
+    nombres = [c for c, _ in columnas]
+    i_pk = nombres.index(pk)
+    i_marca = nombres.index(col_marca) if col_marca in nombres else None
+
+    select = "SELECT " + ", ".join(f"`{c}`" for c in nombres) + f" FROM `{tabla}`"
+    params = ()
+    if not completa:
+        condiciones = [f"`{pk}` > %s"]
+        params = (max_id or 0,)
+        if i_marca is not None and marca:
+            # >= : las filas de la misma marca se vuelven a traer (el upsert es idempotente)
+            condiciones.append(f"`{col_marca}` >= %s")
+            params += (datetime.fromisoformat(marca),)
+        select += " WHERE " + " OR ".join(condiciones)
+
+    lista = ", ".join(f'"{c}"' for c in nombres)
+    insertar = f'INSERT OR REPLACE INTO "{tabla}" ({lista}) VALUES ({", ".join("?" * len(nombres))})'
+    filas = 0
+    with cnx:  # una transacción (DDL incluido): los lectores ven la copia anterior hasta el commit
+        cnx.execute("BEGIN IMMEDIATE")
+        if completa:
+            _crear_tabla_local(cnx, tabla, pk, columnas)
+            max_id, marca = None, None
+        for lote in ejecutar_stream(select, params, por_lotes=True):  # lote del perfil de conexión
+            cnx.executemany(insertar, lote)
+            filas += len(lote)
+            for fila in lote:
+                if max_id is None or fila[i_pk] > max_id:
+                    max_id = fila[i_pk]
+                if i_marca is not None and fila[i_marca] is not None:
+                    valor = fila[i_marca].isoformat(" ")
+                    if marca is None or valor > marca:
+                        marca = valor
+        cnx.execute(
+            "INSERT OR REPLACE INTO _sbe_sync (tabla, columnas, max_id, marca) VALUES (?, ?, ?, ?)",
+            (tabla, firma, max_id, marca),
+        )
+    return completa, filas
+
+
+def sincronizar(completa=False) -> dict:
+    """
+    Un ciclo de sincronización de todas las tablas replicadas.
+    Retorna {tabla: "completa" | "delta" | "error: ..."}.
+    """
+    resultado = {}
+    with _lock:
+        _m["ciclos"] += 1
+    for tabla in TABLAS:
+        with _lock:
+            sucia = tabla in _sucias
+            _sucias.discard(tabla)
+        vencida = time.monotonic() - _ultima_completa.get(tabla, float("-inf")) >= DB_REPLICA_COMPLETA_S
+        inicio = time.monotonic()
+        try:
+            fue_completa, filas = _sincronizar_tabla(tabla, completa or sucia or vencida)
+        except Exception as e:
+            with _lock:
+                _m["errores_sync"] += 1
+                if sucia:
+                    _sucias.add(tabla)
+            resultado[tabla] = f"error: {e}"
+            continue
+        with _lock:
+            if tabla not in _sucias:  # otra escritura llegó durante la copia
+                _frescas[tabla] = inicio
+            _con_datos.add(tabla)
+            if fue_completa:
+                _m["copias_completas"] += 1
+                _ultima_completa[tabla] = inicio
+            else:
+                _m["filas_delta"] += filas
+        resultado[tabla] = "completa" if fue_completa else "delta"
+    return resultado
+
+
+def _bucle():
+    while True:
+        try:
+            resultado = sincronizar()
+            errores = {t: r for t, r in resultado.items() if r.startswith("error")}
+            if errores and len(errores) == len(resultado):
+                print(f"[DB] Réplica: sin sincronizar ({next(iter(errores.values()))})")
+        except Exception as e:
+            print(f"[DB] Réplica: error en la sincronización: {e}")
+        _despertar.wait(DB_REPLICA_INTERVALO_S)
+        _despertar.clear()
+
+
+def iniciar_sincronizacion():
+    """Arranca el hilo de sincronización (una sola vez). No hace nada si SBE_DB_REPLICA=0."""
+    global _hilo
+    if not DB_REPLICA:
+        return
+    with _lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle, name="sbe-db-replica", daemon=True)
+            _hilo.start()
+
+
+def _al_invalidar(tablas):
+    marcadas = False
+    with _lock:
+        for t in tablas:
+            if t in TABLAS:
+                _sucias.add(t)
+                _frescas.pop(t, None)
+                marcadas = True
+    if marcadas:
+        _despertar.set()
+
+
+if DB_REPLICA:
+    cache.al_invalidar(_al_invalidar)
+
+
+# ---------- lectura ----------
+
+_RE_TABLAS = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.I)
+_RE_PARAM_NOMBRE = re.compile(r"%\((\w+)\)s")
+
+# Lo único que puede ir seguido de "(" en una consulta servida por la réplica
+_ANTES_DE_PARENTESIS = {"COUNT", "IN", "AND", "OR", "NOT", "WHERE", "ON", "EXISTS"}
+_RE_LLAMADA = re.compile(r"\b(\w+)\s*\(")
+_RE_NO_EQUIVALENTE = re.compile(r"\b(?:CASE|INTERVAL|DIV|LIKE|REGEXP|COLLATE|UNION)\b|[+/|]|\s-\s", re.I)
+_RE_COLUMNA = re.compile(
+    r"(?:(?:\w+\.)?(?:\w+|\*)|COUNT\(\s*(?:\*|(?:\w+\.)?\w+)\s*\))(?:\s+AS\s+\w+)?", re.I
+)
+_RE_SELECT = re.compile(r"^\s*SELECT\s+(.*?)\s+FROM\s", re.I | re.S)
+
+
+def equivalente(consulta) -> bool:
+    """
+    True si SQLite devuelve para 'consulta' lo mismo que MySQL, con los mismos
+    tipos: la lista del SELECT son columnas tal cual o COUNT(), y en el resto
+    no hay funciones (CONCAT, IFNULL, DATE_FORMAT...), CASE, aritmética, LIKE
+    ni subconsultas. Las demás van al servidor.
+    """
+    if _RE_NO_EQUIVALENTE.search(consulta):
+        return False
+    if any(n.upper() not in _ANTES_DE_PARENTESIS for n in _RE_LLAMADA.findall(consulta)):
+        return False
+    lista = _RE_SELECT.match(consulta)
+    if lista is None or "(SELECT" in consulta.upper().replace("( ", "("):
+        return False
+    return all(_RE_COLUMNA.fullmatch(c.strip()) for c in lista.group(1).split(","))
+
+
+def _traducir(consulta, params):
+    """Marcadores de mysql-connector (%s, %(x)s, %%) a los de sqlite3 (?, :x, %)."""
+    if params is None:
+        return consulta, ()
+    if isinstance(params, dict):
+        sql = _RE_PARAM_NOMBRE.sub(r":\1", consulta)
+    else:
+        sql = consulta.replace("%s", "?")
+        params = tuple(params)
+    return sql.replace("%%", "%"), params
+
+
+def consultar(consulta, params=None, sin_servidor=False):
+    """
+    (rows, description) desde la réplica, o None si la consulta debe ir a MySQL:
+    réplica desactivada, no es SELECT, usa tablas no replicadas, SQLite no la
+    resolvería igual (equivalente()), alguna tabla no está fresca (salvo
+    sin_servidor=True y haya copia) o SQLite no acepta el SQL.
+    """
+    if not DB_REPLICA or consulta.lstrip()[:6].upper() != "SELECT":
+        return None
+    tablas = {t.lower() for t in _RE_TABLAS.findall(consulta)}
+    if not tablas or not tablas <= TABLAS.keys() or consulta in _incompatibles:
+        return None
+    if not equivalente(consulta):
+        with _lock:
+            _m["no_equivalentes"] += 1
+        return None
+    ahora = time.monotonic()
+    with _lock:
+        if sin_servidor:
+            disponible = tablas <= _con_datos
+        else:
+            disponible = all(ahora - _frescas.get(t, float("-inf")) <= DB_REPLICA_MAX_EDAD_S for t in tablas)
+        if not disponible:
+            _m["rechazos"] += 1
+            return None
+    sql, args = _traducir(consulta, params)
+    try:
+        cursor = _conexion_local().execute(sql, args)
+        rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        with _lock:
+            _m["errores_sql"] += 1
+            _incompatibles[consulta] = str(e)
+            while len(_incompatibles) > 200:
+                _incompatibles.popitem(last=False)
+        return None
+    with _lock:
+        _m["lecturas"] += 1
+    return rows, cursor.description
+
+
+def estadisticas() -> dict:
+    """Lecturas servidas, rechazos, ciclos, copias completas, edad de cada tabla."""
+    ahora = time.monotonic()
+    with _lock:
+        m = dict(_m)
+        m["edad_s"] = {t: round(ahora - f, 1) for t, f in _frescas.items()}
+        m["sucias"] = sorted(_sucias)
+        m["sql_incompatible"] = len(_incompatibles)
+    m["activa"] = DB_REPLICA
+    m["archivo"] = DB_REPLICA_ARCHIVO
+    return m
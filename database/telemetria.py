@@ -0,0 +1,235 @@
+"""
+Telemetría de consultas para el SBE.
+
+Cada consulta ejecutada por database.connection se agrupa por su huella
+(el SQL sin literales ni parámetros) y se registran, por huella:
+  - histogramas de latencia (p50/p95/p99/max) separados en conexión,
+    ejecución y fetch (en escrituras, fetch = commit),
+  - filas devueltas/afectadas, llamadas y errores,
+  - desde qué función CRUD y qué pantalla/módulo se llamó.
+
+Las consultas que superan el umbral DB_LENTA_MS se guardan en un log de
+consultas lentas y se imprimen en consola con el prefijo [DB LENTA].
+
+Consulta en proceso: instantanea(), consultas_lentas().
+Volcado a archivo: volcar(ruta) (JSON). Si SBE_DB_TELEMETRIA_ARCHIVO está
+definido, se vuelca automáticamente al cerrar la aplicación.
+"""
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from database.config import (
+    DB_TELEMETRIA,
+    DB_TELEMETRIA_ARCHIVO,
+    DB_LENTA_MS,
+)
+
+FASES = ("conexion", "ejecucion", "fetch")
+MUESTRAS_POR_FASE = 1000    # ventana deslizante por huella y fase
+MAX_LENTAS = 200            # entradas en el log de consultas lentas
+MAX_ORIGENES = 20           # orígenes distintos recordados por huella
+
+_DIR_DATABASE = os.path.dirname(os.path.abspath(__file__))
+
+_lock = threading.Lock()
+_stats = {}
+_lentas = deque(maxlen=MAX_LENTAS)
+_umbral_lenta_s = DB_LENTA_MS / 1000.0
+
+# Literales y marcadores que se reemplazan por '?' al calcular la huella
+_RE_COMENTARIOS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_RE_CADENAS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_MARCADORES = re.compile(r"%\(\w+\)s|%s")
+_RE_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+def huella(consulta: str) -> str:
+    """Normaliza una consulta: sin comentarios, literales ni parámetros, espacios colapsados."""
+    sql = _RE_COMENTARIOS.sub(" ", consulta or "")
+    sql = _RE_CADENAS.sub("?", sql)
+    sql = _RE_MARCADORES.sub("?", sql)
+    sql = _RE_NUMEROS.sub("?", sql)
+    sql = _RE_LISTAS.sub("(?+)", sql)
+    return _RE_ESPACIOS.sub(" ", sql).strip()
+
+
+def _origen():
+    """Devuelve (funcion_crud, llamador) recorriendo la pila fuera de este paquete."""
+    funcion = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if os.path.dirname(os.path.abspath(archivo)) == _DIR_DATABASE:
+            nombre = os.path.basename(archivo)
+            if funcion is None and nombre.startswith("crud_"):
+                funcion = f"{nombre[:-3]}.{frame.f_code.co_name}"
+        else:
+            modulo = os.path.splitext(os.path.basename(archivo))[0]
+            return funcion, f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return funcion, None
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    idx = min(len(ordenadas) - 1, int(round(p / 100.0 * (len(ordenadas) - 1))))
+    return ordenadas[idx]
+
+
+def _nueva_entrada(sql):
+    return {
+        "ejemplo": _RE_ESPACIOS.sub(" ", sql).strip()[:300],
+        "llamadas": 0,
+        "errores": 0,
+        "filas": 0,
+        "max_filas": 0,
+        "fases": {f: deque(maxlen=MUESTRAS_POR_FASE) for f in FASES},
+        "total": deque(maxlen=MUESTRAS_POR_FASE),
+        "origenes": Counter(),
+    }
+
+
+def registrar(consulta, t_conexion, t_ejecucion, t_fetch, filas=0, error=None, protocolo=None):
+    """
+    Registra una ejecución. Los tiempos van en segundos.
+    protocolo="bin" agrupa aparte las ejecuciones como sentencia preparada;
+    protocolo="replica", las lecturas servidas por la réplica local.
+    Llamado por database.connection; no lanza excepciones.
+    """
+    if not DB_TELEMETRIA:
+        return
+    try:
+        h = huella(consulta)
+        if protocolo:
+            h = f"[{protocolo}] {h}"
+        total = t_conexion + t_ejecucion + t_fetch
+        funcion, llamador = _origen()
+        origen = " <- ".join(x for x in (funcion, llamador) if x) or "?"
+        with _lock:
+            e = _stats.get(h)
+            if e is None:
+                e = _stats[h] = _nueva_entrada(consulta)
+            e["llamadas"] += 1
+            if error is not None:
+                e["errores"] += 1
+            filas = filas if filas and filas > 0 else 0
+            e["filas"] += filas
+            e["max_filas"] = max(e["max_filas"], filas)
+            e["fases"]["conexion"].append(t_conexion)
+            e["fases"]["ejecucion"].append(t_ejecucion)
+            e["fases"]["fetch"].append(t_fetch)
+            e["total"].append(total)
+            if origen in e["origenes"] or len(e["origenes"]) < MAX_ORIGENES:
+                e["origenes"][origen] += 1
+            if total >= _umbral_lenta_s:
+                _lentas.append({
+                    "momento": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "huella": h,
+                    "origen": origen,
+                    "hilo": threading.current_thread().name,
+                    "conexion": round(t_conexion, 4),
+                    "ejecucion": round(t_ejecucion, 4),
+                    "fetch": round(t_fetch, 4),
+                    "total": round(total, 4),
+                    "filas": filas,
+                    "error": str(error) if error is not None else None,
+                })
+        if total >= _umbral_lenta_s:
+            print(f"[DB LENTA] total={total:.3f}s conn={t_conexion:.3f}s exec={t_ejecucion:.3f}s "
+                  f"fetch={t_fetch:.3f}s filas={filas} | {origen} | {h[:80]}")
+    except Exception as ex:
+        print(f"[telemetria] error registrando consulta: {ex}")
+
+
+def _resumen(muestras):
+    ordenadas = sorted(muestras)
+    return {
+        "p50": round(_percentil(ordenadas, 50) * 1000, 2),
+        "p95": round(_percentil(ordenadas, 95) * 1000, 2),
+        "p99": round(_percentil(ordenadas, 99) * 1000, 2),
+        "max": round((ordenadas[-1] if ordenadas else 0.0) * 1000, 2),
+    }
+
+
+def instantanea(orden="p95", limite=None):
+    """
+    Retorna la telemetría agregada: lista de dict por huella (tiempos en ms),
+    ordenada de mayor a menor por el percentil total indicado en 'orden'.
+    """
+    with _lock:
+        copia = {
+            h: (dict(e), {f: list(m) for f, m in e["fases"].items()}, list(e["total"]), dict(e["origenes"]))
+            for h, e in _stats.items()
+        }
+    resultado = []
+    for h, (e, fases, total, origenes) in copia.items():
+        resultado.append({
+            "huella": h,
+            "ejemplo": e["ejemplo"],
+            "llamadas": e["llamadas"],
+            "errores": e["errores"],
+            "filas": e["filas"],
+            "filas_promedio": round(e["filas"] / e["llamadas"], 1) if e["llamadas"] else 0,
+            "max_filas": e["max_filas"],
+            "total_ms": _resumen(total),
+            "fases_ms": {f: _resumen(m) for f, m in fases.items()},
+            "origenes": origenes,
+        })
+    resultado.sort(key=lambda r: r["total_ms"].get(orden, 0), reverse=True)
+    return resultado[:limite] if limite else resultado
+
+
+def consultas_lentas():
+    """Retorna las últimas consultas que superaron el umbral (más reciente al final)."""
+    with _lock:
+        return list(_lentas)
+
+
+def umbral_lenta_ms() -> int:
+    return int(_umbral_lenta_s * 1000)
+
+
+def set_umbral_lenta_ms(ms: int):
+    """Cambia en caliente el umbral del log de consultas lentas."""
+    global _umbral_lenta_s
+    _umbral_lenta_s = max(0, ms) / 1000.0
+
+
+def reiniciar():
+    """Descarta toda la telemetría acumulada."""
+    with _lock:
+        _stats.clear()
+        _lentas.clear()
+
+
+def volcar(ruta: str | None = None) -> str | None:
+    """Escribe la telemetría (agregados + consultas lentas) como JSON. Retorna la ruta o None."""
+    ruta = ruta or DB_TELEMETRIA_ARCHIVO
+    if not ruta:
+        return None
+    datos = {
+        "generado": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "umbral_lenta_ms": umbral_lenta_ms(),
+        "consultas": instantanea(),
+        "lentas": consultas_lentas(),
+    }
+    try:
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2, default=str)
+        return ruta
+    except Exception as e:
+        print(f"[telemetria] no se pudo volcar a {ruta}: {e}")
+        return None
+
+
+if DB_TELEMETRIA and DB_TELEMETRIA_ARCHIVO:
+    atexit.register(volcar)
@@ -35,6 +35,11 @@ from theme import (
 from screens import screen_login, screen_register, screen_recovery
 from screens import screen_dashboard, screen_brigade_select, screen_brigades
 from components import build_sidebar
+from database.asincrono import cancelar_pantalla
+from database.connection import precalentar_pool
+from database.migrador import aplicar_al_iniciar
+from database.replica import iniciar_sincronizacion
+from database.kpis import iniciar_reconciliacion
 
 TRANSITION_TEXT = "#FFFFFF"
 if getattr(sys, 'frozen', False):
@@ -245,13 +250,14 @@ async def main(page: ft.Page):
         page.update()
 
     async def cerrar_sesion():
+        cancelar_pantalla(page)
         prefs = ft.SharedPreferences()
         await prefs.remove("usuario_actual")
         if getattr(page, "data", None) and isinstance(page.data, dict):
             page.data.pop("usuario_actual", None)
             page.data.pop("brigada_activa", None)
-            # Limpiar caché del dashboard para que no herede el próximo inicio de sesión
-            claves_a_eliminar = [k for k in page.data.keys() if k.startswith("_cache_") or k.startswith("_dashboard_")]
+            # Limpiar la caché de sesión (util_cache) para que no la herede el próximo inicio de sesión
+            claves_a_eliminar = [k for k in page.data.keys() if k.startswith(("_cache_", "_stats_"))]
             for k in claves_a_eliminar:
                 page.data.pop(k, None)
         aplicar_paleta_neutra(page)
@@ -368,4 +374,12 @@ async def main(page: ft.Page):
 
 
 if __name__ == "__main__":
+    # Migraciones pendientes y mapa del esquema (una sola conexión) en segundo plano
+    aplicar_al_iniciar()
+    # Abre el pool (TLS incluido) mientras corre la animación de entrada
+    precalentar_pool()
+    # Réplica local de lectura (solo con SBE_DB_REPLICA=1)
+    iniciar_sincronizacion()
+    # Recalcula kpi_snapshot en segundo plano (SBE_DB_KPI_RECONCILIAR_S)
+    iniciar_reconciliacion()
     ft.run(main, assets_dir="assets")
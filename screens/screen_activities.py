@@ -29,6 +29,7 @@ from forms import (
     _abrir_dialogo,
 )
 import database.crud_actividad as crud_act
+from database.asincrono import correr
 import database.crud_brigada as crud_brigada
 from database.crud_usuario import es_admin, es_profesor
 import json
@@ -633,16 +634,26 @@ def build(page: ft.Page, content_area=None, **kwargs) -> ft.Control:
 
     # ─── Construir lista de actividades ───────────────────────────
     def _construir_lista():
-        lista_items = ft.Column(spacing=0, scroll=ft.ScrollMode.AUTO)
+        spinner = ft.Container(content=ft.ProgressRing(), alignment=ft.Alignment(0, 0), height=100)
+        lista_items = ft.Column([spinner], spacing=0, scroll=ft.ScrollMode.AUTO)
+
+        async def _cargar_async():
+            try:
+                actividades = await correr(
+                    crud_act.obtener_actividades_recientes,
+                    50, tipo_brigada=_tb, solo_usuario_id=None, brigada_rol_id=brigada_rol_id,
+                )
+            except Exception as e:
+                print(f"Error cargando actividades: {e}")
+                actividades = []
+            _poblar_lista(lista_items, actividades)
+            if page.session: page.update()
 
-        try:
-            actividades = crud_act.obtener_actividades_recientes(
-                50, tipo_brigada=_tb, solo_usuario_id=None, brigada_rol_id=brigada_rol_id,
-            )
-        except Exception as e:
-            print(f"Error cargando actividades: {e}")
-            actividades = []
+        page.run_task(_cargar_async)
+        return lista_items
 
+    def _poblar_lista(lista_items, actividades):
+        lista_items.controls.clear()
         if actividades:
             for act in actividades:
                 es_ajena = (user_id is not None and act.get("creador_id") != user_id and not es_admin(rol))
@@ -659,7 +670,6 @@ def build(page: ft.Page, content_area=None, **kwargs) -> ft.Control:
             lista_items.controls.append(
                 ft.Text("No hay actividades registradas en su brigada.", color=COLOR_TEXTO_SEC, italic=True)
             )
-        return lista_items
 
     lista_ref = ft.Ref[ft.Column]()
 
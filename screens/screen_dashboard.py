@@ -1,8 +1,9 @@
 """Panel Principal — Dashboard con KPIs y gráficas."""
 
-import flet as ft
 import asyncio
 
+import flet as ft
+
 try:
     import flet_charts as fch
     HAS_CHARTS = True
@@ -25,34 +26,33 @@ from components import (
 )
 import database.crud_dashboard as crud_dash
 import database.crud_actividad as crud_act
+from database.asincrono import correr
+import util_cache
 
 
 def build(page: ft.Page, **kwargs) -> ft.Control:
     # 1. Parámetro de brigada activa
     _tb = (page.data or {}).get("brigada_activa")
     
-    cache_key_stats = f"_cache_kpi_{_tb}"
-    cache_key_acts  = f"_cache_acts_{_tb}"
-    loading_key = f"_dashboard_loading_{_tb}"
-    loaded_key = f"_dashboard_loaded_{_tb}"
+    # Caché compartida por todas las sesiones (util_cache): lo guardado se pinta al
+    # instante y se revalida si está viejo; una sola carga por clave en todo el proceso
+    sesion = util_cache.compartida
+    cache_key_stats = util_cache.clave("dashboard_kpis", tipo_brigada=_tb)
+    cache_key_acts  = util_cache.clave("dashboard_recientes", tipo_brigada=_tb)
+    cache_key_msg = util_cache.clave("mensaje_dia")
 
-    is_loaded = bool(page.data.get(loaded_key))
-    
     # 2. Sección KPIs
-    if is_loaded and page.data.get(cache_key_stats):
-        stats = page.data[cache_key_stats]
-        fila_kpis = ft.Row(
-            [
-                card_kpi("Total Brigadas", stats.get("total_brigadas", 0), ft.Icons.SHIELD_MOON, ft.Colors.BLUE),
-                card_kpi("Total Usuarios", stats.get("total_usuarios", 0), ft.Icons.PEOPLE, ft.Colors.ORANGE),
-                card_kpi("Actividades Activas", stats.get("actividades_activas", 0), ft.Icons.LOCAL_ACTIVITY, ft.Colors.GREEN),
-                card_kpi("Completadas", stats.get("actividades_completadas", 0), ft.Icons.CHECK_CIRCLE, ft.Colors.TEAL),
-            ],
-            spacing=20, alignment=ft.MainAxisAlignment.START,
-        )
-    else:
-        spinner_kpi = ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.Alignment(0, 0), height=80, expand=True)
-        fila_kpis = ft.Row([spinner_kpi], spacing=20, alignment=ft.MainAxisAlignment.CENTER)
+    spinner_kpi = ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.Alignment(0, 0), height=80, expand=True)
+    fila_kpis = ft.Row([spinner_kpi], spacing=20, alignment=ft.MainAxisAlignment.CENTER)
+
+    def pintar_kpis(stats):
+        fila_kpis.controls = [
+            card_kpi("Total Brigadas", stats.get("total_brigadas", 0), ft.Icons.SHIELD_MOON, ft.Colors.BLUE),
+            card_kpi("Total Usuarios", stats.get("total_usuarios", 0), ft.Icons.PEOPLE, ft.Colors.ORANGE),
+            card_kpi("Actividades Activas", stats.get("actividades_activas", 0), ft.Icons.LOCAL_ACTIVITY, ft.Colors.GREEN),
+            card_kpi("Completadas", stats.get("actividades_completadas", 0), ft.Icons.CHECK_CIRCLE, ft.Colors.TEAL),
+        ]
+        fila_kpis.alignment = ft.MainAxisAlignment.START
 
     # 3. Sección Gráfica
     if HAS_CHARTS:
@@ -117,12 +117,14 @@ def build(page: ft.Page, **kwargs) -> ft.Control:
     )
 
     # 4. Sección Actividades Recientes
-    if is_loaded and page.data.get(cache_key_acts) is not None:
-        actividades = page.data[cache_key_acts]
-        controles_acts = []
+    spinner_acts = ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.Alignment(0, 0), height=100)
+    lista_actividades = ft.Column([spinner_acts], spacing=0)
+
+    def pintar_actividades(actividades):
+        lista_actividades.controls.clear()
         if actividades:
             for act in actividades:
-                controles_acts.append(
+                lista_actividades.controls.append(
                     item_actividad_reciente(
                         act.get("titulo", "Sin título"),
                         str(act.get("fecha_inicio", "")),
@@ -131,11 +133,9 @@ def build(page: ft.Page, **kwargs) -> ft.Control:
                     )
                 )
         else:
-            controles_acts.append(ft.Text("No hay actividades recientes.", color=COLOR_TEXTO_SEC, italic=True))
-        lista_actividades = ft.Column(controles_acts, spacing=0)
-    else:
-        spinner_acts = ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.Alignment(0, 0), height=100)
-        lista_actividades = ft.Column([spinner_acts], spacing=0)
+            lista_actividades.controls.append(
+                ft.Text("No hay actividades recientes.", color=COLOR_TEXTO_SEC, italic=True)
+            )
 
     contenedor_actividades = card_principal(
         ft.Column(
@@ -155,80 +155,41 @@ def build(page: ft.Page, **kwargs) -> ft.Control:
     )
 
     # 5. Mensaje del día
-    if is_loaded:
-        mensaje_dia_container = ft.Container(content=_build_mensaje_dia(page))
-    else:
-        spinner_msg = ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.Alignment(0, 0), height=40)
-        mensaje_dia_container = ft.Container(content=spinner_msg)
+    spinner_msg = ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.Alignment(0, 0), height=40)
+    mensaje_dia_container = ft.Container(content=spinner_msg)
 
-    # --- Lógica de Carga Asíncrona (Aiven Cloud Optimization) ---
-    async def _load_data_async():
-        if page.data.get(loading_key) or page.data.get(loaded_key):
-            return
-        
-        page.data[loading_key] = True
-        
-        # Cargar KPIs
-        try:
-            if page.data.get(cache_key_stats):
-                stats = page.data[cache_key_stats]
-            else:
-                stats = await asyncio.to_thread(crud_dash.get_kpi_stats, _tb)
-                page.data[cache_key_stats] = stats
+    def pintar_mensaje(mensaje):
+        mensaje_dia_container.content = _build_mensaje_dia(page, mensaje)
 
-            fila_kpis.controls = [
-                card_kpi("Total Brigadas", stats.get("total_brigadas", 0), ft.Icons.SHIELD_MOON, ft.Colors.BLUE),
-                card_kpi("Total Usuarios", stats.get("total_usuarios", 0), ft.Icons.PEOPLE, ft.Colors.ORANGE),
-                card_kpi("Actividades Activas", stats.get("actividades_activas", 0), ft.Icons.LOCAL_ACTIVITY, ft.Colors.GREEN),
-                card_kpi("Completadas", stats.get("actividades_completadas", 0), ft.Icons.CHECK_CIRCLE, ft.Colors.TEAL),
-            ]
-            fila_kpis.alignment = ft.MainAxisAlignment.START
-            if page.session: page.update()
-        except Exception as e:
-            print(f"Error cargando KPIs en hilo: {e}")
-
-        # Cargar Actividades Recientes
-        try:
-            if page.data.get(cache_key_acts):
-                actividades = page.data[cache_key_acts]
-            else:
-                actividades = await asyncio.to_thread(crud_act.obtener_actividades_recientes, 5, _tb)
-                page.data[cache_key_acts] = actividades
+    # (clave, carga, pintor, tablas de las que depende)
+    secciones = [
+        (cache_key_stats, lambda: correr(crud_dash.get_kpi_stats, _tb), pintar_kpis,
+         ("brigada", "usuario", "actividad")),
+        (cache_key_acts, lambda: correr(crud_act.obtener_actividades_recientes, 5, _tb), pintar_actividades,
+         ("actividad", "brigada")),
+        (cache_key_msg, lambda: correr(_leer_mensaje_dia), pintar_mensaje, ("configuracion",)),
+    ]
+    entrada_inicial = {clave: sesion.entrada(clave) for clave, *_ in secciones}
+    for clave, _, pintar, _ in secciones:
+        if entrada_inicial[clave] is not None:
+            pintar(entrada_inicial[clave].valor)
 
-            lista_actividades.controls.clear()
-            if actividades:
-                for act in actividades:
-                    lista_actividades.controls.append(
-                        item_actividad_reciente(
-                            act.get("titulo", "Sin título"),
-                            str(act.get("fecha_inicio", "")),
-                            act.get("estado", "Pendiente"),
-                            act.get("nombre_brigada", "General")
-                        )
-                    )
-            else:
-                lista_actividades.controls.append(
-                    ft.Text("No hay actividades recientes.", color=COLOR_TEXTO_SEC, italic=True)
-                )
+    # --- Lógica de Carga Asíncrona (Aiven Cloud Optimization) ---
+    async def _cargar_seccion(clave, cargar, pintar, tablas):
+        def al_llegar(valor):
+            if entrada_inicial.get(clave) is not None and valor is entrada_inicial[clave].valor:
+                return  # ya pintado al construir la vista
+            pintar(valor)
             if page.session: page.update()
-        except Exception as e:
-            print(f"Error cargando actividades en hilo: {e}")
-
-        finally:
-            page.data[loading_key] = False
-            page.data[loaded_key] = True
-
-        # Cargar Mensaje del Día
         try:
-            # Reutilizamos _build_mensaje_dia de forma síncrona dentro del hilo
-            msg_control = await asyncio.to_thread(_build_mensaje_dia, page)
-            mensaje_dia_container.content = msg_control
-            if page.session: page.update()
+            await sesion.usar(clave, cargar, al_llegar, tablas)
         except Exception as e:
-            print(f"Error cargando msg: {e}")
+            print(f"Error cargando {clave[0]} del dashboard: {e}")
+
+    async def _load_data_async():
+        await asyncio.gather(*(_cargar_seccion(*s) for s in secciones))
 
-    if not is_loaded:
-        page.run_task(_load_data_async)
+    page.run_task(_load_data_async)
 
 
     # Layout Principal
@@ -277,22 +238,23 @@ def _get_usuario_actual(page):
         pass
     return {}
 
-def _build_mensaje_dia(page):
+def _leer_mensaje_dia() -> str:
+    try:
+        from database.crud_config import get_mensaje_dia
+    except Exception:
+        return ""
+    return get_mensaje_dia() or ""
+
+def _build_mensaje_dia(page, mensaje_actual):
     """Mensaje del día; botón Editar solo visible para Directivo/Coordinador."""
     try:
-        from database.crud_config import get_mensaje_dia, set_mensaje_dia
+        from database.crud_config import set_mensaje_dia
     except Exception:
-        get_mensaje_dia = lambda: ""
         set_mensaje_dia = lambda t: False
     
     usuario = _get_usuario_actual(page)
     puede_editar = _puede_editar_mensaje_dia(usuario.get("rol", ""))
-    cache_key_msg = "_cache_msg_dia"
-    if page.data.get(cache_key_msg) is not None:
-        mensaje_actual = page.data[cache_key_msg]
-    else:
-        mensaje_actual = get_mensaje_dia() or ""
-        page.data[cache_key_msg] = mensaje_actual
+    mensaje_actual = mensaje_actual or ""
 
     if not mensaje_actual.strip() and not puede_editar:
         return ft.Container()
@@ -305,8 +267,8 @@ def _build_mensaje_dia(page):
     campo_mensaje = ft.TextField(label="Mensaje del día", value=mensaje_actual, multiline=True)
     
     def guardar_msg(e):
-        set_mensaje_dia(campo_mensaje.value)
-        page.data[cache_key_msg] = campo_mensaje.value
+        if set_mensaje_dia(campo_mensaje.value):
+            util_cache.compartida.guardar(util_cache.clave("mensaje_dia"), campo_mensaje.value, ("configuracion",))
         if texto_ref.current: texto_ref.current.value = campo_mensaje.value
         dlg.open = False
         page.update()
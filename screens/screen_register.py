@@ -22,6 +22,7 @@ from database.crud_usuario import (
     listar_instituciones,
     actualizar_logo_institucion,
 )
+from database.connection import transaccion
 try:
     from mysql.connector import errors as mysql_errors
 except ImportError:
@@ -571,28 +572,30 @@ def build(page: ft.Page, on_back_to_login) -> ft.Control:
                 return
 
             try:
-                id_inst = crear_institucion(
-                    nombre=nom_inst.value.strip(),
-                    direccion=(direccion.value or "").strip(),
-                    telefono=(tel_inst.value or "").strip(),
-                    cdce=(cdce_dropdown.value or "").strip() or None,
-                )
-                # No se crea brigada: directivos/coordinadores no tienen brigada; las brigadas las crean los profesores.
-                partes = (nombre_completo.value or "").strip().split(None, 1)
-                nombre = partes[0] if partes else "Usuario"
-                apellido = partes[1] if len(partes) > 1 else ""
-                rol = (cargo.value or "Directivo").strip()
-                crear_usuario(
-                    nombre=nombre,
-                    apellido=apellido,
-                    email=(correo.value or "").strip().lower(),
-                    contrasena_plana=contrasena.value,
-                    rol=rol,
-                    brigada_id=None,
-                    institucion_id=id_inst,
-                    usuario=usuario_str.lower(),
-                    cedula=(cedula_admin.value or "").strip() or None,
-                )
+                # Institución y administrador en una sola transacción: o se crean ambos o ninguno
+                with transaccion():
+                    id_inst = crear_institucion(
+                        nombre=nom_inst.value.strip(),
+                        direccion=(direccion.value or "").strip(),
+                        telefono=(tel_inst.value or "").strip(),
+                        cdce=(cdce_dropdown.value or "").strip() or None,
+                    )
+                    # No se crea brigada: directivos/coordinadores no tienen brigada; las brigadas las crean los profesores.
+                    partes = (nombre_completo.value or "").strip().split(None, 1)
+                    nombre = partes[0] if partes else "Usuario"
+                    apellido = partes[1] if len(partes) > 1 else ""
+                    rol = (cargo.value or "Directivo").strip()
+                    crear_usuario(
+                        nombre=nombre,
+                        apellido=apellido,
+                        email=(correo.value or "").strip().lower(),
+                        contrasena_plana=contrasena.value,
+                        rol=rol,
+                        brigada_id=None,
+                        institucion_id=id_inst,
+                        usuario=usuario_str.lower(),
+                        cedula=(cedula_admin.value or "").strip() or None,
+                    )
                 # Guardar logo si se indicó una ruta válida
                 ruta_logo = (campo_ruta_logo.value or "").strip()
                 if ruta_logo and os.path.isfile(ruta_logo):
@@ -13,6 +13,7 @@ from theme import (
 )
 from components import titulo_pagina, boton_primario
 import database.crud_reporte as crud_reporte
+from database.asincrono import correr
 from database.crud_usuario import es_profesor, es_admin
 
 
@@ -55,18 +56,27 @@ def build(page: ft.Page, **kwargs) -> ft.Control:
         from forms import abrir_form_nuevo_reporte
         abrir_form_nuevo_reporte(page)
 
+    async def _cargar_datos_async():
+        try:
+            stats = await correr(crud_reporte.get_reporte_stats, _tb, brigada_rol_id)
+            kpis_row.controls = _build_kpi_cards(stats)
+            if page.session: page.update()
+            reportes = await correr(crud_reporte.listar_reportes, _tb, brigada_rol_id)
+            reports_col.controls = _build_report_list(page, reportes, file_picker, _refresh)
+        except Exception as e:
+            print(f"Error cargando reportes: {e}")
+            reports_col.controls = [ft.Text("No se pudieron cargar los reportes.", color=COLOR_TEXTO_SEC, italic=True)]
+        if page.session: page.update()
+
     def _refresh(_=None):
-        stats = crud_reporte.get_reporte_stats(_tb, brigada_rol_id)
-        reportes = crud_reporte.listar_reportes(_tb, brigada_rol_id)
-        kpis_row.controls = _build_kpi_cards(stats)
-        reports_col.controls = _build_report_list(page, reportes, file_picker, _refresh)
-        page.update()
+        page.run_task(_cargar_datos_async)
 
-    stats = crud_reporte.get_reporte_stats(_tb, brigada_rol_id)
-    kpis_row = ft.Row(controls=_build_kpi_cards(stats), spacing=16)
+    spinner_kpi = ft.Container(content=ft.ProgressRing(), alignment=ft.Alignment(0, 0), height=80, expand=True)
+    kpis_row = ft.Row(controls=[spinner_kpi], spacing=16)
 
-    reportes = crud_reporte.listar_reportes(_tb, brigada_rol_id)
-    reports_col = ft.Column(controls=_build_report_list(page, reportes, file_picker, _refresh), spacing=14)
+    spinner_lista = ft.Container(content=ft.ProgressRing(), alignment=ft.Alignment(0, 0), height=100)
+    reports_col = ft.Column(controls=[spinner_lista], spacing=14)
+    page.run_task(_cargar_datos_async)
 
     contenido = ft.Column(
         [
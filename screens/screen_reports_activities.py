@@ -14,6 +14,7 @@ from components import titulo_pagina, boton_primario
 from util_docx import generar_reporte_actividad_docx
 from forms import modal_nuevo_reporte_actividad
 from database.crud_usuario import es_admin, es_profesor
+from database.asincrono import correr
 
 
 def _mostrar_snack(page: ft.Page, mensaje: str, color: str):
@@ -175,14 +176,22 @@ def build(page: ft.Page, **kwargs) -> ft.Control:
             cards.append(card)
         return cards
 
-    def cargar_datos():
+    async def _cargar_datos_async():
         nonlocal reportes
-        reportes = crud_reporte.listar_reportes_actividad(_tb, brigada_rol_id)
+        try:
+            reportes = await correr(crud_reporte.listar_reportes_actividad, _tb, brigada_rol_id)
+        except Exception as e:
+            print(f"Error cargando reportes: {e}")
+            reportes = []
         reports_col.controls = _build_report_list()
-        page.update()
+        if page.session: page.update()
+
+    def cargar_datos():
+        page.run_task(_cargar_datos_async)
 
-    reportes = crud_reporte.listar_reportes_actividad(_tb, brigada_rol_id)
-    reports_col.controls = _build_report_list()
+    reportes = []
+    reports_col.controls = [ft.Container(content=ft.ProgressRing(), alignment=ft.Alignment(0, 0), height=100)]
+    cargar_datos()
 
     def _abrir_modal_nuevo(e):
         if not puede_crear_reporte:
@@ -18,6 +18,8 @@ from theme import (
 from components import titulo_pagina, boton_primario
 from forms import _campo_con_titulo, _cerrar_dialogo, _abrir_dialogo
 import database.crud_turno as crud_turno
+from database.asincrono import correr
+from database.connection import conexion_compartida
 from database.crud_usuario import es_admin
 
 
@@ -325,13 +327,10 @@ def build(page: ft.Page, content_area=None, **kwargs) -> ft.Control:
             content_area.content = build(page, content_area)
             page.update()
         else:
-            stats = crud_turno.get_turno_stats(_tb, brigada_rol_id)
-            kpis_row.controls = _build_kpi_cards(stats)
-            schedule_col.controls = _build_merged_schedule(_tb, brigada_rol_id, user_id, rol, _refresh, _on_editar, _on_eliminar, page)
-            page.update()
+            page.run_task(_cargar_datos_async)
 
-    stats = crud_turno.get_turno_stats(_tb, brigada_rol_id)
-    kpis_row = ft.Row(controls=_build_kpi_cards(stats), spacing=16)
+    spinner_kpi = ft.Container(content=ft.ProgressRing(), alignment=ft.Alignment(0, 0), height=80, expand=True)
+    kpis_row = ft.Row(controls=[spinner_kpi], spacing=16)
 
     def _on_editar(turno):
         if turno.get("es_actividad"):
@@ -348,13 +347,10 @@ def build(page: ft.Page, content_area=None, **kwargs) -> ft.Control:
         else:
             _abrir_modal_eliminar_turno(page, turno, usuario, on_success=_refresh)
 
-    def _build_merged_schedule(_tb, b_id, uid, ro, _ref, _oe, _od, p):
-        import database.crud_actividad as crud_act
+    def _build_merged_schedule(turnos, actividades, uid, ro, _ref, _oe, _od, p):
         import util_json_plan
         from datetime import datetime
-        turnos = crud_turno.listar_turnos(tipo_brigada=_tb, brigada_rol_id=b_id)
-        actividades = crud_act.listar_actividades(tipo_brigada=_tb, brigada_rol_id=b_id)
-        
+
         merged = list(turnos)
         for act in actividades:
             try:
@@ -391,10 +387,26 @@ def build(page: ft.Page, content_area=None, **kwargs) -> ft.Control:
                 
         return _build_turno_section(merged, uid, ro, _ref, _oe, _od, p)
 
-    schedule_col = ft.Column(
-        controls=_build_merged_schedule(_tb, brigada_rol_id, user_id, rol, _refresh, _on_editar, _on_eliminar, page),
-        spacing=0,
-    )
+    spinner_lista = ft.Container(content=ft.ProgressRing(), alignment=ft.Alignment(0, 0), height=100)
+    schedule_col = ft.Column(controls=[spinner_lista], spacing=0)
+
+    async def _cargar_datos_async():
+        import database.crud_actividad as crud_act
+        try:
+            # Las tres consultas reutilizan una sola conexión del pool
+            async with conexion_compartida():
+                stats = await correr(crud_turno.get_turno_stats, _tb, brigada_rol_id)
+                kpis_row.controls = _build_kpi_cards(stats)
+                if page.session: page.update()
+                turnos = await correr(crud_turno.listar_turnos, tipo_brigada=_tb, brigada_rol_id=brigada_rol_id)
+                actividades = await correr(crud_act.listar_actividades, tipo_brigada=_tb, brigada_rol_id=brigada_rol_id)
+            schedule_col.controls = _build_merged_schedule(turnos, actividades, user_id, rol, _refresh, _on_editar, _on_eliminar, page)
+        except Exception as e:
+            print(f"Error cargando turnos: {e}")
+            schedule_col.controls = [ft.Text("No se pudo cargar la programación.", color=COLOR_TEXTO_SEC, italic=True)]
+        if page.session: page.update()
+
+    page.run_task(_cargar_datos_async)
 
     contenido = ft.Column(
         [
@@ -4,6 +4,9 @@ Configuración dinámica por tipo de brigada para coherencia semántica.
 Fallback "En construcción" si flet_charts no está instalado.
 """
 
+import asyncio
+from time import perf_counter
+
 import flet as ft
 from theme import (
     COLOR_TEXTO,
@@ -17,6 +20,8 @@ from theme import (
 )
 from components import titulo_pagina, card_principal, card_kpi
 import database.crud_estadisticas as crud_est
+from database.asincrono import ConsultaCanceladaError, correr, hilos_libres, token_pantalla
+import util_cache
 
 # Gráficos: paquete opcional (pip install flet-charts)
 try:
@@ -268,16 +273,14 @@ def _build_con_graficos(page: ft.Page) -> ft.Control:
     es_admin_usr = es_admin(usuario.get("rol", ""))
     brigada_rol_id = usuario.get("Brigada_idBrigada") if not es_admin_usr else None
 
-    ck_kpis = f"_cache_stats_kpis_{_tb}"
-    ck_bar  = f"_cache_stats_bar_{_tb}"
-    ck_line = f"_cache_stats_line_{_tb}"
-    ck_pie  = f"_cache_stats_pie_{_tb}"
-    
-    loading_key = f"_stats_loading_{_tb}"
-    loaded_key = f"_stats_loaded_{_tb}"
-    
-    is_loaded = bool(page.data.get(loaded_key))
-    
+    # Caché compartida por todas las sesiones (util_cache), por tipo de brigada y brigada del rol:
+    # lo guardado se pinta al instante y se revalida si está viejo
+    sesion = util_cache.compartida
+    ck_kpis = util_cache.clave("stats_kpis", tipo_brigada=_tb, brigada=brigada_rol_id)
+    ck_bar  = util_cache.clave("stats_bar", tipo_brigada=_tb, brigada=brigada_rol_id)
+    ck_line = util_cache.clave("stats_line", tipo_brigada=_tb, brigada=brigada_rol_id)
+    ck_pie  = util_cache.clave("stats_pie", tipo_brigada=_tb, brigada=brigada_rol_id)
+
     # Contenedores vacíos para reemplazo de contenido dinámico
     kpis_container = ft.Container(height=110, alignment=ft.alignment.Alignment(0, 0))
     bar_container = ft.Container(height=320, alignment=ft.alignment.Alignment(0, 0))
@@ -285,65 +288,106 @@ def _build_con_graficos(page: ft.Page) -> ft.Control:
     pie_chart_container = ft.Container(height=280, alignment=ft.alignment.Alignment(0, 0), expand=True)
     pie_legend_container = ft.Container(alignment=ft.alignment.Alignment(0, 0))
 
-    def popular_vistas():
-        kpis_data = page.data.get(ck_kpis, {})
-        kpis_container.content = _build_kpis(kpis_data, cfg)
-        
-        acts_data = page.data.get(ck_bar, [])
-        bar_container.content = _build_bar_chart(acts_data, cfg, cfg["chart_barras_tooltip"])
-        
-        rep_data = page.data.get(ck_line, [])
-        line_container.content = _build_line_chart(rep_data, cfg)
-        
-        est_data = page.data.get(ck_pie, [])
-        pie_ch, pie_leg = _build_pie_chart(est_data)
+    def pintar_kpis(kpis):
+        kpis_container.content = _build_kpis(kpis or {}, cfg)
+
+    def pintar_barras(acts_data):
+        bar_container.content = _build_bar_chart(acts_data or [], cfg, cfg["chart_barras_tooltip"])
+
+    def pintar_linea(rep_data):
+        line_container.content = _build_line_chart(rep_data or [], cfg)
+
+    def pintar_torta(est_data):
+        pie_ch, pie_leg = _build_pie_chart(est_data or [])
         pie_chart_container.content = pie_ch
         pie_legend_container.content = ft.Column(
             pie_leg if pie_leg else [ft.Text("Sin datos", color=COLOR_TEXTO_SEC, italic=True)],
             spacing=12, alignment=ft.MainAxisAlignment.CENTER,
         )
 
-    if is_loaded:
-        popular_vistas()
-    else:
-        # Skeletons
+    # clave de caché -> (función CRUD, pintor de su tarjeta, conjunto en get_estadisticas, tablas)
+    tarjetas = {
+        ck_kpis: (crud_est.get_kpis_estadisticas, pintar_kpis, "kpis",
+                  ("usuario", "actividad", "brigada", "reporte_de_impacto")),
+        ck_bar: (crud_est.get_actividades_por_mes, pintar_barras, "actividades_por_mes",
+                 ("actividad", "brigada")),
+        ck_line: (crud_est.get_tendencia_reportes_por_mes, pintar_linea, "tendencia_reportes",
+                  ("reporte_incidente", "reporte_de_impacto", "reporte_actividad", "actividad", "brigada")),
+        ck_pie: (crud_est.get_distribucion_estados_actividades, pintar_torta, "estados",
+                 ("actividad", "brigada")),
+    }
+
+    iniciales = {clave: sesion.entrada(clave) for clave in tarjetas}
+    for clave, (_, pintar, _, _) in tarjetas.items():
+        if iniciales[clave] is not None:
+            pintar(iniciales[clave].valor)
+    # Skeletons donde no hay nada guardado
+    if iniciales[ck_kpis] is None:
         kpis_container.content = ft.ProgressRing()
+    if iniciales[ck_bar] is None:
         bar_container.content = ft.ProgressRing()
+    if iniciales[ck_line] is None:
         line_container.content = ft.ProgressRing()
+    if iniciales[ck_pie] is None:
         pie_chart_container.content = ft.ProgressRing()
         pie_legend_container.content = ft.Text("Cargando...", color=COLOR_TEXTO_SEC)
 
-    async def _load_data_async():
-        if getattr(page, "data", None) is None: return
-        if page.data.get(loading_key) or page.data.get(loaded_key): return
-        page.data[loading_key] = True
+    # Se cancela si el usuario navega a otra pantalla: deja de pintar (las cargas de la
+    # caché compartida terminan igual, para las demás sesiones que las esperan)
+    token = token_pantalla(page)
+    tiempos = {}  # ms por función CRUD de la última carga; queda en page.data["_stats_tiempos_<tipo>"]
+    todo = None   # carga compartida de get_estadisticas cuando el pool está ocupado
 
+    async def _medir(func):
+        inicio = perf_counter()
         try:
-            import asyncio
-            kpis = await asyncio.to_thread(crud_est.get_kpis_estadisticas, _tb, brigada_rol_id)
-            act_por_mes = await asyncio.to_thread(crud_est.get_actividades_por_mes, _tb, brigada_rol_id)
-            reportes_tendencia = await asyncio.to_thread(crud_est.get_tendencia_reportes_por_mes, _tb, brigada_rol_id)
-            estados = await asyncio.to_thread(crud_est.get_distribucion_estados_actividades, _tb, brigada_rol_id)
-
-            page.data[ck_kpis] = kpis
-            page.data[ck_bar] = act_por_mes
-            page.data[ck_line] = reportes_tendencia
-            page.data[ck_pie] = estados
-            
-            # Popular la vista con los datos ya cacheados
-            popular_vistas()
+            return await correr(func, _tb, brigada_rol_id)
+        finally:
+            tiempos[func.__name__] = round((perf_counter() - inicio) * 1000)
+
+    async def _de_todo(conjunto):
+        # Pool ocupado: una sola consulta (crud_estadisticas.get_estadisticas) para todas las tarjetas
+        nonlocal todo
+        if todo is None:
+            todo = asyncio.ensure_future(_medir(crud_est.get_estadisticas))
+        return (await asyncio.shield(todo))[conjunto]
+
+    async def _cargar_tarjeta(clave, juntas):
+        func, pintar, conjunto, tablas = tarjetas[clave]
+
+        def al_llegar(valor):
+            if token.cancelado or (iniciales[clave] is not None and valor is iniciales[clave].valor):
+                return
+            pintar(valor)
             if page.session: page.update()
-            
-            # Solo si todo fue bien marcamos como loaded (sin excepciones)
-            page.data[loaded_key] = True
 
-        except Exception as e:
-            print(f"Error en carga asíncrona de estadísticas: {e}")
-        finally:
-            page.data[loading_key] = False
+        cargar = (lambda: _de_todo(conjunto)) if juntas else (lambda: _medir(func))
+        await sesion.usar(clave, cargar, al_llegar, tablas)
 
-    if not is_loaded:
-        page.run_task(_load_data_async)
+    async def _load_data_async():
+        if getattr(page, "data", None) is None: return
+        inicio = perf_counter()
+        # Cada tarjeta se pinta en cuanto llegan sus datos; el executor limita al tamaño del pool
+        juntas = hilos_libres() < len(tarjetas)
+        with token.activar():
+            resultados = await asyncio.gather(*(_cargar_tarjeta(c, juntas) for c in tarjetas), return_exceptions=True)
+        if token.cancelado:
+            return  # el usuario cambió de pantalla
+
+        fallidas = False
+        for clave, r in zip(tarjetas, resultados):
+            if not isinstance(r, Exception):
+                continue
+            if not isinstance(r, ConsultaCanceladaError):
+                print(f"Error en carga asíncrona de estadísticas: {r}")
+            if sesion.entrada(clave) is None:
+                tarjetas[clave][1](None)  # vacía en vez de cargando
+                fallidas = True
+        if fallidas and page.session: page.update()
+        if tiempos:
+            page.data[f"_stats_tiempos_{_tb}"] = dict(tiempos, total=round((perf_counter() - inicio) * 1000))
+
+    page.run_task(_load_data_async)
 
     # Layout Principal
     fila_1 = ft.Row([
@@ -0,0 +1,259 @@
+import sys
+import os
+import argparse
+import importlib
+import inspect
+import json
+import pkgutil
+import statistics
+import time
+from datetime import date, datetime
+
+# Asegurar que el directorio raíz del proyecto esté en el PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generar_dataset import usar_esquema
+
+# Mide cada función pública de database/crud_*.py contra un esquema generado con
+# scripts/generar_dataset.py y guarda los tiempos en JSON.
+#
+#   python scripts/benchmark_crud.py --esquema sbe_bench
+#   python scripts/benchmark_crud.py --esquema sbe_bench --comparar base.json
+#
+# Los argumentos se toman de la brigada con más actividades (el peor caso). Las
+# funciones con parámetros tipo_brigada / brigada_rol_id se miden también con el
+# filtro aplicado. Las escrituras solo con --incluir-escrituras, dentro de una
+# transacción que se deshace al terminar cada llamada. El caché de consultas se
+# vacía antes de cada llamada para medir la base de datos.
+# Con --comparar termina con código 1 si alguna función empeoró más del umbral.
+
+PREFIJOS_ESCRITURA = ("crear_", "insertar_", "actualizar_", "eliminar_", "marcar_", "asignar_", "set_",
+                      "resetear_", "invalidar_", "procesar_")
+# Sin acceso a la BD
+EXCLUIDAS = {"es_admin", "es_profesor", "es_brigadista"}
+TABLAS_VOLUMEN = ("institucion_educativa", "brigada", "usuario", "actividad", "reporte_incidente",
+                  "reporte_actividad", "reporte_de_impacto", "turno")
+
+
+class _Deshacer(Exception):
+    """Sale del bloque transaccion() para forzar el ROLLBACK de una escritura medida."""
+
+
+def _argumentos():
+    p = argparse.ArgumentParser(description="Benchmark de las funciones CRUD del SBE.")
+    p.add_argument("--esquema", default="sbe_bench")
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--salida", default=None, help="archivo JSON de resultados")
+    p.add_argument("--comparar", default=None, help="JSON base para detectar regresiones")
+    p.add_argument("--umbral", type=float, default=0.25, help="empeoramiento relativo tolerado (0.25 = 25%%)")
+    p.add_argument("--minimo-ms", type=float, default=2.0, help="diferencias menores se consideran ruido")
+    p.add_argument("--solo", default=None, help="mide solo los casos cuyo nombre contenga este texto")
+    p.add_argument("--incluir-escrituras", action="store_true")
+    return p.parse_args()
+
+
+def _muestras():
+    """Valores reales del esquema para rellenar los parámetros de las funciones."""
+    from database.connection import ejecutar
+
+    def uno(sql, params=None):
+        rows, _ = ejecutar(sql, params)
+        return rows[0] if rows else (None,) * 8
+
+    bid, tipo, profesor, inst = uno("""
+        SELECT b.idBrigada, b.tipo_brigada, b.profesor_id, b.Institucion_Educativa_idInstitucion
+        FROM brigada b JOIN actividad a ON a.Brigada_idBrigada = b.idBrigada
+        GROUP BY b.idBrigada ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    uid, email, cedula, login = uno(
+        "SELECT idUsuario, email, cedula, usuario FROM usuario WHERE Brigada_idBrigada = %s AND rol = 'Brigadista' LIMIT 1",
+        (bid,))
+    act = uno("SELECT MAX(idActividad) FROM actividad WHERE Brigada_idBrigada = %s", (bid,))[0]
+    rep = uno("SELECT MAX(idReporte) FROM reporte_incidente WHERE Brigada_idBrigada = %s", (bid,))[0]
+    tur = uno("SELECT MAX(idTurno) FROM turno WHERE Brigada_idBrigada = %s", (bid,))[0]
+    hoy = date.today().isoformat()
+    return {
+        "brigada_id": bid, "id_brigada": bid, "brigada_rol_id": bid, "tipo_brigada": tipo,
+        "profesor_id": profesor, "institucion_id": inst, "id_institucion": inst,
+        "usuario_id": uid, "id_usuario": uid, "subjefe_id": uid, "email": email, "cedula": cedula,
+        "usuario": login, "password": "bench1234", "contrasena_plana": "bench1234",
+        "nueva_contrasena_plana": "bench1234", "rol": "Brigadista",
+        "id_actividad": act, "actividad_id": act, "id_reporte": rep, "turno_id": tur,
+        # Solo para escrituras
+        "titulo": "Benchmark", "descripcion": "Benchmark", "nombre": "Benchmark", "apellido": "Benchmark",
+        "nombre_brigada": "Benchmark", "area_accion": "Benchmark", "coordinador": "Benchmark",
+        "color_identificador": "#2563eb", "direccion": "Benchmark", "telefono": "02610000000",
+        "ubicacion": "Patio", "notas": "", "resumen": "Benchmark", "resultado": "Éxito total",
+        "prioridad": "Media", "estado": "Pendiente", "nuevo_estado": "Resuelto", "texto": "Benchmark",
+        "fecha": hoy, "fecha_inicio": hoy, "fecha_fin": hoy, "hora_inicio": "08:00:00", "hora_fin": "10:00:00",
+        "id_brigada_destino": bid, "logo_ruta": "", "token_crudo": "0" * 64,
+    }
+
+
+def _casos(muestras, incluir_escrituras, filtro):
+    """(nombre, función, kwargs, es_escritura) por cada función pública de database/crud_*.py."""
+    import database
+
+    casos = []
+    omitidas = {}
+    for info in sorted(pkgutil.iter_modules(database.__path__), key=lambda m: m.name):
+        if not info.name.startswith("crud_"):
+            continue
+        modulo = importlib.import_module(f"database.{info.name}")
+        for nombre, func in inspect.getmembers(modulo, inspect.isfunction):
+            if nombre.startswith("_") or func.__module__ != modulo.__name__ or nombre in EXCLUIDAS:
+                continue
+            completo = f"{info.name}.{nombre}"
+            escritura = nombre.startswith(PREFIJOS_ESCRITURA)
+            if escritura and not incluir_escrituras:
+                omitidas[completo] = "escritura"
+                continue
+            parametros = inspect.signature(func).parameters.values()
+            requeridos = [p.name for p in parametros
+                          if p.default is p.empty and p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)]
+            faltan = [p for p in requeridos if muestras.get(p) is None]
+            if faltan:
+                omitidas[completo] = f"sin valor para {', '.join(faltan)}"
+                continue
+            base = {p: muestras[p] for p in requeridos}
+            variantes = [(completo, base)]
+            opcionales = {p.name for p in parametros if p.default is not p.empty}
+            for filtro_opcional in ("tipo_brigada", "brigada_rol_id"):
+                if filtro_opcional in opcionales and filtro_opcional not in base:
+                    variantes.append((f"{completo}[{filtro_opcional}]",
+                                      {**base, filtro_opcional: muestras[filtro_opcional]}))
+            for caso, kwargs in variantes:
+                if filtro and filtro not in caso:
+                    continue
+                casos.append((caso, func, kwargs, escritura))
+    return casos, omitidas
+
+
+def _llamar(func, kwargs, escritura):
+    from database.connection import TransaccionFallidaError, transaccion
+
+    if not escritura:
+        return func(**kwargs)
+    resultado = None
+    try:
+        with transaccion():
+            resultado = func(**kwargs)
+            raise _Deshacer()
+    except (_Deshacer, TransaccionFallidaError):
+        pass
+    return resultado
+
+
+def _medir(func, kwargs, escritura, repeticiones):
+    from database import cache
+
+    tiempos = []
+    filas = None
+    error = None
+    for i in range(repeticiones + 1):  # la primera es de calentamiento
+        cache.limpiar()
+        t0 = time.perf_counter()
+        try:
+            resultado = _llamar(func, kwargs, escritura)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+        ms = (time.perf_counter() - t0) * 1000
+        if i:
+            tiempos.append(ms)
+        if isinstance(resultado, dict) and "items" in resultado:
+            filas = len(resultado["items"])
+        elif hasattr(resultado, "__len__") and not isinstance(resultado, (str, dict)):
+            filas = len(resultado)
+    if error:
+        return {"error": error}
+    tiempos.sort()
+    return {
+        "n": len(tiempos),
+        "min_ms": round(tiempos[0], 2),
+        "mediana_ms": round(statistics.median(tiempos), 2),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 2),
+        "max_ms": round(tiempos[-1], 2),
+        "filas": filas,
+    }
+
+
+def _volumenes():
+    from database.connection import ejecutar
+
+    volumenes = {}
+    for tabla in TABLAS_VOLUMEN:
+        try:
+            volumenes[tabla] = ejecutar(f"SELECT COUNT(*) FROM `{tabla}`")[0][0][0]
+        except Exception:
+            volumenes[tabla] = None
+    return volumenes
+
+
+def _comparar(actual, base, umbral, minimo_ms):
+    """Imprime regresiones y mejoras; retorna la lista de casos que empeoraron."""
+    if actual["volumenes"] != base.get("volumenes"):
+        print("Aviso: los volúmenes del esquema difieren de la línea base; la comparación es orientativa.")
+    regresiones = []
+    print(f"\nComparación con la línea base del {base.get('fecha', '?')} (umbral {umbral:.0%}, ruido < {minimo_ms:g} ms):")
+    for caso, r in actual["resultados"].items():
+        b = base.get("resultados", {}).get(caso)
+        if not b or "mediana_ms" not in b or "mediana_ms" not in r:
+            continue
+        antes, ahora = b["mediana_ms"], r["mediana_ms"]
+        cambio = (ahora - antes) / antes if antes else 0.0
+        if abs(ahora - antes) < minimo_ms:
+            continue
+        if cambio > umbral:
+            regresiones.append(caso)
+            print(f"  REGRESIÓN {caso:<60} {antes:>9.1f} -> {ahora:>9.1f} ms ({cambio:+.0%})")
+        elif cambio < -umbral:
+            print(f"  mejora    {caso:<60} {antes:>9.1f} -> {ahora:>9.1f} ms ({cambio:+.0%})")
+    nuevos = sorted(set(actual["resultados"]) - set(base.get("resultados", {})))
+    if nuevos:
+        print(f"  Sin línea base: {', '.join(nuevos)}")
+    if not regresiones:
+        print("  Sin regresiones.")
+    return regresiones
+
+
+def main():
+    args = _argumentos()
+    usar_esquema(args.esquema)
+
+    from database.config import DB_HOST, DB_NAME
+
+    muestras = _muestras()
+    casos, omitidas = _casos(muestras, args.incluir_escrituras, args.solo)
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "host": DB_HOST,
+        "esquema": DB_NAME,
+        "repeticiones": args.repeticiones,
+        "volumenes": _volumenes(),
+        "resultados": {},
+        "omitidas": omitidas,
+    }
+    print(f"{len(casos)} casos contra {DB_HOST}/{DB_NAME} ({args.repeticiones} repeticiones): {informe['volumenes']}")
+    for caso, func, kwargs, escritura in casos:
+        r = informe["resultados"][caso] = _medir(func, kwargs, escritura, args.repeticiones)
+        if "error" in r:
+            print(f"  {caso:<60} ERROR {r['error']}")
+        else:
+            print(f"  {caso:<60} {r['mediana_ms']:>9.1f} ms  p95 {r['p95_ms']:>9.1f} ms  filas {r['filas']}")
+
+    salida = args.salida or f"benchmark_{DB_NAME}_{datetime.now():%Y%m%d_%H%M}.json"
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2, default=str)
+    print(f"Resultados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        if _comparar(informe, base, args.umbral, args.minimo_ms):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
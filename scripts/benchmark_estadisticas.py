@@ -0,0 +1,108 @@
+import sys
+import os
+import argparse
+import statistics
+import time
+
+# Asegurar que el directorio raíz del proyecto esté en el PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generar_dataset import usar_esquema
+
+# Compara la carga de la pantalla de Estadísticas: las cuatro funciones por
+# gráfico una tras otra contra crud_estadisticas.get_estadisticas (una sola
+# consulta), sobre un esquema generado con scripts/generar_dataset.py.
+#
+#   python scripts/benchmark_estadisticas.py --esquema sbe_bench
+#   python scripts/benchmark_estadisticas.py --esquema sbe_bench --sin-snapshot
+#
+# Se mide sin filtro, por tipo_brigada y por la brigada con más actividades. El
+# caché de consultas se vacía antes de cada llamada. --sin-snapshot calcula los
+# KPIs en vivo (SBE_DB_KPI_SNAPSHOT=0) para comparar solo las consultas.
+#
+# Para medir las columnas de mes de 009_meses.sql, generar un segundo esquema
+# con --sin-meses y comparar ambas corridas:
+#
+#   python scripts/generar_dataset.py --esquema sbe_bench_sin_meses --sin-meses
+#   python scripts/benchmark_estadisticas.py --esquema sbe_bench_sin_meses --sin-snapshot
+
+
+def _argumentos():
+    p = argparse.ArgumentParser(description="Benchmark de la carga de Estadísticas.")
+    p.add_argument("--esquema", default="sbe_bench")
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--sin-snapshot", action="store_true", help="KPIs en vivo, sin kpi_snapshot")
+    return p.parse_args()
+
+
+def _por_separado(est, tipo_brigada, brigada_rol_id):
+    return {
+        "kpis": est.get_kpis_estadisticas(tipo_brigada, brigada_rol_id),
+        "actividades_por_mes": [tuple(f) for f in est.get_actividades_por_mes(tipo_brigada, brigada_rol_id)],
+        "tendencia_reportes": [tuple(f) for f in est.get_tendencia_reportes_por_mes(tipo_brigada, brigada_rol_id)],
+        "estados": est.get_distribucion_estados_actividades(tipo_brigada, brigada_rol_id),
+    }
+
+
+def _medir(funcion, repeticiones):
+    from database import cache
+
+    tiempos = []
+    resultado = None
+    for i in range(repeticiones + 1):  # la primera es de calentamiento
+        cache.limpiar()
+        t0 = time.perf_counter()
+        resultado = funcion()
+        if i:
+            tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def _normalizar(datos):
+    """Mismo formato en ambos caminos: filas como tuplas, cantidades como int, estados ordenados."""
+    return {
+        "kpis": datos["kpis"],
+        "actividades_por_mes": [(m, int(n)) for m, n in datos["actividades_por_mes"]],
+        "tendencia_reportes": [(m, int(n)) for m, n in datos["tendencia_reportes"]],
+        "estados": sorted((e["estado"], int(e["conteo"])) for e in datos["estados"]),
+    }
+
+
+def main():
+    args = _argumentos()
+    if args.sin_snapshot:
+        os.environ["SBE_DB_KPI_SNAPSHOT"] = "0"
+    usar_esquema(args.esquema)
+
+    from database.config import DB_HOST, DB_NAME
+    from database.connection import ejecutar
+    from database import esquema
+    import database.crud_estadisticas as est
+
+    rows, _ = ejecutar("""
+        SELECT b.idBrigada, b.tipo_brigada
+        FROM brigada b JOIN actividad a ON a.Brigada_idBrigada = b.idBrigada
+        GROUP BY b.idBrigada ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    bid, tipo = rows[0] if rows else (None, None)
+    volumen = ejecutar("SELECT COUNT(*) FROM actividad")[0][0][0]
+    print(f"{DB_HOST}/{DB_NAME}: {volumen} actividades, {args.repeticiones} repeticiones"
+          f"{' (KPIs en vivo)' if args.sin_snapshot else ''}")
+    print(f"  series mensuales: {'columnas de mes (009)' if esquema.tiene('actividad', 'mes_inicio') else 'mes calculado por fila'}")
+    print(f"  {'filtro':<28} {'4 consultas':>12} {'1 consulta':>12} {'aceleración':>12}")
+
+    distintos = 0
+    for nombre, tb, br in (("sin filtro", None, None), (f"tipo_brigada={tipo}", tipo, None), (f"brigada={bid}", None, bid)):
+        ms_sep, sep = _medir(lambda: _por_separado(est, tb, br), args.repeticiones)
+        ms_uno, uno = _medir(lambda: est.get_estadisticas(tb, br), args.repeticiones)
+        igual = _normalizar(sep) == _normalizar(uno)
+        distintos += not igual
+        print(f"  {nombre:<28} {ms_sep:>9.1f} ms {ms_uno:>9.1f} ms {ms_sep / ms_uno:>11.1f}x"
+              f"{'' if igual else '  RESULTADOS DISTINTOS'}")
+    if distintos:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
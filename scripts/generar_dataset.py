@@ -0,0 +1,297 @@
+import sys
+import os
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+# Asegurar que el directorio raíz del proyecto esté en el PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Genera un esquema MySQL de pruebas con volúmenes realistas para medir la app
+# (ver scripts/benchmark_crud.py). El esquema se BORRA y se recrea desde
+# database/db_brigadas_maracaibo.sql más las migraciones de database/migraciones/
+# (--sin-indices para medir sin los índices de 007_indices.sql, --sin-meses sin
+# las columnas de mes de 009_meses.sql y 010_meses_global.sql), y luego se llena
+# con datos sintéticos repartidos en los últimos N meses.
+#
+# Uso: python scripts/generar_dataset.py --esquema sbe_bench --instituciones 200 \
+#          --usuarios 20000 --actividades 500000 --meses 24
+#
+# Usa el host/usuario de .env (SBE_ENV); nunca toca el esquema configurado de la app.
+
+ESQUEMA_ORIGINAL = "db_brigadas_maracaibo"
+ARCHIVO_ESQUEMA = os.path.join(os.path.dirname(__file__), '..', 'database', 'db_brigadas_maracaibo.sql')
+VERSION_INDICES = 7  # database/migraciones/007_indices.sql
+VERSIONES_MESES = (9, 10)  # database/migraciones/009_meses.sql, 010_meses_global.sql
+TAM_LOTE = 5000
+
+TIPOS_BRIGADA = ("ecologica", "riesgo", "patrulla", "convivencia")
+AREAS = {
+    "ecologica": "Ambiente", "riesgo": "Gestión de riesgo",
+    "patrulla": "Seguridad escolar", "convivencia": "Convivencia",
+}
+COLORES = ("#16a34a", "#dc2626", "#2563eb", "#9333ea", "#ea580c", "#0891b2")
+ESTADOS_ACTIVIDAD = (("Completada", 55), ("Pendiente", 20), ("En Progreso", 15), ("Planificada", 7), ("Cancelada", 3))
+ESTADOS_REPORTE = (("En Proceso", 40), ("Resuelto", 50), ("Cerrado", 10))
+PRIORIDADES = (("Alta", 20), ("Media", 50), ("Baja", 30))
+RESULTADOS = (("Éxito total", 60), ("Con observaciones", 30), ("Fallo parcial", 10))
+ESTADOS_TURNO = (("Programado", 50), ("Completado", 45), ("Cancelado", 5))
+TITULOS = ("Jornada de limpieza", "Siembra de árboles", "Simulacro de evacuación", "Charla de reciclaje",
+           "Patrullaje de entrada", "Mediación escolar", "Censo de residuos", "Taller de primeros auxilios")
+LUGARES = ("Patio central", "Entrada principal", "Cancha", "Comedor", "Pasillo norte", "Laboratorio")
+NOMBRES = ("Ana", "Luis", "María", "José", "Carla", "Pedro", "Sofía", "Miguel", "Valentina", "Andrés")
+APELLIDOS = ("González", "Rodríguez", "Pérez", "Hernández", "Morales", "Fernández", "Urdaneta", "Chacón")
+
+
+def _variable_nombre_bd():
+    return "SBE_DB_NAME_PROD" if os.environ.get("SBE_ENV", "local").lower() == "production" else "SBE_DB_NAME_LOCAL"
+
+
+def usar_esquema(nombre):
+    """Apunta la app (database.config) al esquema 'nombre'. Llamar antes de importar database.*"""
+    os.environ[_variable_nombre_bd()] = nombre
+
+
+def _argumentos():
+    p = argparse.ArgumentParser(description="Genera un dataset sintético del SBE en un esquema aparte.")
+    p.add_argument("--esquema", default="sbe_bench", help="esquema destino (se borra y se recrea)")
+    p.add_argument("--instituciones", type=int, default=200)
+    p.add_argument("--brigadas-por-institucion", type=int, default=4)
+    p.add_argument("--usuarios", type=int, default=20_000)
+    p.add_argument("--actividades", type=int, default=500_000)
+    p.add_argument("--reportes", type=int, default=None, help="incidentes (por defecto actividades/10)")
+    p.add_argument("--turnos", type=int, default=None, help="por defecto actividades/5")
+    p.add_argument("--meses", type=int, default=24, help="antigüedad máxima de las fechas")
+    p.add_argument("--semilla", type=int, default=2024)
+    p.add_argument("--sin-indices", action="store_true", help="no aplicar la migración de índices (línea base)")
+    p.add_argument("--sin-meses", action="store_true", help="no aplicar las columnas de mes de las series (línea base)")
+    return p.parse_args()
+
+
+def _elegir(rng, opciones, n):
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos, k=n)
+
+
+def _insertar(cnx, tabla, columnas, filas):
+    """INSERT por lotes (executemany agrupa cada lote en un solo INSERT multi-fila)."""
+    sql = f"INSERT INTO `{tabla}` ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})"
+    cursor = cnx.cursor()
+    total = 0
+    lote = []
+    inicio = time.perf_counter()
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= TAM_LOTE:
+            cursor.executemany(sql, lote)
+            cnx.commit()
+            total += len(lote)
+            lote = []
+    if lote:
+        cursor.executemany(sql, lote)
+        cnx.commit()
+        total += len(lote)
+    cursor.close()
+    print(f"  {tabla:<22} {total:>9} filas  {time.perf_counter() - inicio:>6.1f}s")
+    return total
+
+
+def _crear_esquema(cnx, esquema):
+    """Recrea el esquema desde el volcado base, renombrando la base de datos."""
+    from database import migrador
+
+    with open(ARCHIVO_ESQUEMA, encoding="utf-8") as f:
+        texto = f.read().replace(f"`{ESQUEMA_ORIGINAL}`", f"`{esquema}`")
+    cursor = cnx.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{esquema}`")
+    for sentencia in migrador.sentencias(texto):
+        cursor.execute(sentencia)
+    cnx.commit()
+    cursor.close()
+
+
+def _aplicar_migraciones(cnx, indices=True, meses=True):
+    """Migraciones versionadas de la app (database/migrador.py), con o sin la de índices y la de meses."""
+    from database import migrador
+
+    omitir = () if indices else (VERSION_INDICES,)
+    if not meses:
+        omitir += VERSIONES_MESES
+    migrador.aplicar(omitir=omitir, conn=cnx)
+
+
+def _fecha(rng, ahora, dias):
+    return ahora - timedelta(days=rng.random() * dias)
+
+
+def _poblar(cnx, args):
+    from database.auth import hash_password
+
+    rng = random.Random(args.semilla)
+    ahora = datetime.now().replace(microsecond=0)
+    dias = max(1, args.meses * 30)
+    clave = hash_password("bench1234")  # un solo hash: PBKDF2 por usuario tardaría minutos
+
+    cursor = cnx.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    cursor.execute("SET UNIQUE_CHECKS = 0")
+    cursor.close()
+
+    n_inst = args.instituciones
+    _insertar(cnx, "institucion_educativa",
+              ("idInstitucion", "nombre_institucion", "direccion", "telefono", "cdce"),
+              ((i, f"U.E. Bench {i}", f"Calle {i}, Maracaibo", f"0261{i:07d}", f"CDCE {i % 12}")
+               for i in range(1, n_inst + 1)))
+
+    # Brigadas: cada institución rota los tipos; algunas brigadas concentran más actividad
+    brigadas = []  # (id, institucion, tipo)
+    for inst in range(1, n_inst + 1):
+        for k in range(args.brigadas_por_institucion):
+            brigadas.append((len(brigadas) + 1, inst, TIPOS_BRIGADA[k % len(TIPOS_BRIGADA)]))
+    n_brig = len(brigadas)
+
+    # Usuarios: un Directivo por institución, un Profesor por brigada, el resto alumnos
+    fijos = n_inst + n_brig
+    n_usuarios = max(args.usuarios, fijos + 2 * n_brig)
+    profesor_de = {}
+    subjefe_de = {}
+    usuarios = []
+    uid = 0
+    for inst in range(1, n_inst + 1):
+        uid += 1
+        usuarios.append((uid, "Directivo", None, inst))
+    for bid, inst, _ in brigadas:
+        uid += 1
+        profesor_de[bid] = uid
+        usuarios.append((uid, "Profesor", bid, inst))
+    for i in range(n_usuarios - uid):
+        bid, inst, _ = brigadas[i % n_brig]
+        uid += 1
+        if i < n_brig:
+            rol = "Brigadista Jefe"
+        elif i < 2 * n_brig:
+            rol = "Subjefe"
+            subjefe_de[bid] = uid
+        else:
+            rol = "Brigadista"
+        usuarios.append((uid, rol, bid, inst))
+
+    _insertar(cnx, "brigada",
+              ("idBrigada", "nombre_brigada", "area_accion", "descripcion", "coordinador", "color_identificador",
+               "tipo_brigada", "fecha_creacion", "Institucion_Educativa_idInstitucion", "profesor_id", "subjefe_id"),
+              ((bid, f"Brigada {tipo[:3].upper()} {bid}", AREAS[tipo], "Brigada generada para pruebas",
+                f"Coordinador {bid}", COLORES[bid % len(COLORES)], tipo, _fecha(rng, ahora, dias), inst,
+                profesor_de[bid], subjefe_de.get(bid))
+               for bid, inst, tipo in brigadas))
+    _insertar(cnx, "usuario",
+              ("idUsuario", "nombre", "apellido", "cedula", "email", "usuario", "contrasena", "rol",
+               "Brigada_idBrigada", "Institucion_Educativa_idInstitucion"),
+              ((u, rng.choice(NOMBRES), rng.choice(APELLIDOS), f"V{10_000_000 + u}", f"u{u}@bench.sbe",
+                f"u{u}", clave, rol, bid, inst)
+               for u, rol, bid, inst in usuarios))
+
+    # Reparto desigual de actividades entre brigadas (pocas muy activas, muchas tranquilas)
+    pesos = [rng.paretovariate(1.2) for _ in brigadas]
+    ids_brigada = [b[0] for b in brigadas]
+
+    n_act = args.actividades
+    brig_act = rng.choices(ids_brigada, weights=pesos, k=n_act)
+    estados = _elegir(rng, ESTADOS_ACTIVIDAD, n_act)
+    fechas_act = []
+
+    def _actividades():
+        for i in range(n_act):
+            bid = brig_act[i]
+            inicio = _fecha(rng, ahora, dias).replace(hour=0, minute=0, second=0)
+            fechas_act.append(inicio)
+            fin = inicio + timedelta(days=rng.randint(0, 3))
+            yield (i + 1, estados[i], f"{rng.choice(TITULOS)} {i + 1}"[:45],
+                   "Actividad generada para pruebas de rendimiento", inicio.date(), fin.date(), bid, profesor_de[bid])
+
+    _insertar(cnx, "actividad",
+              ("idActividad", "estado", "titulo", "descripcion", "fecha_inicio", "fecha_fin",
+               "Brigada_idBrigada", "Usuario_idUsuarioCreador"),
+              _actividades())
+
+    n_rep = args.reportes if args.reportes is not None else n_act // 10
+    brig_rep = rng.choices(ids_brigada, weights=pesos, k=n_rep)
+    _insertar(cnx, "reporte_incidente",
+              ("titulo", "descripcion", "ubicacion", "prioridad", "estado", "Brigada_idBrigada",
+               "creado_en", "actualizado_en"),
+              ((f"Incidente {i + 1}", "Incidente generado para pruebas", rng.choice(LUGARES), pr, est,
+                brig_rep[i], *(2 * [_fecha(rng, ahora, dias)]))
+               for i, (pr, est) in enumerate(zip(_elegir(rng, PRIORIDADES, n_rep), _elegir(rng, ESTADOS_REPORTE, n_rep)))))
+
+    def _sobre_actividades(n):
+        """(id_actividad, profesor, fecha posterior a la actividad) para reportes ligados a actividades."""
+        for _ in range(n):
+            a = rng.randrange(n_act)
+            bid = brig_act[a]
+            fecha = min(ahora, fechas_act[a] + timedelta(days=rng.randint(0, 10), hours=rng.randint(8, 18)))
+            yield a + 1, profesor_de[bid], fecha
+
+    _insertar(cnx, "reporte_actividad",
+              ("resumen", "participantes", "resultado", "Actividad_idActividad", "Usuario_idUsuario", "fecha_reporte"),
+              (("Resumen generado para pruebas", f"{rng.randint(3, 40)} alumnos", res, a, u, f)
+               for (a, u, f), res in zip(_sobre_actividades(n_act // 5), _elegir(rng, RESULTADOS, n_act // 5))))
+    _insertar(cnx, "reporte_de_impacto",
+              ("contenido", "brigada", "area_evaluada", "indicador", "valor", "unidad",
+               "Actividad_idActividad", "Usuario_idUsuario", "fecha_generacion"),
+              (("Impacto generado para pruebas", f"Brigada {a % n_brig}", "Áreas verdes", "Residuos recolectados",
+                str(rng.randint(1, 500)), "kg", a, u, f)
+               for a, u, f in _sobre_actividades(n_act // 20)))
+    _insertar(cnx, "indicador_ambiental",
+              ("valor", "tipo_indicador", "unidad", "Actividad_idActividad"),
+              ((round(rng.uniform(1, 500), 2), "Residuos", "kg", a) for a, _, _ in _sobre_actividades(n_act // 20)))
+
+    n_tur = args.turnos if args.turnos is not None else n_act // 5
+    brig_tur = rng.choices(ids_brigada, weights=pesos, k=n_tur)
+    _insertar(cnx, "turno",
+              ("Brigada_idBrigada", "fecha", "hora_inicio", "hora_fin", "ubicacion", "notas", "estado", "creado_en"),
+              ((brig_tur[i], f.date(), f"{h:02d}:00:00", f"{h + 2:02d}:00:00", rng.choice(LUGARES), "", est, f)
+               for i, (f, h, est) in enumerate(
+                   (_fecha(rng, ahora, dias), rng.randint(7, 15), e) for e in _elegir(rng, ESTADOS_TURNO, n_tur))))
+
+    cursor = cnx.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.execute("SET UNIQUE_CHECKS = 1")
+    for tabla in ("institucion_educativa", "brigada", "usuario", "actividad", "reporte_incidente",
+                  "reporte_actividad", "reporte_de_impacto", "indicador_ambiental", "turno"):
+        cursor.execute(f"ANALYZE TABLE `{tabla}`")
+        cursor.fetchall()
+    cursor.close()
+
+
+def main():
+    args = _argumentos()
+    original = os.environ.get(_variable_nombre_bd(), ESQUEMA_ORIGINAL)
+    if args.esquema in (original, ESQUEMA_ORIGINAL):
+        print(f"El esquema '{args.esquema}' es el de la aplicación; use otro (--esquema).")
+        sys.exit(2)
+    usar_esquema(args.esquema)
+
+    import mysql.connector
+    from database.connection import _config_conexion
+
+    config = _config_conexion()
+    config.pop("database")
+    inicio = time.perf_counter()
+    print(f"Recreando el esquema '{args.esquema}' en {config['host']}:{config['port']}...")
+    cnx = mysql.connector.connect(**config)
+    try:
+        _crear_esquema(cnx, args.esquema)
+        cnx.database = args.esquema
+        _aplicar_migraciones(cnx, indices=not args.sin_indices, meses=not args.sin_meses)
+        print("Generando datos:")
+        _poblar(cnx, args)
+    finally:
+        cnx.close()
+    # Los INSERT masivos no pasan por database/kpis.py: kpi_snapshot se calcula aquí
+    from database import kpis
+    kpis.reconciliar()
+    print(f"Listo en {time.perf_counter() - inicio:.0f}s. Medir con: python scripts/benchmark_crud.py --esquema {args.esquema}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import sys
+import os
+import json
+
+# Asegurar que el directorio raíz del proyecto esté en el PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.config import DB_HOST, DB_PORT, DB_PERFIL_ARCHIVO
+from database.perfiles import medir_perfiles
+
+# Mide los perfiles de conexión (lan, wan, compresión...) contra el servidor
+# configurado y registra el más rápido para SBE_DB_PERFIL=auto.
+# Uso: python scripts/medir_perfiles.py [repeticiones] [--no-guardar]
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    repeticiones = int(args[0]) if args else 3
+    guardar = "--no-guardar" not in sys.argv
+    print(f"Midiendo perfiles contra {DB_HOST}:{DB_PORT} ({repeticiones} repeticiones)...")
+    informe = medir_perfiles(repeticiones=repeticiones, guardar=guardar)
+    print(f"  {'perfil':<20} {'conexión':>10} {'latencia':>10} {'transfer.':>10} {'puntaje':>10}")
+    for nombre, r in informe["resultados"].items():
+        if "puntaje_ms" not in r:
+            print(f"  {nombre:<20} {r.get('omitido') or r.get('error')}")
+            continue
+        print(f"  {nombre:<20} {r['conexion_ms']:>8.1f}ms {r['latencia_ms']:>8.2f}ms "
+              f"{r['transferencia_ms']:>8.1f}ms {r['puntaje_ms']:>8.1f}ms")
+    if not informe["mejor"]:
+        print("Ningún perfil pudo medirse.")
+        sys.exit(1)
+    print(f"Mejor perfil: {informe['mejor']}")
+    if guardar:
+        print(f"Guardado en {DB_PERFIL_ARCHIVO} (se usa con SBE_DB_PERFIL=auto)")
+    else:
+        print(json.dumps(informe, ensure_ascii=False, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Asegurar que el directorio raíz del proyecto esté en el PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.registros import Actividad
+
+# Compara la memoria y el tiempo de construir N filas de actividad como dict
+# (dict(zip(columnas, fila)), lo que hacían los CRUD) y como registros __slots__.
+# No necesita base de datos: las filas se generan en memoria.
+
+COLUMNAS = ["idActividad", "titulo", "descripcion", "fecha_inicio", "fecha_fin", "estado",
+            "Brigada_idBrigada", "creador_id", "nombre_brigada"]
+
+
+def _filas(n):
+    base = datetime(2024, 1, 1, 8, 0)
+    return [
+        (i, f"Actividad {i}", "Jornada de limpieza", base + timedelta(days=i % 365),
+         base + timedelta(days=i % 365, hours=2), "Pendiente", i % 20, i % 50, f"Brigada {i % 20}")
+        for i in range(n)
+    ]
+
+
+def _medir(nombre, construir, filas):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = construir(filas)
+    ms = (time.perf_counter() - inicio) * 1000
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {nombre:<8} {actual / 1024:>10.1f} KiB   pico {pico / 1024:>10.1f} KiB   {ms:>8.1f} ms")
+    return resultado, actual
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    filas = _filas(n)
+    print(f"{n} filas de actividad (memoria retenida por la lista resultante):")
+    dicts, mem_dict = _medir("dict", lambda f: [dict(zip(COLUMNAS, fila)) for fila in f], filas)
+    regs, mem_slots = _medir("slots", lambda f: Actividad.desde_filas(COLUMNAS, f), filas)
+    assert all(r == d for r, d in zip(regs, dicts))
+    print(f"Ahorro: {100 * (1 - mem_slots / mem_dict):.0f}% ({(mem_dict - mem_slots) / n:.0f} bytes por fila)")
+
+
+if __name__ == "__main__":
+    main()
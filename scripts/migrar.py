@@ -0,0 +1,78 @@
+import sys
+import os
+import argparse
+
+# Asegurar que el directorio raíz del proyecto esté en el PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Aplica las migraciones pendientes de database/migraciones/ sobre la base de
+# datos configurada en .env (SBE_ENV). Paso de despliegue; la app también las
+# aplica al iniciar salvo con SBE_DB_MIGRAR_AL_INICIAR=0.
+#
+#   python scripts/migrar.py              aplica las pendientes
+#   python scripts/migrar.py --estado     solo muestra aplicadas y pendientes
+#   python scripts/migrar.py --inicial --seed
+#       base de datos vacía (p. ej. en la nube): carga el volcado base, migra y
+#       carga los datos de ejemplo de database/seed_super.sql
+
+DIR_DATABASE = os.path.join(os.path.dirname(__file__), '..', 'database')
+
+
+def _argumentos():
+    p = argparse.ArgumentParser(description="Migraciones versionadas del esquema del SBE.")
+    p.add_argument("--estado", action="store_true", help="muestra la versión actual y las pendientes")
+    p.add_argument("--inicial", action="store_true", help="carga antes db_brigadas_maracaibo.sql (base vacía)")
+    p.add_argument("--seed", action="store_true", help="carga después seed_super.sql")
+    return p.parse_args()
+
+
+def _cargar_archivo(nombre):
+    """Ejecuta un .sql completo sobre la base configurada (sin CREATE DATABASE / USE)."""
+    from database import migrador
+    from database.connection import get_connection
+
+    with open(os.path.join(DIR_DATABASE, nombre), encoding="utf-8") as f:
+        texto = f.read()
+    conn = get_connection(compartida=False)
+    try:
+        cursor = conn.cursor()
+        for sentencia in migrador.sentencias(texto):
+            if sentencia.upper().startswith(("CREATE DATABASE", "USE ")):
+                continue
+            cursor.execute(sentencia)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    print(f"{nombre} cargado.")
+
+
+def main():
+    args = _argumentos()
+    from database import migrador
+    from database.config import DB_HOST, DB_NAME
+
+    print(f"Base de datos: {DB_HOST}/{DB_NAME}")
+    if args.estado:
+        print(f"Versión actual: {migrador.version_actual()}")
+        pendientes = migrador.pendientes()
+        for version, nombre, _ in pendientes:
+            print(f"  pendiente {version:03d}_{nombre}")
+        if not pendientes:
+            print("  Sin migraciones pendientes.")
+        return
+
+    try:
+        if args.inicial:
+            _cargar_archivo("db_brigadas_maracaibo.sql")
+        aplicadas = migrador.aplicar()
+        if args.seed:
+            _cargar_archivo("seed_super.sql")
+    except Exception as e:
+        print(f"Error durante la migración: {e}")
+        sys.exit(1)
+    print(f"{len(aplicadas)} migraciones aplicadas; versión actual {migrador.version_actual()}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import sys
+import os
+import argparse
+import re
+import threading
+
+# Asegurar que el directorio raíz del proyecto esté en el PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generar_dataset import usar_esquema
+
+# Ejecuta cada función de lectura de database/crud_*.py (los mismos casos que
+# scripts/benchmark_crud.py), captura las sentencias SELECT que llegan al
+# conector y pide EXPLAIN de cada una al servidor.
+#
+#   python scripts/verificar_planes.py --esquema sbe_bench
+#
+# Falla (código 1) si una consulta con filtro selectivo (una brigada, un usuario,
+# un id...) recorre completa o ordena en memoria (filesort) una tabla caliente
+# sobre más de --filas-min filas estimadas. Las vistas sin filtro (administrador,
+# tipo_brigada) leen por definición buena parte de la tabla: se informan como
+# aviso, salvo con --estricto. El filesort de un GROUP BY ordena grupos, no
+# filas, y no se cuenta.
+# Usar un esquema con volumen (scripts/generar_dataset.py): con tablas pequeñas
+# el optimizador prefiere recorrer todo y los planes no son representativos.
+
+TABLAS_CALIENTES = {"actividad", "usuario", "reporte_incidente", "turno", "reporte_actividad", "reporte_de_impacto"}
+# Parámetros que acotan la consulta a pocas filas
+SELECTIVOS = {"brigada_rol_id", "brigada_id", "id_brigada", "profesor_id", "institucion_id", "id_institucion",
+              "usuario_id", "id_usuario", "id_actividad", "actividad_id", "email", "cedula", "usuario",
+              "id_reporte", "turno_id"}
+
+_RE_TABLA = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?`?(\w+)`?)?", re.IGNORECASE)
+_NO_ALIAS = {"WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "ON", "GROUP", "ORDER", "LIMIT", "USING", "UNION", "CROSS"}
+
+_capturadas = []
+_captura = threading.local()
+
+
+def _argumentos():
+    p = argparse.ArgumentParser(description="Verifica con EXPLAIN los planes de las consultas CRUD del SBE.")
+    p.add_argument("--esquema", default="sbe_bench")
+    p.add_argument("--filas-min", type=int, default=1000, help="filas estimadas a partir de las que se marca")
+    p.add_argument("--estricto", action="store_true", help="las vistas sin filtro también hacen fallar")
+    p.add_argument("--solo", default=None, help="solo los casos cuyo nombre contenga este texto")
+    return p.parse_args()
+
+
+def _instalar_captura():
+    """Envuelve execute() de los cursores del conector para registrar (caso, sql, params, preparada)."""
+    from mysql.connector import cursor as cursor_py
+
+    clases = [cursor_py.MySQLCursor, cursor_py.MySQLCursorPrepared]
+    try:
+        from mysql.connector import cursor_cext
+        clases.append(cursor_cext.CMySQLCursor)
+    except ImportError:
+        pass
+
+    for clase in clases:
+        original = clase.__dict__.get("execute")
+        if original is None:
+            continue
+
+        def execute(self, operation, params=None, *args, _original=original, _clase=clase, **kwargs):
+            caso = getattr(_captura, "caso", None)
+            if caso is not None:
+                _capturadas.append((caso, operation, params, _clase is cursor_py.MySQLCursorPrepared))
+            return _original(self, operation, params, *args, **kwargs)
+
+        clase.execute = execute
+
+
+def _partes(sql, params):
+    """Divide un multi-statement de ejecutar_lote() en (sql, params) por sentencia."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8")
+    if ";\n" not in sql or isinstance(params, dict):
+        return [(sql, params)]
+    params = list(params or ())
+    con_params = bool(params)
+    partes = []
+    for parte in sql.split(";\n"):
+        n = parte.count("%s")
+        if n:
+            partes.append((parte, tuple(params[:n])))
+            params = params[n:]
+        else:
+            partes.append((parte.replace("%%", "%") if con_params else parte, None))
+    return partes
+
+
+def _alias(sql):
+    """{alias o nombre: tabla} de las tablas en FROM/JOIN."""
+    alias = {}
+    for tabla, nombre in _RE_TABLA.findall(sql):
+        alias[tabla] = tabla
+        if nombre and nombre.upper() not in _NO_ALIAS:
+            alias[nombre] = tabla
+    return alias
+
+
+def _explicar(cnx, sql, params, preparada):
+    cursor = cnx.cursor(prepared=True) if preparada else cnx.cursor()
+    try:
+        cursor.execute("EXPLAIN " + sql, params or ())
+        columnas = [c.lower() for c in cursor.column_names]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _problemas(sql, plan, filas_min):
+    alias = _alias(sql)
+    agrupa = re.search(r"\bGROUP\s+BY\b", sql, re.IGNORECASE) is not None
+    problemas = []
+    calientes = []  # (tabla, filas) de las tablas calientes con muchas filas
+    for fila in plan:
+        tabla = alias.get(str(fila.get("table") or ""))
+        filas = int(fila.get("rows") or 0)
+        if tabla not in TABLAS_CALIENTES or filas < filas_min:
+            continue
+        calientes.append((tabla, filas))
+        if fila.get("type") == "ALL":
+            problemas.append(f"recorrido completo de {tabla} (~{filas} filas)")
+    # MySQL anota el filesort en la primera tabla del join (a veces brigada), pero
+    # ordena el resultado de todo el join: cuenta si participa una tabla caliente grande.
+    ordena = any("filesort" in str(fila.get("extra") or "") for fila in plan)
+    if ordena and not agrupa and calientes:
+        tabla, filas = max(calientes, key=lambda t: t[1])
+        problemas.append(f"filesort sobre {tabla} (~{filas} filas)")
+    return problemas
+
+
+def main():
+    args = _argumentos()
+    usar_esquema(args.esquema)
+
+    import mysql.connector
+    from benchmark_crud import _casos, _muestras
+    from database import cache
+    from database.config import DB_HOST, DB_NAME
+    from database.connection import _config_conexion
+
+    muestras = _muestras()
+    casos, _ = _casos(muestras, False, args.solo)
+    selectivo = {caso: bool(SELECTIVOS & set(kwargs)) for caso, _, kwargs, _ in casos}
+
+    _instalar_captura()
+    for caso, func, kwargs, _ in casos:
+        cache.limpiar()
+        _captura.caso = caso
+        try:
+            func(**kwargs)
+        except Exception as e:
+            print(f"  {caso}: error al ejecutar ({e})")
+        finally:
+            _captura.caso = None
+
+    vistas = set()
+    fallos = avisos = 0
+    cnx = mysql.connector.connect(**_config_conexion())
+    try:
+        print(f"Planes de {len(casos)} casos contra {DB_HOST}/{DB_NAME} (filas mínimas {args.filas_min}):")
+        for caso, sql, params, preparada in _capturadas:
+            for sentencia, p in _partes(sql, params):
+                if not re.match(r"\s*(\(\s*)*(SELECT|WITH)\b", sentencia, re.IGNORECASE):
+                    continue
+                clave = (caso, sentencia)
+                if clave in vistas:
+                    continue
+                vistas.add(clave)
+                try:
+                    plan = _explicar(cnx, sentencia, p, preparada)
+                except Exception as e:
+                    print(f"  ?     {caso}: EXPLAIN falló ({e})")
+                    continue
+                problemas = _problemas(sentencia, plan, args.filas_min)
+                if not problemas:
+                    continue
+                grave = selectivo[caso] or args.estricto
+                fallos += grave
+                avisos += not grave
+                resumen = " ".join(sentencia.split())[:110]
+                print(f"  {'FALLA' if grave else 'aviso'} {caso}: {'; '.join(problemas)}\n        {resumen}")
+    finally:
+        cnx.close()
+
+    print(f"{len(vistas)} consultas analizadas: {fallos} fallos, {avisos} avisos.")
+    if fallos:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
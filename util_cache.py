@@ -0,0 +1,212 @@
+"""
+Caché de las pantallas (dashboard, estadísticas) con TTL y revalidación en segundo plano.
+
+Dos alcances con la misma interfaz (Cache):
+  - compartida: una por proceso, para los datos que no dependen del usuario
+    sino de su ámbito (institución, tipo de brigada, brigada). Con la app
+    servida a muchos navegadores (modo web) todas las sesiones leen la misma
+    copia; las claves se arman con clave(nombre, institucion=..., tipo_brigada=...,
+    brigada=...).
+  - de_pagina(page): una por sesión, guardada en page.data, para lo propio del
+    usuario. Se descarta al cerrar sesión con la limpieza de claves "_cache_".
+
+Stale-while-revalidate: usar() pinta al instante el último valor guardado y, si
+está viejo, lo vuelve a cargar en segundo plano y pinta de nuevo al llegar.
+Un valor está viejo cuando:
+  - pasó su TTL (SBE_UI_CACHE_TTL_S), o
+  - se escribió en alguna de sus tablas: las escrituras CRUD invalidan
+    database.cache y este módulo escucha esas invalidaciones (cache.al_invalidar),
+    así que crear o completar una actividad marca las claves que dependen de
+    "actividad" en todas las cachés.
+
+Cada clave se carga una sola vez a la vez: las llamadas concurrentes, aunque
+vengan de otras sesiones (u otro event loop), esperan la misma carga. En la
+caché compartida la carga corre fuera del token de cancelación de la pantalla
+que la lanzó: si ese usuario navega a otra pantalla, las demás sesiones que la
+esperan la reciben igual.
+"""
+import asyncio
+import contextvars
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from time import monotonic
+
+from database import cache as cache_bd
+from database.config import UI_CACHE_TTL_S
+
+_CLAVE_PAGINA = "_cache_sesion"
+_MAX_COMPARTIDA = 512  # claves de la caché compartida (LRU); el ámbito brigada puede ser numeroso
+
+_caches = weakref.WeakSet()
+_caches_lock = threading.Lock()
+
+
+class Entrada:
+    """Valor guardado con su momento de carga, TTL y tablas de las que depende."""
+
+    __slots__ = ("valor", "cargado_en", "ttl", "tablas", "vieja")
+
+    def __init__(self, valor, ttl, tablas):
+        self.valor = valor
+        self.cargado_en = monotonic()
+        self.ttl = ttl
+        self.tablas = tablas
+        self.vieja = False
+
+    @property
+    def edad_s(self) -> float:
+        return monotonic() - self.cargado_en
+
+    @property
+    def fresca(self) -> bool:
+        return not self.vieja and self.edad_s < self.ttl
+
+
+class Cache:
+    """
+    Caché stale-while-revalidate segura entre hilos y event loops.
+    aislada=True: las cargas no heredan el contexto (token de cancelación) de quien las pide.
+    """
+
+    def __init__(self, aislada=False, max_entradas=None):
+        self.aislada = aislada
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # clave -> Entrada
+        self._tablas = {}               # clave -> tablas (también de las que aún cargan)
+        self._version = {}              # clave -> nº de veces marcada vieja
+        self._en_vuelo = {}             # clave -> concurrent.futures.Future de la carga en curso
+        self._m = {"aciertos": 0, "viejas": 0, "cargas": 0, "esperas_carga": 0}
+        with _caches_lock:
+            _caches.add(self)
+
+    def entrada(self, clave) -> Entrada | None:
+        with self._lock:
+            return self._entradas.get(clave)
+
+    def valor(self, clave, defecto=None):
+        """Último valor guardado (fresco o no), o 'defecto'."""
+        entrada = self.entrada(clave)
+        return defecto if entrada is None else entrada.valor
+
+    def _poner(self, clave, entrada):
+        self._entradas[clave] = entrada
+        self._entradas.move_to_end(clave)
+        while self.max_entradas and len(self._entradas) > self.max_entradas:
+            vieja, _ = self._entradas.popitem(last=False)
+            self._tablas.pop(vieja, None)
+            self._version.pop(vieja, None)
+
+    def guardar(self, clave, valor, tablas=(), ttl=None):
+        tablas = frozenset(t.lower() for t in tablas)
+        with self._lock:
+            self._tablas[clave] = tablas
+            self._poner(clave, Entrada(valor, UI_CACHE_TTL_S if ttl is None else ttl, tablas))
+
+    def marcar_viejas(self, tablas):
+        """Marca como viejas las claves que dependen de alguna de 'tablas'."""
+        with self._lock:
+            for clave, dependencias in self._tablas.items():
+                if dependencias & tablas:
+                    self._version[clave] = self._version.get(clave, 0) + 1
+                    entrada = self._entradas.get(clave)
+                    if entrada is not None:
+                        entrada.vieja = True
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._tablas.clear()
+            self._version.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return dict(self._m, entradas=len(self._entradas), cargando=len(self._en_vuelo))
+
+    async def _cargar(self, clave, cargar, tablas, ttl):
+        with self._lock:
+            self._tablas[clave] = tablas
+            version = self._version.get(clave, 0)
+        valor = await cargar()
+        with self._lock:
+            entrada = Entrada(valor, UI_CACHE_TTL_S if ttl is None else ttl, tablas)
+            # Una escritura se cruzó con la carga: guardar, pero revalidar la próxima vez
+            entrada.vieja = self._version.get(clave, 0) != version
+            self._poner(clave, entrada)
+        return valor
+
+    def _terminar(self, clave, futuro, tarea):
+        with self._lock:
+            self._en_vuelo.pop(clave, None)
+        if tarea.cancelled():
+            futuro.set_exception(asyncio.CancelledError())
+        elif tarea.exception() is not None:
+            futuro.set_exception(tarea.exception())
+        else:
+            futuro.set_result(tarea.result())
+
+    async def usar(self, clave, cargar, al_llegar, tablas=(), ttl=None):
+        """
+        Llama a al_llegar(valor) con el valor guardado, si hay, y retorna enseguida
+        si está fresco. Si falta o está viejo espera a cargar() (corrutina; una sola
+        por clave aunque se pida varias veces a la vez) y llama a al_llegar con el
+        valor nuevo. Si la recarga falla se conserva el valor anterior y la
+        excepción se propaga.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._m["aciertos" if entrada.fresca else "viejas"] += 1
+        if entrada is not None:
+            al_llegar(entrada.valor)
+            if entrada.fresca:
+                return entrada.valor
+
+        with self._lock:
+            futuro = self._en_vuelo.get(clave)
+            propia = futuro is None
+            if propia:
+                futuro = self._en_vuelo[clave] = Future()
+                self._m["cargas"] += 1
+            else:
+                self._m["esperas_carga"] += 1
+        if propia:
+            corrutina = self._cargar(clave, cargar, frozenset(t.lower() for t in tablas), ttl)
+            contexto = contextvars.Context() if self.aislada else contextvars.copy_context()
+            tarea = contexto.run(asyncio.get_running_loop().create_task, corrutina)
+            tarea.add_done_callback(lambda t: self._terminar(clave, futuro, t))
+        valor = await asyncio.shield(asyncio.wrap_future(futuro))
+        if entrada is None or valor != entrada.valor:
+            al_llegar(valor)
+        return valor
+
+
+def clave(nombre, institucion=None, tipo_brigada=None, brigada=None) -> tuple:
+    """Clave de la caché compartida: el dato y el ámbito del que depende."""
+    return (nombre, institucion, tipo_brigada, brigada)
+
+
+compartida = Cache(aislada=True, max_entradas=_MAX_COMPARTIDA)
+
+
+def de_pagina(page) -> Cache:
+    """Cache de la sesión de 'page' (se crea la primera vez)."""
+    datos = page.data if isinstance(getattr(page, "data", None), dict) else None
+    if datos is None:
+        return Cache()  # sin page.data: caché de un solo uso
+    sesion = datos.get(_CLAVE_PAGINA)
+    if sesion is None:
+        sesion = datos[_CLAVE_PAGINA] = Cache()
+    return sesion
+
+
+def _al_invalidar(tablas):
+    with _caches_lock:
+        caches = list(_caches)
+    for c in caches:
+        c.marcar_viejas(tablas)
+
+
+cache_bd.al_invalidar(_al_invalidar)